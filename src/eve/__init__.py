@@ -26,23 +26,26 @@ from . import exceptions, type_definitions  # isort:skip
 from . import utils  # isort:skip
 from . import concepts  # isort:skip
 from . import iterators, traits, visitors  # isort:skip
-from . import codegen, tree_utils  # isort:skip
+from . import codegen, columnar, profiling, serialization, tree_utils  # isort:skip
 
 
+from .columnar import ColumnarTree
 from .concepts import (
+    CompactNode,
     FieldKind,
     FrozenModel,
     FrozenNode,
     Model,
     Node,
     VType,
+    clone_tree,
     field,
     in_field,
     out_field,
 )
 from .iterators import traverse_tree
 from .traits import SymbolTableTrait
-from .tree_utils import FindNodes
+from .tree_utils import FindNodes, TreeIndex, diff_trees, patch_tree
 from .type_definitions import (
     DELETE,
     NOTHING,
@@ -65,4 +68,11 @@ from .type_definitions import (
     StrictStr,
     SymbolName,
 )
-from .visitors import NodeMutator, NodeTranslator, NodeVisitor
+from .visitors import (
+    CompiledNodeVisitor,
+    FusedVisitor,
+    NodeMutator,
+    NodeTranslator,
+    NodeVisitor,
+    VisitorContext,
+)
@@ -22,6 +22,7 @@ from __future__ import annotations
 import abc
 import collections.abc
 import contextlib
+import functools
 import os
 import string
 import sys
@@ -364,11 +365,26 @@ class FormatTemplate(Template):
 
     _formatter_: ClassVar[string.Formatter] = utils.XStringFormatter()
 
+    # Rendering function compiled from the definition on the first use
+    _render_: Optional[Callable[[Mapping[str, Any]], str]]
+
     def __init__(self, definition: str, **kwargs: Any) -> None:
         self.definition = definition
+        self._render_ = None
 
     def render_template(self, **kwargs: Any) -> str:
-        return self._formatter_.format(self.definition, **kwargs)
+        render = self._render_
+        if render is None:
+            if isinstance(self._formatter_, utils.XStringFormatter):
+                render = self._formatter_.compile_format(self.definition)
+            else:
+                render = functools.partial(self._formatter_.vformat, self.definition, ())
+            self._render_ = render
+        return render(kwargs)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Compiled code objects cannot be pickled
+        return {**self.__dict__, "_render_": None}
 
 
 class StringTemplate(Template):
@@ -468,12 +484,14 @@ class TemplatedGenerator(NodeVisitor):
     """
 
     _templates_: ClassVar[Mapping[str, Template]]
+    _template_cache_: ClassVar[Dict[Type, Tuple[Optional[Template], Optional[str]]]] = {}
 
     @classmethod
     def __init_subclass__(cls, *, inherit_templates: bool = True, **kwargs: Any) -> None:
         super().__init_subclass__(**kwargs)  # type: ignore  # mypy issues 4335, 4660
         if "_templates_" in cls.__dict__:
             raise TypeError(f"Invalid '_templates_' member in class {cls}")
+        cls._template_cache_ = {}
 
         templates: Dict[str, Template] = {}
         if inherit_templates:
@@ -542,8 +560,22 @@ class TemplatedGenerator(NodeVisitor):
 
         return result
 
+    def _get_profiling_label(self, method_name: str, node_class: Type) -> str:
+        if method_name == "generic_visit" and issubclass(node_class, Node):
+            for base in node_class.__mro__:
+                if base.__name__ in self._templates_:
+                    return f"template:{base.__name__}"
+                if base is Node:
+                    break
+        return method_name
+
     def get_template(self, node: TreeNode) -> Tuple[Optional[Template], Optional[str]]:
         """Get a template for a node instance (see class documentation)."""
+        try:
+            return self._template_cache_[node.__class__]
+        except KeyError:
+            pass
+
         template: Optional[Template] = None
         template_key: Optional[str] = None
         if isinstance(node, Node):
@@ -553,7 +585,10 @@ class TemplatedGenerator(NodeVisitor):
                 if template is not None or node_class is Node:
                     break
 
-        return template, None if template is None else template_key
+        result = template, None if template is None else template_key
+        self._template_cache_[node.__class__] = result
+
+        return result
 
     def render_template(
         self,
@@ -577,7 +612,19 @@ class TemplatedGenerator(NodeVisitor):
         )
 
     def transform_children(self, node: Node, **kwargs: Any) -> Dict[str, Any]:
-        return {key: self.visit(value, **kwargs) for key, value in node.iter_children()}
+        if self.executor is None:
+            return {key: self.visit(value, **kwargs) for key, value in node.iter_children()}
+
+        # Render the items of independent fields with the executor
+        children_metadata = node.__node_children__
+        return {
+            key: (
+                self.visit_independent(value, **kwargs)
+                if isinstance(value, list) and children_metadata[key].get("independent", False)
+                else self.visit(value, **kwargs)
+            )
+            for key, value in node.iter_children()
+        }
 
     def transform_impl_fields(self, node: Node, **kwargs: Any) -> Dict[str, Any]:
         return {key: self.visit(value, **kwargs) for key, value in node.iter_impl_fields()}
@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Columnar (struct-of-arrays) storage of node trees."""
+
+from __future__ import annotations
+
+import enum
+
+import numpy as np
+
+from .concepts import Node
+from .iterators import TraversalOrder
+from .typingx import Any, Dict, List, NamedTuple, Optional, Tuple, Type, Union
+
+
+#: Types of the field values stored (deduplicated) in the pool of values
+_POOLED_TYPES = (type(None), bool, int, float, str, bytes, enum.Enum)
+
+_NO_VALUE = -1
+
+
+class _NodesContainer(NamedTuple):
+    # Marker of a field value which is a collection of nodes (stored as children)
+    container_type: type
+    length: int
+
+
+class ColumnarTree:
+    """Struct-of-arrays representation of a tree of nodes.
+
+    Nodes are stored in pre-order (the root is the node ``0``) and each node is
+    identified by its position in the arrays:
+
+        * ``kinds``: index of the node class in :attr:`node_classes`.
+        * ``parents``: index of the parent node (``-1`` for the root).
+        * ``parent_fields``: index of the field name in :attr:`field_names`
+          where the node is stored in the parent node.
+        * ``parent_positions``: position of the node in the collection
+          stored in the parent field (``-1`` if it is the field value).
+        * ``depths``: depth of the node in the tree (``0`` for the root),
+          counting collections as an extra level as :func:`eve.traverse_tree`.
+        * ``ends``: end (excluded) of the range of the subtree of the node,
+          so the descendants of node ``i`` are ``i + 1, ..., ends[i] - 1``.
+
+    The rest of the field values (scalars, strings, enums, other objects) are
+    stored in per-field columns with indices in the pool of unique values
+    :attr:`pool` (``-1`` if the node has no such field), so queries on them
+    can also be vectorized.
+
+    Collections which mix nodes and other values are stored as opaque values
+    (nodes inside them are not part of the columnar tree). Other unhashable
+    values (like lazy node ids) are stored by reference.
+
+    """
+
+    node_classes: List[Type[Node]]
+    field_names: List[str]
+    pool: List[Any]
+    kinds: np.ndarray
+    parents: np.ndarray
+    parent_fields: np.ndarray
+    parent_positions: np.ndarray
+    depths: np.ndarray
+    ends: np.ndarray
+    columns: Dict[str, np.ndarray]
+
+    def __init__(self) -> None:
+        self.node_classes = []
+        self.field_names = []
+        self.pool = []
+        self._class_codes: Dict[Type[Node], int] = {}
+        self._field_codes: Dict[str, int] = {}
+        self._value_codes: Dict[Tuple[type, Any], int] = {}
+        self._str_codes: Dict[str, List[int]] = {}
+        empty = np.zeros(0, dtype=np.int32)
+        self.kinds = self.parents = self.parent_fields = empty
+        self.parent_positions = self.depths = self.ends = empty
+        self.columns = {}
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @classmethod
+    def from_tree(cls, root: Node) -> ColumnarTree:
+        """Build the columnar representation of the tree of `root`."""
+        self = cls()
+        kinds: List[int] = []
+        parents: List[int] = []
+        parent_fields: List[int] = []
+        parent_positions: List[int] = []
+        depths: List[int] = []
+        column_nodes: List[int] = []
+        column_fields: List[int] = []
+        column_values: List[int] = []
+
+        stack: List[Tuple[Node, int, int, int, int]] = [(root, -1, -1, -1, 0)]
+        while stack:
+            node, parent, field_code, position, depth = stack.pop()
+            index = len(kinds)
+            kinds.append(self._encode_class(node.__class__))
+            parents.append(parent)
+            parent_fields.append(field_code)
+            parent_positions.append(position)
+            depths.append(depth)
+
+            children: List[Tuple[Node, int, int, int, int]] = []
+            for name, value in self._iter_field_values(node):
+                code = self._encode_field(name)
+                if isinstance(value, Node):
+                    children.append((value, index, code, -1, depth + 1))
+                    continue
+                if isinstance(value, (list, tuple, set, frozenset)) and all(
+                    isinstance(item, Node) for item in value
+                ):
+                    children.extend(
+                        (item, index, code, i, depth + 2) for i, item in enumerate(value)
+                    )
+                    value = _NodesContainer(value.__class__, len(value))
+                column_nodes.append(index)
+                column_fields.append(code)
+                column_values.append(self._encode_value(value))
+            stack.extend(reversed(children))
+
+        self.kinds = np.array(kinds, dtype=np.int32)
+        self.parents = np.array(parents, dtype=np.int32)
+        self.parent_fields = np.array(parent_fields, dtype=np.int32)
+        self.parent_positions = np.array(parent_positions, dtype=np.int32)
+        self.depths = np.array(depths, dtype=np.int32)
+
+        # Subtree ranges: accumulate subtree sizes bottom-up (children follow parents)
+        sizes = [1] * len(kinds)
+        for index in range(len(kinds) - 1, 0, -1):
+            sizes[parents[index]] += sizes[index]
+        self.ends = np.arange(len(kinds), dtype=np.int32) + np.array(sizes, dtype=np.int32)
+
+        nodes = np.array(column_nodes, dtype=np.int32)
+        fields = np.array(column_fields, dtype=np.int32)
+        codes = np.array(column_values, dtype=np.int32)
+        for code, name in enumerate(self.field_names):
+            mask = fields == code
+            if mask.any():
+                column = np.full(len(kinds), _NO_VALUE, dtype=np.int32)
+                column[nodes[mask]] = codes[mask]
+                self.columns[name] = column
+
+        return self
+
+    def to_tree(self, index: int = 0) -> Node:
+        """Build the regular node tree rooted at node `index`.
+
+        Nodes are created with :meth:`eve.concepts.BaseNode.construct_trusted`
+        and the field values stored by reference are shared with the original tree.
+        """
+        start, end = index, int(self.ends[index])
+        kinds = self.kinds[start:end].tolist()
+        parents = self.parents[start:end].tolist()
+        parent_fields = self.parent_fields[start:end].tolist()
+        parent_positions = self.parent_positions[start:end].tolist()
+        columns = {name: column[start:end].tolist() for name, column in self.columns.items()}
+        class_fields = [
+            [(name, columns[name]) for name in node_class.__fields__ if name in columns]
+            for node_class in self.node_classes
+        ]
+
+        # Build nodes bottom-up (reversed pre-order), collecting them in their parents
+        pending: Dict[int, Dict[str, Any]] = {}
+        node: Node
+        for i in range(end - start - 1, -1, -1):
+            kwargs = pending.pop(i, {})
+            for name, column in class_fields[kinds[i]]:
+                code = column[i]
+                if code != _NO_VALUE:
+                    value = self.pool[code]
+                    if isinstance(value, _NodesContainer):
+                        items = kwargs.get(name, [])
+                        value = value.container_type(items)
+                    kwargs[name] = value
+            node = self.node_classes[kinds[i]].construct_trusted(**kwargs)
+
+            if i > 0:
+                parent_kwargs = pending.setdefault(parents[i] - start, {})
+                field_name = self.field_names[parent_fields[i]]
+                if parent_positions[i] < 0:
+                    parent_kwargs[field_name] = node
+                else:
+                    items = parent_kwargs.setdefault(field_name, [])
+                    if not items:
+                        container = self.pool[columns[field_name][parents[i] - start]]
+                        items.extend([None] * container.length)
+                    items[parent_positions[i]] = node
+
+        return node
+
+    def node_class(self, index: int) -> Type[Node]:
+        """Return the class of the node `index`."""
+        return self.node_classes[int(self.kinds[index])]
+
+    def children(self, index: int) -> np.ndarray:
+        """Return the indices of the direct children nodes of the node `index`."""
+        descendants = np.arange(index + 1, self.ends[index], dtype=np.int32)
+        children: np.ndarray = descendants[self.parents[index + 1 : self.ends[index]] == index]
+        return children
+
+    def subtree(self, index: int) -> np.ndarray:
+        """Return the indices of the nodes in the subtree of the node `index` (in pre-order)."""
+        return np.arange(index, self.ends[index], dtype=np.int32)
+
+    def ancestors(self, index: int) -> List[int]:
+        """Return the indices of the ancestors of the node `index` (closest first)."""
+        result = []
+        parent = int(self.parents[index])
+        while parent >= 0:
+            result.append(parent)
+            parent = int(self.parents[parent])
+        return result
+
+    def traverse(
+        self,
+        traversal_order: TraversalOrder = TraversalOrder.PRE_ORDER,
+        *,
+        only_types: Optional[Union[Type, Tuple[Type, ...]]] = None,
+    ) -> np.ndarray:
+        """Return the indices of the nodes in the order of an :func:`eve.traverse_tree` traversal.
+
+        Only nodes (not collections or other field values) are considered.
+        """
+        if traversal_order is TraversalOrder.PRE_ORDER:
+            order = np.arange(len(self), dtype=np.int32)
+        elif traversal_order is TraversalOrder.POST_ORDER:
+            # A node comes right after the last node of its subtree, deepest first
+            order = np.lexsort((-self.depths, self.ends)).astype(np.int32)
+        elif traversal_order is TraversalOrder.LEVELS_ORDER:
+            order = np.argsort(self.depths, kind="stable").astype(np.int32)
+        else:
+            raise ValueError(f"Invalid '{traversal_order}' traversal order.")
+
+        if only_types is not None:
+            order = order[self._type_mask(only_types)[self.kinds[order]]]
+        return order
+
+    def by_type(
+        self, node_type: Union[Type, Tuple[Type, ...]], *, within: Optional[int] = None
+    ) -> np.ndarray:
+        """Return the indices (in pre-order) of the instances of `node_type` (optionally, only inside node `within`)."""
+        mask = self._type_mask(node_type)[self.kinds]
+        if within is not None:
+            mask[: within + 1] = False
+            mask[self.ends[within] :] = False
+        return np.flatnonzero(mask).astype(np.int32)
+
+    def by_value(
+        self,
+        field_name: str,
+        value: Any,
+        *,
+        node_type: Optional[Union[Type, Tuple[Type, ...]]] = None,
+        within: Optional[int] = None,
+    ) -> np.ndarray:
+        """Return the indices (in pre-order) of the nodes whose `field_name` field is equal to `value`.
+
+        Strings match any value of a ``str`` subclass (e.g. :class:`eve.SymbolName`),
+        while other values only match values of the same type.
+        """
+        column = self.columns.get(field_name, None)
+        if isinstance(value, str):
+            codes = self._str_codes.get(str(value), [])
+        elif _is_pooled(value) and _value_key(value) in self._value_codes:
+            codes = [self._value_codes[_value_key(value)]]
+        else:
+            codes = []
+        if column is None or not codes:
+            return np.zeros(0, dtype=np.int32)
+
+        mask = np.isin(column, codes)
+        if node_type is not None:
+            mask &= self._type_mask(node_type)[self.kinds]
+        if within is not None:
+            mask[: within + 1] = False
+            mask[self.ends[within] :] = False
+        return np.flatnonzero(mask).astype(np.int32)
+
+    def values(self, field_name: str, indices: Optional[np.ndarray] = None) -> List[Any]:
+        """Return the values of a (non-node) field of the nodes in `indices` (all by default).
+
+        Nodes without a `field_name` field get ``None``.
+        """
+        column = self.columns.get(field_name, None)
+        if column is None:
+            return [None] * (len(self) if indices is None else len(indices))
+        codes = column if indices is None else column[indices]
+        pool = self.pool
+        return [pool[code] if code != _NO_VALUE else None for code in codes.tolist()]
+
+    def _type_mask(self, node_type: Union[Type, Tuple[Type, ...]]) -> np.ndarray:
+        return np.array(
+            [issubclass(node_class, node_type) for node_class in self.node_classes],
+            dtype=bool,
+        )
+
+    @staticmethod
+    def _iter_field_values(node: Node) -> List[Tuple[str, Any]]:
+        # Raw impl fields avoid allocating lazy ids
+        return [*node.iter_children(), *node._raw_impl_fields().items()]
+
+    def _encode_class(self, node_class: Type[Node]) -> int:
+        try:
+            return self._class_codes[node_class]
+        except KeyError:
+            code = self._class_codes[node_class] = len(self.node_classes)
+            self.node_classes.append(node_class)
+            return code
+
+    def _encode_field(self, name: str) -> int:
+        try:
+            return self._field_codes[name]
+        except KeyError:
+            code = self._field_codes[name] = len(self.field_names)
+            self.field_names.append(name)
+            return code
+
+    def _encode_value(self, value: Any) -> int:
+        if not (_is_pooled(value) or isinstance(value, _NodesContainer)):
+            self.pool.append(value)
+            return len(self.pool) - 1
+
+        key = _value_key(value)
+        try:
+            return self._value_codes[key]
+        except KeyError:
+            code = self._value_codes[key] = len(self.pool)
+            self.pool.append(value)
+            if isinstance(value, str):
+                self._str_codes.setdefault(str(value), []).append(code)
+            return code
+
+
+def _is_pooled(value: Any) -> bool:
+    return isinstance(value, _POOLED_TYPES)
+
+
+def _value_key(value: Any) -> Tuple[type, Any]:
+    # Values of different types are never merged (e.g. 1, 1.0 and True)
+    return (value.__class__, value)
@@ -20,19 +20,32 @@
 from __future__ import annotations
 
 import collections.abc
+import contextlib
+import copy
+import enum
 import functools
+import itertools
+import operator
+import os
+import struct
 
 import pydantic
+import typing_inspect
+import xxhash
 
 from . import type_definitions, utils
 from .type_definitions import NOTHING, IntEnum, Str, StrEnum
 from .typingx import (
+    TYPE_CHECKING,
     Any,
     AnyNoArgCallable,
+    Callable,
     ClassVar,
     Dict,
+    FrozenSet,
     Generator,
     Iterable,
+    Iterator,
     List,
     Optional,
     Set,
@@ -45,9 +58,14 @@ from .typingx import (
 )
 
 
+if TYPE_CHECKING:
+    from pydantic.typing import AbstractSetIntStr, MappingIntStrAny
+
+
 # -- Fields --
 class ImplFieldMetadataDict(TypedDict, total=False):
     info: pydantic.fields.FieldInfo
+    derived: bool
 
 
 NodeImplFieldMetadataDict = Dict[str, ImplFieldMetadataDict]
@@ -65,6 +83,8 @@ class FieldConstraintsDict(TypedDict, total=False):
 class FieldMetadataDict(TypedDict, total=False):
     constraints: FieldConstraintsDict
     kind: FieldKind
+    independent: bool
+    derived: bool
     definition: pydantic.fields.ModelField
 
 
@@ -80,10 +100,27 @@ def field(
     default_factory: Optional[AnyNoArgCallable] = None,
     kind: Optional[FieldKind] = None,
     constraints: Optional[FieldConstraintsDict] = None,
+    independent: bool = False,
+    derived: bool = False,
     schema_config: Dict[str, Any] = None,
 ) -> pydantic.fields.FieldInfo:
+    """Define a node field with Eve metadata.
+
+    Args:
+        default: Default value of the field.
+        default_factory: Function returning the default value of the field.
+        kind: Input or output field.
+        constraints: Constraints of the field values.
+        independent: The items of the (collection) field can be visited
+            independently of each other and of the rest of the tree,
+            e.g. in parallel (see :meth:`eve.NodeVisitor.visit_independent`).
+        derived: The (implementation) field is computed from the other fields
+            by a root validator, so it is not serialized (see :mod:`eve.serialization`).
+        schema_config: Extra keyword arguments for :func:`pydantic.Field`.
+
+    """
     metadata = {}
-    for key in ["kind", "constraints"]:
+    for key in ["kind", "constraints", "independent", "derived"]:
         value = locals()[key]
         if value:
             metadata[key] = value
@@ -110,6 +147,13 @@ class BaseModelConfig:
 
 class FrozenModelConfig(BaseModelConfig):
     allow_mutation = False
+    # Inmutable models can be safely shared (pydantic >= 1.10)
+    copy_on_model_validation = "none"
+
+
+class NodeConfig(pydantic.BaseConfig):
+    # Static type of the ``__config__`` built by pydantic from the ``Config`` classes of nodes
+    compact_ids: bool = False
 
 
 class Model(pydantic.BaseModel):
@@ -123,6 +167,39 @@ class FrozenModel(pydantic.BaseModel):
 
 
 # -- Nodes --
+#: Global switch to enable full validation in trusted node constructions.
+#: It can be initialized with the ``EVE_CHECKED_MODE`` environment variable.
+_CHECKED_MODE: bool = os.environ.get("EVE_CHECKED_MODE", "0").lower() not in ("", "0", "false")
+
+
+def is_checked_mode() -> bool:
+    """Return ``True`` if trusted node constructions are fully validated."""
+    return _CHECKED_MODE
+
+
+@contextlib.contextmanager
+def checked_mode(enabled: bool = True) -> Iterator[None]:
+    """Context manager to enable (or disable) the checked mode temporarily.
+
+    In checked mode, :meth:`BaseNode.construct_trusted` behaves exactly as
+    the regular node constructor, running all the validators. It is meant to
+    be used for debugging and testing pass pipelines which use the fast
+    (trusted) node construction path.
+
+    Examples:
+        >>> with checked_mode():
+        ...     assert is_checked_mode()
+
+    """
+    global _CHECKED_MODE
+    previous = _CHECKED_MODE
+    _CHECKED_MODE = enabled
+    try:
+        yield
+    finally:
+        _CHECKED_MODE = previous
+
+
 _EVE_NODE_INTERNAL_SUFFIX = "__"
 _EVE_NODE_IMPL_SUFFIX = "_"
 
@@ -132,6 +209,141 @@ LeafNode = Union[AnyNode, ValueNode]
 TreeNode = Union[AnyNode, Union[List[LeafNode], Dict[Any, LeafNode], Set[LeafNode]]]
 
 
+# Caches of the static analysis of node types (see below)
+_FIELD_NODE_TYPES_CACHE: Dict[Tuple[Type[BaseNode], str], Optional[FrozenSet[Type[BaseNode]]]] = {}
+_REACHABLE_NODE_TYPES_CACHE: Dict[Type[BaseNode], Optional[FrozenSet[Type[BaseNode]]]] = {}
+_CHILDREN_REACHING_CACHE: Dict[Tuple[Type[BaseNode], Tuple[Type, ...]], Tuple[str, ...]] = {}
+_NODE_TYPES_WITH_FIELD_TYPE_CACHE: Dict[Type, Tuple[Type[BaseNode], ...]] = {}
+
+
+def _clear_node_types_caches() -> None:
+    _FIELD_NODE_TYPES_CACHE.clear()
+    _REACHABLE_NODE_TYPES_CACHE.clear()
+    _CHILDREN_REACHING_CACHE.clear()
+    _NODE_TYPES_WITH_FIELD_TYPE_CACHE.clear()
+
+
+#: Count the nodes created with new (lazy) ids, used by :mod:`eve.profiling`
+_COUNT_CREATED_NODES = False
+_created_nodes_count = 0
+
+
+class _LazyNodeId:
+    """Node id whose unique number is only allocated (and formatted) when used.
+
+    The same instance is shared by all the shallow and deep copies of a node,
+    so they keep having the same id no matter which one is accessed first.
+    """
+
+    __slots__ = ("prefix", "number")
+
+    def __init__(self, prefix: str) -> None:
+        global _created_nodes_count
+        self.prefix = prefix
+        self.number: Optional[int] = None
+        if _COUNT_CREATED_NODES:
+            _created_nodes_count += 1
+
+    def __str__(self) -> str:
+        if self.number is None:
+            self.number = utils.UIDGenerator.sequential_number()
+        return f"{self.prefix}_{self.number}"
+
+    def __repr__(self) -> str:
+        return repr(str(self))
+
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, _LazyNodeId):
+            # Different unallocated ids will never be equal
+            return self.number is not None and other.number is not None and str(self) == str(other)
+        if isinstance(other, str):
+            return self.number is not None and str(self) == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def __copy__(self) -> _LazyNodeId:
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> _LazyNodeId:
+        return self
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (str, (str(self),))
+
+
+class _NodeIdDescriptor:
+    # Data descriptor for the ``id_`` field of nodes, which allocates lazy ids
+    # on first access (and stores the formatted string unless ``compact_ids`` is set)
+
+    def __get__(self, instance: Optional[BaseNode], owner: Type[BaseNode]) -> Any:
+        if instance is None:
+            return self
+        value = instance.__dict__["id_"]
+        if isinstance(value, _LazyNodeId):
+            formatted = str(value)
+            if not instance.__config__.compact_ids:
+                instance.__dict__["id_"] = formatted
+            return formatted
+
+        return value
+
+    def __set__(self, instance: BaseNode, value: Any) -> None:
+        instance.__dict__["id_"] = value
+
+
+def _no_fields_getter(node: BaseNode) -> Tuple[Any, ...]:
+    return ()
+
+
+def _make_fields_getter(names: Tuple[str, ...]) -> Callable[[BaseNode], Tuple[Any, ...]]:
+    # operator.attrgetter() returns a bare value (not a tuple) for a single name
+    if not names:
+        return _no_fields_getter
+    if len(names) == 1:
+        single_getter = operator.attrgetter(names[0])
+        return lambda node: (single_getter(node),)
+    return operator.attrgetter(*names)
+
+
+def _init_node_class_metadata(
+    cls: Type, model_fields: Dict[str, pydantic.fields.ModelField]
+) -> None:
+    impl_fields_metadata = {}
+    children_metadata = {}
+    for name, model_field in model_fields.items():
+        if name.endswith(_EVE_NODE_IMPL_SUFFIX):
+            impl_fields_metadata[name] = {
+                "definition": model_field,
+                **model_field.field_info.extra.get(_EVE_METADATA_KEY, {}),
+            }
+        elif not name.endswith(_EVE_NODE_INTERNAL_SUFFIX):
+            children_metadata[name] = {
+                "definition": model_field,
+                **model_field.field_info.extra.get(_EVE_METADATA_KEY, {}),
+            }
+
+    cls.__node_impl_fields__ = impl_fields_metadata
+    cls.__node_children__ = children_metadata
+
+    # Add precomputed field names and bulk value getters for fast iteration
+    cls.__node_children_names__ = tuple(children_metadata.keys())
+    cls.__node_children_getter__ = staticmethod(_make_fields_getter(cls.__node_children_names__))
+    cls.__node_impl_fields_names__ = tuple(
+        name for name in impl_fields_metadata if not name.endswith(_EVE_NODE_INTERNAL_SUFFIX)
+    )
+    cls.__node_impl_fields_getter__ = staticmethod(
+        _make_fields_getter(cls.__node_impl_fields_names__)
+    )
+
+
+def _deepcopy_inmutable_node(node: BaseNode, memo: Dict[int, Any]) -> BaseNode:
+    return node
+
+
 class NodeMetaclass(pydantic.main.ModelMetaclass):
     """Custom metaclass for Node classes.
 
@@ -146,22 +358,31 @@ class NodeMetaclass(pydantic.main.ModelMetaclass):
 
         # Postprocess created class:
         # Add metadata class members
-        impl_fields_metadata = {}
-        children_metadata = {}
-        for name, model_field in cls.__fields__.items():
-            if name.endswith(_EVE_NODE_IMPL_SUFFIX):
-                impl_fields_metadata[name] = {"definition": model_field}
-            elif not name.endswith(_EVE_NODE_INTERNAL_SUFFIX):
-                children_metadata[name] = {
-                    "definition": model_field,
-                    **model_field.field_info.extra.get(_EVE_METADATA_KEY, {}),
-                }
-
-        cls.__node_impl_fields__ = impl_fields_metadata
-        cls.__node_children__ = children_metadata
+        _init_node_class_metadata(cls, cls.__fields__)
+
+        # Inmutable nodes can be shared instead of copied (keeps interned nodes unique)
+        if not cls.__config__.allow_mutation and "__deepcopy__" not in namespace:
+            cls.__deepcopy__ = _deepcopy_inmutable_node
+
+        # New node classes can appear in the fields of already analyzed classes
+        _clear_node_types_caches()
 
         return cls
 
+    @no_type_check
+    def __call__(cls, *args, **kwargs):
+        id_ = kwargs.get("id_", None)
+        if isinstance(id_, _LazyNodeId):
+            # Keep sharing the (still unallocated) id of the source node
+            node = super().__call__(*args, **{**kwargs, "id_": None})
+            node.__dict__["id_"] = id_
+        else:
+            node = super().__call__(*args, **kwargs)
+            if _INTERN_TABLE is not None and id_ is None:
+                node = _INTERN_TABLE.intern(node)
+
+        return node
+
 
 class BaseNode(pydantic.BaseModel, metaclass=NodeMetaclass):
     """Base class representing an IR node.
@@ -189,43 +410,192 @@ class BaseNode(pydantic.BaseModel, metaclass=NodeMetaclass):
             not children nodes. They are intended to be defined by users when needed,
             typically to cache derived, non-essential information on the node.
 
+    Nodes are only equal to nodes of the same class with equal field values
+    (including ``id_``). See :meth:`content_hash` for a hash of the node
+    contents ignoring the ids.
+
     """
 
+    __config__: ClassVar[Type[NodeConfig]]
     __node_impl_fields__: ClassVar[NodeImplFieldMetadataDict]
     __node_children__: ClassVar[NodeChildrenMetadataDict]
+    __node_impl_fields_names__: ClassVar[Tuple[str, ...]]
+    __node_children_names__: ClassVar[Tuple[str, ...]]
+    #: Return a tuple with the values of the impl fields (in `__node_impl_fields_names__` order)
+    __node_impl_fields_getter__: ClassVar[Callable[..., Tuple[Any, ...]]]
+    #: Return a tuple with the values of the children (in `__node_children_names__` order)
+    __node_children_getter__: ClassVar[Callable[..., Tuple[Any, ...]]]
 
     # Node fields
-    #: Unique node-id (implementation field)
+    #: Unique node-id (implementation field). Generated ids are only allocated on first access
     id_: Optional[Str] = None
 
-    @pydantic.validator("id_", pre=True, always=True)
-    def _id_validator(cls: Type[AnyNode], v: Optional[str]) -> str:  # type: ignore  # validators are classmethods
+    @pydantic.validator("id_", always=True)
+    def _id_validator(cls: Type[AnyNode], v: Optional[str]) -> Union[str, _LazyNodeId]:  # type: ignore  # validators are classmethods
         if v is None:
-            v = utils.UIDGenerator.sequential_id(prefix=cls.__qualname__)
-        if not isinstance(v, str):
-            raise TypeError(f"id_ is not an 'str' instance ({type(v)})")
+            return _LazyNodeId(cls.__qualname__)
         return v
 
-    def iter_impl_fields(self) -> Generator[Tuple[str, Any], None, None]:
-        for name, _ in self.__fields__.items():
-            if name.endswith(_EVE_NODE_IMPL_SUFFIX) and not name.endswith(
-                _EVE_NODE_INTERNAL_SUFFIX
-            ):
-                yield name, getattr(self, name)
+    # Node private attributes
+    #: Cached value of :meth:`content_hash` (only used in inmutable nodes)
+    _content_hash_: Optional[int] = pydantic.PrivateAttr(None)
+
+    @classmethod
+    def construct_trusted(cls: Type[AnyNode], **kwargs: Any) -> AnyNode:
+        """Create a new node instance from trusted (already validated) field values.
+
+        Field validators are skipped (including the copy of children nodes
+        done by pydantic validation), so values should always come from valid
+        nodes of the same class. Missing fields are filled with their default
+        values. Root validators are still run, since they can compute derived
+        implementation fields from the new values (e.g. the ``symtable_`` of
+        :class:`eve.traits.SymbolTableTrait`). If the checked mode is enabled
+        (see :func:`checked_mode`), the regular (validated) constructor is used
+        instead.
+        """
+        if _CHECKED_MODE:
+            return cls(**kwargs)
+        fields_set = set(kwargs)
+        if cls.__pre_root_validators__ or cls.__post_root_validators__:
+            kwargs = cls._run_root_validators(kwargs)
+        if kwargs.get("id_", None) is None:
+            kwargs["id_"] = _LazyNodeId(cls.__qualname__)
+            if _INTERN_TABLE is not None:
+                return _INTERN_TABLE.intern(cls.construct(fields_set, **kwargs))
+
+        return cls.construct(fields_set, **kwargs)
+
+    @classmethod
+    def _run_root_validators(cls, values: Dict[str, Any]) -> Dict[str, Any]:
+        values = {
+            name: values[name] if name in values else model_field.get_default()
+            for name, model_field in cls.__fields__.items()
+        }
+        for validator in cls.__pre_root_validators__:
+            values = validator(cls, values)
+        for _, validator in cls.__post_root_validators__:
+            values = validator(cls, values)
+        return values
+
+    @classmethod
+    def update_forward_refs(cls, **localns: Any) -> None:
+        super().update_forward_refs(**localns)
+        _clear_node_types_caches()
+
+    def content_hash(self) -> int:
+        """Return a stable hash value of the node contents.
+
+        The hash is computed bottom-up from the class name and the children
+        values of the node, using the hashes of the children nodes (as in a
+        Merkle tree). Node ids and implementation fields are ignored. It is
+        cached in inmutable nodes (``allow_mutation = False``), which are
+        assumed to be deeply inmutable, and recomputed in every call otherwise.
+        """
+        result = self._content_hash_
+        if result is None:
+            result = _compute_content_hash(self)
+            if not self.__config__.allow_mutation:
+                object.__setattr__(self, "_content_hash_", result)
+
+        return result
+
+    def copy(self: AnyNode, **kwargs: Any) -> AnyNode:
+        """Duplicate the node (deep copies are made with :func:`clone_tree`)."""
+        deep = kwargs.pop("deep", False)
+        result = super().copy(**kwargs)
+        if deep:
+            memo: Dict[int, Any] = {}
+            values = result.__dict__
+            for name, value in values.items():
+                values[name] = _clone_value(value, memo)
+        object.__setattr__(result, "_content_hash_", None)
+        return result
+
+    def _clone_node(self: AnyNode, memo: Dict[int, Any]) -> AnyNode:
+        if not self.__config__.allow_mutation:
+            return self
+        node_class = self.__class__
+        result = node_class.__new__(node_class)
+        object.__setattr__(
+            result,
+            "__dict__",
+            {name: _clone_value(value, memo) for name, value in self.__dict__.items()},
+        )
+        object.__setattr__(result, "__fields_set__", set(self.__fields_set__))
+        result._init_private_attributes()
+        return result
+
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, BaseNode):
+            return super().__eq__(other)
+        if other.__class__ is not self.__class__:
+            return False
+        if not self.__config__.allow_mutation and self.content_hash() != other.content_hash():
+            # Fast negative check using the cached hash values
+            return False
+
+        # Field-by-field comparison stopping at the first difference
+        return self.__dict__ == other.__dict__
+
+    def __iter__(self) -> Generator[Tuple[str, Any], None, None]:
+        for name, value in self.__dict__.items():
+            yield name, str(value) if isinstance(value, _LazyNodeId) else value
+
+    def __repr_args__(self) -> List[Tuple[Optional[str], Any]]:
+        return [
+            (name, str(value) if isinstance(value, _LazyNodeId) else value)
+            for name, value in super().__repr_args__()
+        ]
+
+    def _iter(
+        self,
+        to_dict: bool = False,
+        by_alias: bool = False,
+        include: Optional[Union[AbstractSetIntStr, MappingIntStrAny]] = None,
+        exclude: Optional[Union[AbstractSetIntStr, MappingIntStrAny]] = None,
+        exclude_unset: bool = False,
+        exclude_defaults: bool = False,
+        exclude_none: bool = False,
+    ) -> Generator[Tuple[str, Any], None, None]:
+        items = super()._iter(
+            to_dict=to_dict,
+            by_alias=by_alias,
+            include=include,
+            exclude=exclude,
+            exclude_unset=exclude_unset,
+            exclude_defaults=exclude_defaults,
+            exclude_none=exclude_none,
+        )
+        if not to_dict:
+            # Used by copy(): keep lazy ids unallocated
+            yield from items
+        else:
+            for name, value in items:
+                yield name, str(value) if isinstance(value, _LazyNodeId) else value
+
+    def _raw_impl_fields(self) -> Dict[str, Any]:
+        # Implementation field values without allocating lazy ids
+        values = self.__dict__
+        return {name: values[name] for name in self.__node_impl_fields_names__}
+
+    def iter_impl_fields(self) -> Iterator[Tuple[str, Any]]:
+        return zip(self.__node_impl_fields_names__, self.__node_impl_fields_getter__(self))
+
+    def iter_children(self) -> Iterator[Tuple[str, Any]]:
+        return zip(self.__node_children_names__, self.__node_children_getter__(self))
+
+    def iter_children_values(self) -> Iterator[Any]:
+        return iter(self.__node_children_getter__(self))
 
-    def iter_children(self) -> Generator[Tuple[str, Any], None, None]:
-        for name, _ in self.__fields__.items():
-            if not (
-                name.endswith(_EVE_NODE_IMPL_SUFFIX) or name.endswith(_EVE_NODE_INTERNAL_SUFFIX)
-            ):
-                yield name, getattr(self, name)
+    class Config(BaseModelConfig):
+        #: Keep generated ids as numbers and format them on every access (saves memory)
+        compact_ids = False
 
-    def iter_children_values(self) -> Generator[Any, None, None]:
-        for _, node in self.iter_children():
-            yield node
 
-    class Config(BaseModelConfig):
-        pass
+#: Lazy id allocation (field names are excluded from the class namespace by pydantic)
+BaseNode.id_ = _NodeIdDescriptor()  # type: ignore  # field redefinition
 
 
 class Node(BaseNode):
@@ -237,6 +607,9 @@ class Node(BaseNode):
 class FrozenNode(Node):
     """Default public name for an inmutable base node class."""
 
+    def __hash__(self) -> int:
+        return self.content_hash()
+
     class Config(FrozenModelConfig):
         pass
 
@@ -272,6 +645,621 @@ def generic_iter_children(
     return children_iterator
 
 
+def _compute_content_hash(node: Any) -> int:
+    hasher = xxhash.xxh64()
+    node_class = node.__class__
+    hasher.update(f"{node_class.__module__}.{node_class.__qualname__}".encode())
+    for name, value in node.iter_children():
+        hasher.update(name.encode())
+        _update_content_hasher(hasher, value)
+    return hasher.intdigest()
+
+
+def _compute_value_hash(value: Any) -> int:
+    # Content hash of any tree value (node, collection or leaf)
+    hasher = xxhash.xxh64()
+    _update_content_hasher(hasher, value)
+    return hasher.intdigest()
+
+
+def _update_content_hasher(hasher: Any, value: Any) -> None:
+    # Feed the hasher with a stable encoding of the (field) value. Encoding is
+    # compatible with equality: 1 == 1.0 == True or StrEnum("a") == "a".
+    if isinstance(value, BaseNode):
+        hasher.update(b"N" + struct.pack("<Q", value.content_hash()))
+    elif value is None:
+        hasher.update(b"0")
+    elif isinstance(value, str):
+        data = str.encode(value, "utf-8", "surrogatepass")
+        hasher.update(b"s" + struct.pack("<Q", len(data)) + data)
+    elif isinstance(value, float) and not value.is_integer():
+        hasher.update(b"f" + struct.pack("<d", value))
+    elif isinstance(value, (int, float)):
+        number = int(value)
+        data = number.to_bytes(number.bit_length() // 8 + 1, "little", signed=True)
+        hasher.update(b"i" + struct.pack("<Q", len(data)) + data)
+    elif isinstance(value, (bytes, bytearray)):
+        hasher.update(b"b" + struct.pack("<Q", len(value)) + value)
+    elif isinstance(value, enum.Enum):
+        hasher.update(b"e" + f"{value.__class__.__qualname__}.{value.name}".encode())
+    elif isinstance(value, pydantic.BaseModel):
+        hasher.update(b"m")
+        for name, item in value:
+            hasher.update(name.encode())
+            _update_content_hasher(hasher, item)
+    elif isinstance(value, (collections.abc.Set, collections.abc.Mapping)):
+        # Unordered collections: combine the sorted hashes of the items
+        items = value.items() if isinstance(value, collections.abc.Mapping) else value
+        hashes = []
+        for item in items:
+            item_hasher = xxhash.xxh64()
+            _update_content_hasher(item_hasher, item)
+            hashes.append(item_hasher.intdigest())
+        hasher.update(b"u" + struct.pack(f"<{len(hashes) + 1}Q", len(hashes), *sorted(hashes)))
+    elif isinstance(value, collections.abc.Iterable):
+        items = list(value)
+        hasher.update(b"l" + struct.pack("<Q", len(items)))
+        for item in items:
+            _update_content_hasher(hasher, item)
+    else:
+        hasher.update(b"r" + repr(value).encode())
+
+
+def _equal_contents(a: Any, b: Any) -> bool:
+    # Structural equality ignoring node ids (but not other implementation fields)
+    if a is b:
+        return True
+    if isinstance(a, BaseNode) or isinstance(b, BaseNode):
+        return (
+            a.__class__ is b.__class__
+            and a.content_hash() == b.content_hash()
+            and all(
+                _equal_contents(a.__dict__[name], b.__dict__[name])
+                for name in itertools.chain(a.__node_children_names__, a.__node_impl_fields_names__)
+                if name != "id_"
+            )
+        )
+    if isinstance(a, (list, tuple)):
+        return (
+            isinstance(b, (list, tuple))
+            and len(a) == len(b)
+            and all(_equal_contents(x, y) for x, y in zip(a, b))
+        )
+    if isinstance(a, dict):
+        return (
+            isinstance(b, dict)
+            and a.keys() == b.keys()
+            and all(_equal_contents(value, b[key]) for key, value in a.items())
+        )
+    return bool(a == b)
+
+
+# -- Fast cloning of trees --
+#: Types of the values which are never copied by :func:`clone_tree`
+_SHARED_LEAF_TYPES = (
+    type(None),
+    bool,
+    int,
+    float,
+    complex,
+    str,
+    bytes,
+    enum.Enum,
+    frozenset,
+    _LazyNodeId,
+)
+
+
+def clone_tree(tree: Any) -> Any:
+    """Return a deep copy of `tree` sharing its inmutable parts.
+
+    Mutable nodes and builtin containers are copied without validation, while
+    inmutable leaf values (numbers, strings, enums, ...), frozen nodes and
+    frozen models are shared with the original tree (node ids are also kept).
+    Nodes referenced several times in the tree are only copied once. Values
+    of other types are copied with :func:`copy.deepcopy`.
+    """
+    return _clone_value(tree, {})
+
+
+def _clone_value(value: Any, memo: Dict[int, Any]) -> Any:
+    if isinstance(value, _SHARED_LEAF_TYPES):
+        return value
+    value_type = value.__class__
+    if value_type is list:
+        return [_clone_value(item, memo) for item in value]
+    if value_type is dict:
+        return {key: _clone_value(item, memo) for key, item in value.items()}
+    if isinstance(value, (BaseNode, CompactNode)):
+        key = id(value)
+        try:
+            return memo[key]
+        except KeyError:
+            result = memo[key] = value._clone_node(memo)
+            return result
+    if value_type is tuple:
+        items = tuple(_clone_value(item, memo) for item in value)
+        return value if all(new is old for new, old in zip(items, value)) else items
+    if value_type is set:
+        return {_clone_value(item, memo) for item in value}
+    if isinstance(value, pydantic.BaseModel) and not value.__config__.allow_mutation:
+        return value
+    return copy.deepcopy(value, memo)
+
+
+# -- Interning of inmutable nodes --
+class NodeInternTable:
+    """Table of canonical instances of inmutable nodes (hash-consing).
+
+    Interned nodes are shared by all the structurally equal instances of the
+    same class (ignoring ``id_`` values but not other implementation fields),
+    which can then be compared by identity.
+    Only inmutable nodes (``allow_mutation = False`` in the class config, as
+    in :class:`FrozenNode`) are interned, mutable nodes are never shared.
+
+    Examples:
+        >>> class Literal(FrozenNode):
+        ...     value: int
+        >>> table = NodeInternTable()
+        >>> with interning(table):
+        ...     a, b = Literal(value=1), Literal(value=1)
+        >>> a is b, len(table), table.hits
+        (True, 1, 1)
+
+    """
+
+    def __init__(self) -> None:
+        self._nodes: Dict[Tuple[Type[BaseNode], int], List[BaseNode]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return sum(len(nodes) for nodes in self._nodes.values())
+
+    def intern(self, node: AnyNode) -> AnyNode:
+        """Return the canonical instance of a node (the node itself if not interned yet)."""
+        if node.__config__.allow_mutation:
+            return node
+
+        candidates = self._nodes.setdefault((node.__class__, node.content_hash()), [])
+        for candidate in candidates:
+            if _equal_contents(candidate, node):
+                self.hits += 1
+                return candidate  # type: ignore  # same class as node
+
+        self.misses += 1
+        candidates.append(node)
+        return node
+
+    def clear(self) -> None:
+        self._nodes.clear()
+        self.hits = self.misses = 0
+
+
+#: Interning table used for the nodes created in the current :func:`interning` context
+_INTERN_TABLE: Optional[NodeInternTable] = None
+
+
+@contextlib.contextmanager
+def interning(table: Optional[NodeInternTable] = None) -> Iterator[NodeInternTable]:
+    """Context manager to intern all the inmutable nodes created inside it.
+
+    Nodes created with an explicit ``id_`` value are not interned.
+
+    Args:
+        table: Interning table to be used. If ``None``, a new table is created.
+
+    """
+    global _INTERN_TABLE
+    previous = _INTERN_TABLE
+    _INTERN_TABLE = table if table is not None else NodeInternTable()
+    try:
+        yield _INTERN_TABLE
+    finally:
+        _INTERN_TABLE = previous
+
+
+# -- Compact nodes --
+def _is_classvar_annotation(annotation: Any) -> bool:
+    if isinstance(annotation, str):
+        return annotation.startswith(("ClassVar", "typing.ClassVar", "typingx.ClassVar"))
+    return bool(typing_inspect.is_classvar(annotation))
+
+
+class CompactNodeMetaclass(type):
+    """Metaclass for compact node classes.
+
+    It generates the ``__slots__`` of the class from the field annotations and
+    an equivalent (hidden) pydantic model with the field definitions, which is
+    used for the :class:`Node` metadata and for the validation of the values.
+
+    """
+
+    @no_type_check
+    def __new__(mcls, name, bases, namespace, **kwargs):
+        # Optional preprocessing of class namespace before creation:
+        # Move field definitions (defaults, validators, config) to the pydantic model
+        model_bases = tuple(
+            base.__compact_model__ for base in bases if "__compact_model__" in dir(base)
+        )
+        base_fields = set()
+        for model_base in model_bases:
+            base_fields.update(model_base.__fields__)
+        model_namespace = {
+            "__module__": namespace.get("__module__", None),
+            "__qualname__": namespace.get("__qualname__", name),
+            "__annotations__": {},
+        }
+        if "Config" in namespace:
+            model_namespace["Config"] = namespace.pop("Config")
+
+        slots = list(namespace.get("__slots__", ()))
+        for field_name, annotation in namespace.get("__annotations__", {}).items():
+            if _is_classvar_annotation(annotation):
+                continue
+            if not field_name.startswith("_"):
+                model_namespace["__annotations__"][field_name] = annotation
+                if field_name in namespace:
+                    model_namespace[field_name] = namespace.pop(field_name)
+            if field_name not in base_fields and field_name != "id_":
+                slots.append(field_name)
+        for member_name, member in list(namespace.items()):
+            if hasattr(member, "__validator_config__") or hasattr(
+                member, "__root_validator_config__"
+            ):
+                model_namespace[member_name] = namespace.pop(member_name)
+        namespace["__slots__"] = tuple(slots)
+
+        cls = super().__new__(mcls, name, bases, namespace, **kwargs)
+
+        # Postprocess created class:
+        # Add the fields model (created with a different name to avoid resolving
+        # self-references to the model itself) and metadata class members
+        node_model = pydantic.main.ModelMetaclass(
+            f"{name}Fields", model_bases or (_CompactNodeModel,), model_namespace
+        )
+        node_model.__name__ = name
+        cls.__compact_model__ = node_model
+        cls.__fields__ = node_model.__fields__
+        # pydantic only checks virtual subclasses of models for objects with this attribute
+        cls.__post_root_validators__ = node_model.__post_root_validators__
+        _init_node_class_metadata(cls, cls.__fields__)
+        cls.__compact_slot_names__ = tuple(
+            "_id_value" if field_name == "id_" else field_name for field_name in cls.__fields__
+        )
+        cls.__compact_slots_getter__ = staticmethod(_make_fields_getter(cls.__compact_slot_names__))
+
+        # New node classes can appear in the fields of already analyzed classes
+        _clear_node_types_caches()
+
+        return cls
+
+
+class _CompactNodeModel(pydantic.BaseModel):
+    # Root of the pydantic models with the field definitions of compact nodes
+    class Config(BaseModelConfig):
+        pass
+
+
+class CompactNode(metaclass=CompactNodeMetaclass):
+    """Base class for memory-compact IR nodes.
+
+    Compact nodes implement the same API as :class:`Node` (and they are
+    registered as virtual subclasses of it), but they are plain classes with
+    ``__slots__`` generated from the field annotations instead of pydantic
+    models. Field types, defaults and validators are defined as in
+    :class:`Node` classes, but they are only checked at explicit checkpoints
+    (:meth:`validate_node` and :func:`validate_tree`) or in every construction
+    if the checked mode is enabled (see :func:`checked_mode`). Values are never
+    converted or copied by the constructor.
+
+    Field annotations referring to classes defined later should be updated
+    with :meth:`update_forward_refs`, as in pydantic models.
+
+    """
+
+    __slots__ = ("_id_value",)
+
+    __compact_model__: ClassVar[Type[pydantic.BaseModel]]
+    __compact_slot_names__: ClassVar[Tuple[str, ...]]
+    __compact_slots_getter__: ClassVar[Callable[..., Tuple[Any, ...]]]
+    __fields__: ClassVar[Dict[str, pydantic.fields.ModelField]]
+    __node_impl_fields__: ClassVar[NodeImplFieldMetadataDict]
+    __node_children__: ClassVar[NodeChildrenMetadataDict]
+    __node_impl_fields_names__: ClassVar[Tuple[str, ...]]
+    __node_children_names__: ClassVar[Tuple[str, ...]]
+    __node_impl_fields_getter__: ClassVar[Callable[..., Tuple[Any, ...]]]
+    __node_children_getter__: ClassVar[Callable[..., Tuple[Any, ...]]]
+
+    if TYPE_CHECKING:
+        # Slot with the value of ``id_`` (not a field annotation of the class at run time)
+        _id_value: Union[str, _LazyNodeId, None]
+
+    # Node fields
+    #: Unique node-id (implementation field). Generated ids are only allocated on first access
+    id_: Optional[Str] = None
+
+    def __init__(self, **kwargs: Any) -> None:
+        node_class = self.__class__
+        fields = node_class.__fields__
+        for name, slot_name in zip(fields, node_class.__compact_slot_names__):
+            try:
+                value = kwargs[name]
+            except KeyError:
+                model_field = fields[name]
+                if model_field.required:
+                    raise TypeError(f"{node_class.__name__}() missing required field '{name}'")
+                value = model_field.get_default()
+            object.__setattr__(self, slot_name, value)
+
+        if self._id_value is None:
+            self._id_value = _LazyNodeId(node_class.__qualname__)
+        if len(kwargs) > len(fields) or not fields.keys() >= kwargs.keys():
+            unknown = ", ".join(f"'{name}'" for name in kwargs if name not in fields)
+            raise TypeError(f"{node_class.__name__}() got unknown fields: {unknown}")
+        if _CHECKED_MODE:
+            self.validate_node()
+
+    @classmethod
+    def construct_trusted(cls: Type[AnyCompactNode], **kwargs: Any) -> AnyCompactNode:
+        """Create a new node instance (same as the regular constructor)."""
+        return cls(**kwargs)
+
+    @classmethod
+    def update_forward_refs(cls, **localns: Any) -> None:
+        cls.__compact_model__.update_forward_refs(**{cls.__name__: cls, **localns})
+        _clear_node_types_caches()
+
+    @classmethod
+    def __get_validators__(cls) -> Iterator[Callable[[Any], Any]]:
+        yield cls._validate_instance
+
+    @classmethod
+    def _validate_instance(cls: Type[AnyCompactNode], value: Any) -> AnyCompactNode:
+        # Children nodes are only type-checked (validated by their own checkpoints)
+        if not isinstance(value, cls):
+            raise TypeError(f"value is not a '{cls.__qualname__}' instance ({type(value)})")
+        return value
+
+    def validate_node(self) -> None:
+        """Validate the field values of this node (without validating the children nodes).
+
+        Raises:
+            pydantic.ValidationError: If any field value is not valid.
+
+        """
+        values = self._raw_values()
+        if isinstance(values["id_"], _LazyNodeId):
+            del values["id_"]
+        node_model = self.__class__.__compact_model__
+        *_, errors = pydantic.validate_model(node_model, values, cls=node_model)
+        if errors:
+            raise errors
+
+    def content_hash(self) -> int:
+        """Return a stable hash value of the node contents (see :meth:`BaseNode.content_hash`)."""
+        return _compute_content_hash(self)
+
+    def copy(
+        self: AnyCompactNode, *, update: Optional[Dict[str, Any]] = None, deep: bool = False
+    ) -> AnyCompactNode:
+        """Duplicate the node, optionally changing the values in `update` (not validated)."""
+        values = self._raw_values()
+        if deep:
+            values = _clone_value(values, {})
+        if update:
+            values.update(update)
+        return self.__class__(**values)
+
+    def _clone_node(self: AnyCompactNode, memo: Dict[int, Any]) -> AnyCompactNode:
+        return self.__class__(
+            **{name: _clone_value(value, memo) for name, value in self._raw_values().items()}
+        )
+
+    def _raw_values(self) -> Dict[str, Any]:
+        # Field values without allocating lazy ids
+        return dict(zip(self.__fields__, self.__compact_slots_getter__(self)))
+
+    def _raw_impl_fields(self) -> Dict[str, Any]:
+        values = self._raw_values()
+        return {name: values[name] for name in self.__node_impl_fields_names__}
+
+    def iter_impl_fields(self) -> Iterator[Tuple[str, Any]]:
+        return zip(self.__node_impl_fields_names__, self.__node_impl_fields_getter__(self))
+
+    def iter_children(self) -> Iterator[Tuple[str, Any]]:
+        return zip(self.__node_children_names__, self.__node_children_getter__(self))
+
+    def iter_children_values(self) -> Iterator[Any]:
+        return iter(self.__node_children_getter__(self))
+
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return False
+        return self.__compact_slots_getter__(self) == other.__compact_slots_getter__(other)
+
+    __hash__ = None  # type: ignore  # mutable objects should not be hashable
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value!r}" for name, value in self._raw_values().items())
+        return f"{self.__class__.__name__}({fields})"
+
+
+class _CompactNodeIdDescriptor:
+    # Descriptor for the ``id_`` field of compact nodes (stored in the ``_id_value`` slot),
+    # which allocates lazy ids on first access
+
+    def __get__(self, instance: Optional[CompactNode], owner: Type[CompactNode]) -> Any:
+        if instance is None:
+            return self
+        value = instance._id_value
+        if isinstance(value, _LazyNodeId):
+            formatted = instance._id_value = str(value)
+            return formatted
+        return value
+
+    def __set__(self, instance: CompactNode, value: Any) -> None:
+        instance._id_value = value
+
+
+CompactNode.id_ = _CompactNodeIdDescriptor()  # type: ignore  # field redefinition
+Node.register(CompactNode)
+
+AnyCompactNode = TypeVar("AnyCompactNode", bound=CompactNode)
+
+
+def validate_tree(tree: TreeNode) -> None:
+    """Validate all the compact nodes of a tree (see :meth:`CompactNode.validate_node`).
+
+    Raises:
+        pydantic.ValidationError: If any field value of a compact node is not valid.
+
+    """
+    stack = [tree]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, CompactNode):
+            value.validate_node()
+        stack.extend(generic_iter_children(value))
+
+
+# -- Static analysis of node types --
+def _iter_node_subclasses(node_class: Type[BaseNode]) -> Iterator[Type[BaseNode]]:
+    yield node_class
+    subclasses = node_class.__subclasses__()
+    if node_class is Node:
+        subclasses.append(CompactNode)  # type: ignore  # virtual subclass
+    for subclass in subclasses:
+        yield from _iter_node_subclasses(subclass)
+
+
+def _collect_model_field_node_types(
+    model_field: pydantic.fields.ModelField, collected: Set[Type[BaseNode]]
+) -> bool:
+    # Returns False if the field could contain any kind of node
+    sub_fields = list(model_field.sub_fields or [])
+    if model_field.key_field is not None:
+        sub_fields.append(model_field.key_field)
+    if sub_fields:
+        return all(_collect_model_field_node_types(field, collected) for field in sub_fields)
+
+    type_ = model_field.type_
+    if typing_inspect.is_literal_type(type_):
+        return True
+    if type_ is not Any and isinstance(type_, type):  # typing.Any is a class in Python >= 3.11
+        if issubclass(type_, BaseNode):
+            collected.update(_iter_node_subclasses(type_))
+        elif issubclass(BaseNode, type_):
+            return False
+        return True
+
+    return False
+
+
+def field_node_types(node_class: Type[BaseNode], name: str) -> Optional[FrozenSet[Type[BaseNode]]]:
+    """Return the node classes whose instances can be direct values of a children field.
+
+    Values stored inside collections (lists, dicts, etc.) are also considered
+    direct values of the field. It returns ``None`` if the type annotation of
+    the field does not restrict the node classes (e.g. ``Any`` or unresolved
+    forward references).
+    """
+    key = (node_class, name)
+    try:
+        return _FIELD_NODE_TYPES_CACHE[key]
+    except KeyError:
+        collected: Set[Type[BaseNode]] = set()
+        model_field = node_class.__node_children__[name]["definition"]
+        result = (
+            frozenset(collected)
+            if _collect_model_field_node_types(model_field, collected)
+            else None
+        )
+        _FIELD_NODE_TYPES_CACHE[key] = result
+        return result
+
+
+def reachable_node_types(node_class: Type[BaseNode]) -> Optional[FrozenSet[Type[BaseNode]]]:
+    """Return the node classes whose instances can appear in the subtree of a node.
+
+    The analysis uses the (transitive) type annotations of the children fields
+    and it is cached until a new node class is defined. It returns ``None`` if
+    the subtree could contain nodes of any class.
+    """
+    try:
+        return _REACHABLE_NODE_TYPES_CACHE[node_class]
+    except KeyError:
+        reachable: Set[Type[BaseNode]] = set()
+        pending = [node_class]
+        unrestricted = False
+        while pending and not unrestricted:
+            current = pending.pop()
+            if not issubclass(current, Node):
+                continue  # Only Node children are traversed
+            for name in current.__node_children__:
+                field_types = field_node_types(current, name)
+                if field_types is None:
+                    unrestricted = True
+                    break
+                new_types = field_types - reachable
+                reachable.update(new_types)
+                pending.extend(new_types)
+
+        result = None if unrestricted else frozenset(reachable)
+        _REACHABLE_NODE_TYPES_CACHE[node_class] = result
+        return result
+
+
+def children_fields_reaching(
+    node_class: Type[BaseNode], node_types: Tuple[Type, ...]
+) -> Tuple[str, ...]:
+    """Return the names of the children fields whose subtrees can contain instances of `node_types`."""
+    key = (node_class, node_types)
+    try:
+        return _CHILDREN_REACHING_CACHE[key]
+    except KeyError:
+        if not all(isinstance(t, type) and issubclass(t, BaseNode) for t in node_types):
+            # Other values (e.g. builtin types) are not tracked by the analysis
+            _CHILDREN_REACHING_CACHE[key] = tuple(node_class.__node_children__)
+            return _CHILDREN_REACHING_CACHE[key]
+
+        names = []
+        for name in node_class.__node_children__:
+            field_types = field_node_types(node_class, name)
+            if field_types is None or any(issubclass(t, node_types) for t in field_types):
+                names.append(name)
+                continue
+            for field_type in field_types:
+                reachable = reachable_node_types(field_type)
+                if reachable is None or any(issubclass(t, node_types) for t in reachable):
+                    names.append(name)
+                    break
+
+        result = tuple(names)
+        _CHILDREN_REACHING_CACHE[key] = result
+        return result
+
+
+def node_types_with_field_type(field_type: Type) -> Tuple[Type[BaseNode], ...]:
+    """Return all the defined node classes with children fields of `field_type` values."""
+    try:
+        return _NODE_TYPES_WITH_FIELD_TYPE_CACHE[field_type]
+    except KeyError:
+        node_types = {}
+        for node_class in _iter_node_subclasses(BaseNode):
+            for metadata in node_class.__node_children__.values():
+                type_ = metadata["definition"].type_
+                if isinstance(type_, type) and issubclass(type_, field_type):
+                    node_types[node_class] = None
+                    break
+
+        result = tuple(node_types)
+        _NODE_TYPES_WITH_FIELD_TYPE_CACHE[field_type] = result
+        return result
+
+
 # -- Misc --
 class VType(FrozenModel):
 
@@ -16,13 +16,18 @@
 
 """Iterator utils."""
 
-
+import collections
 import collections.abc
+import functools
 from typing import Iterator
 
 from . import concepts
 from .type_definitions import Enum
-from .typingx import Any, Generator, List, Optional
+from .typingx import Any, Callable, Deque, Dict, Generator, Iterable, Optional, Tuple, Type, Union
+
+
+ChildrenIterator = Callable[[concepts.TreeNode], Iterable[concepts.TreeIterationItem]]
+TypesSpec = Union[Type, Tuple[Type, ...]]
 
 
 class TraversalOrder(Enum):
@@ -31,77 +36,144 @@ class TraversalOrder(Enum):
     LEVELS_ORDER = "levels"
 
 
-def traverse_pre(
-    node: concepts.TreeNode, *, with_keys: bool = False, __key__: Optional[Any] = None
+def _make_pruned_children_iterator(
+    with_keys: bool, only_types: Tuple[Type, ...]
+) -> ChildrenIterator:
+    fields_cache: Dict[Type[concepts.BaseNode], Tuple[str, ...]] = {}
+
+    def iter_children(node: concepts.TreeNode) -> Iterable[concepts.TreeIterationItem]:
+        if isinstance(node, concepts.Node):
+            node_class = node.__class__
+            try:
+                names = fields_cache[node_class]
+            except KeyError:
+                names = fields_cache[node_class] = concepts.children_fields_reaching(
+                    node_class, only_types
+                )
+            if names == node_class.__node_children_names__:
+                # Nothing to prune: use the bulk getter of the class
+                return node.iter_children() if with_keys else node.iter_children_values()
+            if with_keys:
+                return [(name, getattr(node, name)) for name in names]
+            return [getattr(node, name) for name in names]
+
+        return concepts.generic_iter_children(node, with_keys=with_keys)
+
+    return iter_children
+
+
+def _traverse(
+    traversal: Callable[[concepts.TreeNode, bool, ChildrenIterator], Iterator[Any]],
+    node: concepts.TreeNode,
+    with_keys: bool,
+    only_types: Optional[TypesSpec],
+) -> Iterator[concepts.TreeIterationItem]:
+    if only_types is None:
+        return traversal(
+            node,
+            with_keys,
+            functools.partial(concepts.generic_iter_children, with_keys=with_keys),
+        )
+
+    if not isinstance(only_types, tuple):
+        only_types = (only_types,)
+    iterator = traversal(node, with_keys, _make_pruned_children_iterator(with_keys, only_types))
+    if with_keys:
+        return (item for item in iterator if isinstance(item[1], only_types))
+    return (item for item in iterator if isinstance(item, only_types))
+
+
+def _traverse_pre(
+    node: concepts.TreeNode, with_keys: bool, iter_children: ChildrenIterator
+) -> Generator[concepts.TreeIterationItem, None, None]:
+    # Stack of iterators over the children of the nodes in the current path
+    yield (None, node) if with_keys else node
+    stack = [iter(iter_children(node))]
+    while stack:
+        for item in stack[-1]:
+            yield item
+            stack.append(iter(iter_children(item[1] if with_keys else item)))
+            break
+        else:
+            stack.pop()
+
+
+def _traverse_post(
+    node: concepts.TreeNode, with_keys: bool, iter_children: ChildrenIterator
+) -> Generator[concepts.TreeIterationItem, None, None]:
+    # Stack of (item, iterator over the item's children) for the nodes in the current path
+    stack = [((None, node) if with_keys else node, iter(iter_children(node)))]
+    while stack:
+        item, children = stack[-1]
+        for child_item in children:
+            child = child_item[1] if with_keys else child_item
+            stack.append((child_item, iter(iter_children(child))))
+            break
+        else:
+            stack.pop()
+            yield item
+
+
+def _traverse_levels(
+    node: concepts.TreeNode, with_keys: bool, iter_children: ChildrenIterator
 ) -> Generator[concepts.TreeIterationItem, None, None]:
+    queue: Deque[concepts.TreeIterationItem] = collections.deque()
+    queue.append((None, node) if with_keys else node)
+    while queue:
+        item = queue.popleft()
+        yield item
+        queue.extend(iter_children(item[1] if with_keys else item))
+
+
+def traverse_pre(
+    node: concepts.TreeNode, *, with_keys: bool = False, only_types: Optional[TypesSpec] = None
+) -> Iterator[concepts.TreeIterationItem]:
     """Create a pre-order tree traversal iterator (Depth-First Search).
 
     Args:
         with_keys: Return tuples of (key, object) values where keys are
             the reference to the object node in the parent.
             Defaults to `False`.
+        only_types: Return only instances of these node types, skipping
+            the subtrees which cannot contain them according to the
+            type annotations of the node fields. Defaults to `None`.
 
     """
-
-    if with_keys:
-        yield __key__, node
-        for key, child in concepts.generic_iter_children(node, with_keys=True):
-            yield from traverse_pre(child, with_keys=True, __key__=key)
-    else:
-        yield node
-        for child in concepts.generic_iter_children(node, with_keys=False):
-            yield from traverse_pre(child, with_keys=False)
+    return _traverse(_traverse_pre, node, with_keys, only_types)
 
 
 def traverse_post(
-    node: concepts.TreeNode, *, with_keys: bool = False, __key__: Optional[Any] = None
-) -> Generator[concepts.TreeIterationItem, None, None]:
+    node: concepts.TreeNode, *, with_keys: bool = False, only_types: Optional[TypesSpec] = None
+) -> Iterator[concepts.TreeIterationItem]:
     """Create a post-order tree traversal iterator (Depth-First Search).
 
     Args:
         with_keys: Return tuples of (key, object) values where keys are
             the reference to the object node in the parent.
             Defaults to `False`.
+        only_types: Return only instances of these node types, skipping
+            the subtrees which cannot contain them according to the
+            type annotations of the node fields. Defaults to `None`.
 
     """
-    if with_keys:
-        for key, child in concepts.generic_iter_children(node, with_keys=True):
-            yield from traverse_post(child, with_keys=True, __key__=key)
-        yield __key__, node
-    else:
-        for child in concepts.generic_iter_children(node, with_keys=False):
-            yield from traverse_post(child, with_keys=False)
-        yield node
+    return _traverse(_traverse_post, node, with_keys, only_types)
 
 
 def traverse_levels(
-    node: concepts.TreeNode,
-    *,
-    with_keys: bool = False,
-    __key__: Optional[Any] = None,
-    __queue__: Optional[List] = None,
-) -> Generator[concepts.TreeIterationItem, None, None]:
+    node: concepts.TreeNode, *, with_keys: bool = False, only_types: Optional[TypesSpec] = None
+) -> Iterator[concepts.TreeIterationItem]:
     """Create a tree traversal iterator by levels (Breadth-First Search).
 
     Args:
         with_keys: Return tuples of (key, object) values where keys are
             the reference to the object node in the parent.
             Defaults to `False`.
+        only_types: Return only instances of these node types, skipping
+            the subtrees which cannot contain them according to the
+            type annotations of the node fields. Defaults to `None`.
 
     """
-    __queue__ = __queue__ or []
-    if with_keys:
-        yield __key__, node
-        __queue__.extend(concepts.generic_iter_children(node, with_keys=True))
-        if __queue__:
-            key, child = __queue__.pop(0)
-            yield from traverse_levels(child, with_keys=True, __key__=key, __queue__=__queue__)
-    else:
-        yield node
-        __queue__.extend(concepts.generic_iter_children(node, with_keys=False))
-        if __queue__:
-            child = __queue__.pop(0)
-            yield from traverse_levels(child, with_keys=False, __queue__=__queue__)
+    return _traverse(_traverse_levels, node, with_keys, only_types)
 
 
 def traverse_tree(
@@ -109,6 +181,7 @@ def traverse_tree(
     traversal_order: TraversalOrder = TraversalOrder.PRE_ORDER,
     *,
     with_keys: bool = False,
+    only_types: Optional[TypesSpec] = None,
 ) -> Iterator[concepts.TreeIterationItem]:
     """Create a tree traversal iterator.
 
@@ -117,10 +190,15 @@ def traverse_tree(
         with_keys: Return tuples of (key, object) values where keys are
             the reference to the object node in the parent.
             Defaults to `False`.
+        only_types: Return only instances of these node types, skipping
+            the subtrees which cannot contain them according to the
+            type annotations of the node fields. Defaults to `None`.
 
     """
     assert isinstance(traversal_order, TraversalOrder)
-    iterator = globals()[f"traverse_{traversal_order.value}"](node=node, with_keys=with_keys)
+    iterator = globals()[f"traverse_{traversal_order.value}"](
+        node=node, with_keys=with_keys, only_types=only_types
+    )
     assert isinstance(iterator, collections.abc.Iterator)
 
     return iterator
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Profiling of visitors and code generators.
+
+Inside a :func:`profiling` context, the visitor functions selected by the
+dispatching mechanism of :class:`eve.NodeVisitor` (visitor methods,
+:meth:`eve.NodeVisitor.generic_visit` or templates of
+:class:`eve.codegen.TemplatedGenerator` classes) are instrumented to record
+the number of calls, the inclusive and exclusive time and the number of
+nodes created in each one of them, for each visited node class. Since
+dispatch caches are cleared when entering and exiting the context, visitors
+do not pay any cost when profiling is disabled.
+
+Examples:
+    >>> with profiling() as profiler:  # doctest: +SKIP
+    ...     code = MyCodeGenerator.apply(MyTranslator().visit(tree))
+    >>> print(profiler.report(limit=10))  # doctest: +SKIP
+    >>> profiler.export_collapsed_stacks("codegen.folded")  # doctest: +SKIP
+
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import time
+
+from . import concepts, visitors
+from .typingx import IO, Dict, Iterator, List, Optional, Tuple, Union
+
+
+#: Key of the profiled visitor functions: (visitor class, function, node class)
+ProfileKey = Tuple[str, str, str]
+
+
+class ProfileStats:
+    """Statistics of a profiled visitor function.
+
+    Times are in seconds. Inclusive values (``total_*``) of recursive
+    calls are only counted once, in the outermost call.
+    """
+
+    __slots__ = ("calls", "total_time", "self_time", "total_created_nodes", "self_created_nodes")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total_time = 0.0
+        self.self_time = 0.0
+        self.total_created_nodes = 0
+        self.self_created_nodes = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"ProfileStats(calls={self.calls}, total_time={self.total_time:.6f}, "
+            f"self_time={self.self_time:.6f}, total_created_nodes={self.total_created_nodes}, "
+            f"self_created_nodes={self.self_created_nodes})"
+        )
+
+
+def format_profile_key(key: ProfileKey) -> str:
+    """Format a profile key as ``VisitorClass.function(NodeClass)``."""
+    visitor_name, function_name, node_class_name = key
+    return f"{visitor_name}.{function_name}({node_class_name})"
+
+
+class VisitorProfiler:
+    """Collector of the profiling data of visitor functions (see :func:`profiling`)."""
+
+    #: Statistics by profiled function
+    stats: Dict[ProfileKey, ProfileStats]
+
+    def __init__(self) -> None:
+        self.stats = {}
+        # Self time by call stack (for flame graphs)
+        self._stacks: Dict[Tuple[ProfileKey, ...], float] = {}
+        # Open calls: [path, start time, children time, created nodes at start, children nodes]
+        self._frames: List[list] = []
+        self._active: Dict[ProfileKey, int] = {}
+
+    def push(self, key: ProfileKey) -> None:
+        """Start a call of the profiled function `key`."""
+        path = self._frames[-1][0] + (key,) if self._frames else (key,)
+        self._active[key] = self._active.get(key, 0) + 1
+        self._frames.append([path, time.perf_counter(), 0.0, concepts._created_nodes_count, 0])
+
+    def pop(self) -> None:
+        """Finish the innermost call."""
+        end = time.perf_counter()
+        path, start, children_time, start_nodes, children_nodes = self._frames.pop()
+        key = path[-1]
+        elapsed = end - start
+        created_nodes = concepts._created_nodes_count - start_nodes
+
+        stats = self.stats.get(key, None)
+        if stats is None:
+            stats = self.stats[key] = ProfileStats()
+        stats.calls += 1
+        stats.self_time += elapsed - children_time
+        stats.self_created_nodes += created_nodes - children_nodes
+        self._active[key] -= 1
+        if not self._active[key]:
+            stats.total_time += elapsed
+            stats.total_created_nodes += created_nodes
+        self._stacks[path] = self._stacks.get(path, 0.0) + elapsed - children_time
+
+        if self._frames:
+            parent = self._frames[-1]
+            parent[2] += elapsed
+            parent[4] += created_nodes
+
+    def clear(self) -> None:
+        self.stats.clear()
+        self._stacks.clear()
+
+    def report(self, *, limit: Optional[int] = None, sort_by: str = "self_time") -> str:
+        """Format a table with the statistics of the profiled functions.
+
+        Args:
+            limit: Maximum number of functions in the table. Defaults to `None` (all).
+            sort_by: :class:`ProfileStats` attribute used to sort the functions
+                (in descending order). Defaults to ``"self_time"``.
+
+        """
+        items = sorted(self.stats.items(), key=lambda item: getattr(item[1], sort_by), reverse=True)
+        lines = [
+            f"{'calls':>10} {'total (ms)':>12} {'self (ms)':>12} "
+            f"{'total nodes':>12} {'self nodes':>12}  function"
+        ]
+        for key, stats in items[:limit]:
+            lines.append(
+                f"{stats.calls:>10} {stats.total_time * 1e3:>12.3f} {stats.self_time * 1e3:>12.3f} "
+                f"{stats.total_created_nodes:>12} {stats.self_created_nodes:>12}  "
+                f"{format_profile_key(key)}"
+            )
+        return "\n".join(lines)
+
+    def iter_collapsed_stacks(self) -> Iterator[str]:
+        """Iterate over the call stacks in the collapsed (folded) format of flame graph tools.
+
+        Each line contains the ``;``-separated function names of the stack
+        and the exclusive time of the innermost function in microseconds.
+        """
+        for path, self_time in self._stacks.items():
+            microseconds = round(self_time * 1e6)
+            if microseconds > 0:
+                yield f"{';'.join(format_profile_key(key) for key in path)} {microseconds}"
+
+    def export_collapsed_stacks(self, file: Union[str, os.PathLike, IO[str]]) -> None:
+        """Write the collapsed call stacks (see :meth:`iter_collapsed_stacks`) to a file.
+
+        The output can be rendered with tools like ``flamegraph.pl`` or speedscope.
+        """
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, "w") as stream:
+                self.export_collapsed_stacks(stream)
+        else:
+            for line in self.iter_collapsed_stacks():
+                file.write(line + "\n")
+
+
+@contextlib.contextmanager
+def profiling(profiler: Optional[VisitorProfiler] = None) -> Iterator[VisitorProfiler]:
+    """Context manager to profile all the visitors used inside it.
+
+    Visitor instances defining visitor methods in the instance (instead of
+    in the class) should be created inside the context to be profiled.
+
+    Args:
+        profiler: Profiler collecting the data. If ``None``, a new profiler is created.
+
+    """
+    previous = visitors._PROFILER, concepts._COUNT_CREATED_NODES
+    visitors._PROFILER = profiler if profiler is not None else VisitorProfiler()
+    concepts._COUNT_CREATED_NODES = True
+    visitors.NodeVisitor.clear_dispatch_cache()
+    try:
+        yield visitors._PROFILER
+    finally:
+        visitors._PROFILER, concepts._COUNT_CREATED_NODES = previous
+        visitors.NodeVisitor.clear_dispatch_cache()
@@ -0,0 +1,674 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Compact binary serialization of node trees.
+
+The encoding starts with a header (magic bytes and format version) followed
+by the tables of interned strings, classes and enum members, and the encoded
+root value. Node fields are written in the order of the precomputed node
+metadata (children first, then implementation fields) without field names,
+and nodes and collections are prefixed with their encoded size, so
+:class:`NodeReader` can decode trees lazily and skip whole subtrees.
+
+Node ids following the default ``<prefix>_<number>`` format are encoded as
+a reference to the interned prefix and the number. Generated ids can also
+be encoded without their number, to be allocated again after decoding.
+Values of other types are pickled.
+
+Derived implementation fields (e.g. ``symtable_``) are not encoded: the
+root validators of the decoded nodes compute them again, so they reference
+the decoded subtrees. Nodes are encoded by value: a node instance appearing
+several times in the encoded value (e.g. a shared inmutable node) is written
+once for each occurrence and decoded as separate (equal) copies.
+"""
+
+from __future__ import annotations
+
+import enum
+import importlib
+import pickle
+import struct
+import sys
+
+import pydantic
+
+from . import concepts, exceptions
+from .concepts import Node
+from .typingx import (
+    IO,
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
+
+
+#: Version of the binary format written by :func:`dumps`
+FORMAT_VERSION = 1
+
+_MAGIC = b"EVEB"
+
+# Value tags
+(
+    _NONE,
+    _FALSE,
+    _TRUE,
+    _INT,
+    _FLOAT,
+    _STR,
+    _TYPED_STR,
+    _BYTES,
+    _ENUM,
+    _ID,
+    _NODE,
+    _MODEL,
+    _LIST,
+    _TUPLE,
+    _SET,
+    _FROZENSET,
+    _DICT,
+    _PICKLE,
+    _LAZY_ID,
+) = range(19)
+
+_COLLECTION_TAGS: Dict[type, int] = {list: _LIST, tuple: _TUPLE, set: _SET, frozenset: _FROZENSET}
+_COLLECTION_TYPES = {tag: collection_type for collection_type, tag in _COLLECTION_TAGS.items()}
+
+# Kinds of entries in the classes table
+_NODE_CLASS, _MODEL_CLASS, _OTHER_CLASS = range(3)
+
+_SIZE = struct.Struct("<I")
+_FLOAT64 = struct.Struct("<d")
+
+
+def dumps(value: Any, *, with_ids: bool = True, lazy_ids: bool = False) -> bytes:
+    """Encode a node tree (or any value containing nodes) in the binary format.
+
+    Args:
+        with_ids: Encode node ids. Otherwise, decoded nodes get new ids.
+            Defaults to `True`.
+        lazy_ids: Encode generated ids without their (allocated or not) number,
+            so decoded nodes get new numbers when their ids are first used.
+            Defaults to `False`.
+
+    """
+    encoder = _Encoder(with_ids=with_ids, lazy_ids=lazy_ids)
+    encoder.encode(value)
+    return encoder.getvalue()
+
+
+def loads(data: Union[bytes, bytearray, memoryview]) -> Any:
+    """Decode a value encoded with :func:`dumps`."""
+    return NodeReader(data).load()
+
+
+def dump(value: Any, file: IO[bytes], *, with_ids: bool = True, lazy_ids: bool = False) -> None:
+    """Write the binary encoding of `value` (see :func:`dumps`) in a file."""
+    file.write(dumps(value, with_ids=with_ids, lazy_ids=lazy_ids))
+
+
+def load(file: IO[bytes]) -> Any:
+    """Decode a value from a file written with :func:`dump`."""
+    return loads(file.read())
+
+
+_ENCODED_IMPL_FIELDS_CACHE: Dict[Type[Node], Tuple[str, ...]] = {}
+
+
+def _encoded_impl_fields_names(node_class: Type[Node]) -> Tuple[str, ...]:
+    """Return the names of the (not derived) implementation fields to be encoded."""
+    try:
+        return _ENCODED_IMPL_FIELDS_CACHE[node_class]
+    except KeyError:
+        names = _ENCODED_IMPL_FIELDS_CACHE[node_class] = tuple(
+            name
+            for name in node_class.__node_impl_fields_names__
+            if not node_class.__node_impl_fields__[name].get("derived", False)
+        )
+        return names
+
+
+def _import_class(module: str, qualname: str) -> type:
+    result: Any = sys.modules.get(module, None) or importlib.import_module(module)
+    for name in qualname.split("."):
+        result = getattr(result, name)
+    return cast(type, result)
+
+
+class _Encoder:
+    def __init__(self, *, with_ids: bool, lazy_ids: bool) -> None:
+        self.with_ids = with_ids
+        self.lazy_ids = lazy_ids
+        self.out = bytearray()
+        self.strings: Dict[str, int] = {}
+        self.classes: Dict[type, int] = {}
+        self.class_entries: List[Tuple[type, int, Tuple[str, ...]]] = []
+        self.enums: Dict[Tuple[type, Any], int] = {}
+        self.enum_entries: List[enum.Enum] = []
+
+    def getvalue(self) -> bytes:
+        body = self.out
+
+        # Tables are encoded in reverse order, since later tables can add new strings
+        self.out = enums = bytearray()
+        self.write_uint(len(self.enum_entries))
+        for member in self.enum_entries:
+            self.write_uint(self.class_index(member.__class__, _OTHER_CLASS))
+            self.encode(member.value)
+
+        self.out = classes = bytearray()
+        self.write_uint(len(self.class_entries))
+        for cls, kind, names in self.class_entries:
+            self.out.append(kind)
+            self.write_uint(self.string_index(cls.__module__))
+            self.write_uint(self.string_index(cls.__qualname__))
+            self.write_uint(len(names))
+            for name in names:
+                self.write_uint(self.string_index(name))
+
+        self.out = strings = bytearray()
+        self.write_uint(len(self.strings))
+        for string in self.strings:
+            encoded = string.encode("utf-8", "surrogatepass")
+            self.write_uint(len(encoded))
+            strings += encoded
+
+        self.out = body
+        return b"".join([_MAGIC, bytes([FORMAT_VERSION]), strings, classes, enums, body])
+
+    def write_uint(self, value: int) -> None:
+        out = self.out
+        while value > 0x7F:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+
+    def begin_block(self) -> int:
+        start = len(self.out)
+        self.out += b"\x00\x00\x00\x00"
+        return start
+
+    def end_block(self, start: int) -> None:
+        _SIZE.pack_into(self.out, start, len(self.out) - start - _SIZE.size)
+
+    def string_index(self, value: str) -> int:
+        try:
+            return self.strings[value]
+        except KeyError:
+            index = self.strings[value] = len(self.strings)
+            return index
+
+    def class_index(self, cls: type, kind: int) -> int:
+        try:
+            return self.classes[cls]
+        except KeyError:
+            try:
+                found = _import_class(cls.__module__, cls.__qualname__) is cls
+            except (AttributeError, ImportError):
+                found = False
+            if not found:
+                raise exceptions.EveValueError(
+                    message=f"Class '{cls.__qualname__}' cannot be imported from '{cls.__module__}'."
+                )
+
+            if kind == _NODE_CLASS:
+                node_class = cast(Type[Node], cls)
+                names = node_class.__node_children_names__ + _encoded_impl_fields_names(node_class)
+            elif kind == _MODEL_CLASS:
+                names = tuple(cast(Type[pydantic.BaseModel], cls).__fields__)
+            else:
+                names = ()
+            index = self.classes[cls] = len(self.class_entries)
+            self.class_entries.append((cls, kind, names))
+            return index
+
+    def enum_index(self, member: enum.Enum) -> int:
+        key = (member.__class__, member.value)
+        try:
+            return self.enums[key]
+        except KeyError:
+            index = self.enums[key] = len(self.enum_entries)
+            self.enum_entries.append(member)
+            return index
+
+    def encode(self, value: Any) -> None:
+        out = self.out
+        value_type = type(value)
+        if value is None:
+            out.append(_NONE)
+        elif value_type is bool:
+            out.append(_TRUE if value else _FALSE)
+        elif value_type is int:
+            out.append(_INT)
+            self.write_uint(value << 1 if value >= 0 else ((-value) << 1) - 1)
+        elif value_type is str:
+            out.append(_STR)
+            self.write_uint(self.string_index(value))
+        elif isinstance(value, Node):
+            self.encode_node(value)
+        elif value_type in _COLLECTION_TAGS:
+            out.append(_COLLECTION_TAGS[value_type])
+            start = self.begin_block()
+            self.write_uint(len(value))
+            for item in value:
+                self.encode(item)
+            self.end_block(start)
+        elif value_type is dict:
+            out.append(_DICT)
+            start = self.begin_block()
+            self.write_uint(len(value))
+            for key, item in value.items():
+                self.encode(key)
+                self.encode(item)
+            self.end_block(start)
+        elif value_type is float:
+            out.append(_FLOAT)
+            out += _FLOAT64.pack(value)
+        elif isinstance(value, enum.Enum):
+            out.append(_ENUM)
+            self.write_uint(self.enum_index(value))
+        elif isinstance(value, str):
+            out.append(_TYPED_STR)
+            self.write_uint(self.class_index(value_type, _OTHER_CLASS))
+            self.write_uint(self.string_index(str(value)))
+        elif isinstance(value, pydantic.BaseModel):
+            out.append(_MODEL)
+            self.write_uint(self.class_index(value_type, _MODEL_CLASS))
+            start = self.begin_block()
+            for name in value.__fields__:
+                self.encode(getattr(value, name))
+            self.end_block(start)
+        elif value_type is bytes:
+            out.append(_BYTES)
+            self.write_uint(len(value))
+            out += value
+        else:
+            encoded = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            out.append(_PICKLE)
+            self.write_uint(len(encoded))
+            out += encoded
+
+    def encode_node(self, node: Node) -> None:
+        node_class = node.__class__
+        self.out.append(_NODE)
+        self.write_uint(self.class_index(node_class, _NODE_CLASS))
+        start = self.begin_block()
+        for value in node_class.__node_children_getter__(node):
+            self.encode(value)
+        impl_fields = node._raw_impl_fields()
+        for name in _encoded_impl_fields_names(node_class):
+            if name == "id_":
+                self.encode_id(impl_fields[name])
+            else:
+                self.encode(impl_fields[name])
+        self.end_block(start)
+
+    def encode_id(self, value: Any) -> None:
+        if not self.with_ids:
+            self.out.append(_NONE)
+            return
+
+        if isinstance(value, concepts._LazyNodeId):
+            if self.lazy_ids:
+                self.out.append(_LAZY_ID)
+                self.write_uint(self.string_index(value.prefix))
+                return
+            str(value)  # allocate the number
+            prefix, number = value.prefix, value.number
+            assert number is not None
+        elif type(value) is str:
+            prefix, separator, suffix = value.rpartition("_")
+            if not (separator and suffix.isascii() and suffix.isdigit()) or (
+                str(int(suffix)) != suffix
+            ):
+                self.encode(value)
+                return
+            number = int(suffix)
+        else:
+            self.encode(value)
+            return
+
+        self.out.append(_ID)
+        self.write_uint(self.string_index(prefix))
+        self.write_uint(number)
+
+
+class NodeReader:
+    """Reader of values encoded with :func:`dumps`.
+
+    The whole tree can be decoded with :meth:`load`, or lazily with
+    :meth:`root` and :meth:`iter_nodes`, which return :class:`LazyNode`
+    instances decoding only the accessed fields.
+
+    Args:
+        data: Binary encoded data (a ``memoryview`` of a mapped file
+            can be used to avoid reading it in advance).
+
+    """
+
+    strings: List[str]
+    classes: List[Tuple[Any, int, Tuple[str, ...]]]
+    enums: List[enum.Enum]
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        self.data = data
+        if bytes(data[: len(_MAGIC)]) != _MAGIC:
+            raise exceptions.EveValueError(message="Invalid binary encoding of eve values.")
+        version = data[len(_MAGIC)]
+        if version != FORMAT_VERSION:
+            raise exceptions.EveValueError(
+                message=f"Unsupported format version {version} (expected {FORMAT_VERSION})."
+            )
+        pos = len(_MAGIC) + 1
+
+        self.strings = []
+        count, pos = self._read_uint(pos)
+        for _ in range(count):
+            size, pos = self._read_uint(pos)
+            self.strings.append(str(data[pos : pos + size], "utf-8", "surrogatepass"))
+            pos += size
+
+        self.classes = []
+        count, pos = self._read_uint(pos)
+        for _ in range(count):
+            kind = data[pos]
+            module, pos = self._read_uint(pos + 1)
+            qualname, pos = self._read_uint(pos)
+            n_names, pos = self._read_uint(pos)
+            names = []
+            for _ in range(n_names):
+                name, pos = self._read_uint(pos)
+                names.append(self.strings[name])
+            cls = _import_class(self.strings[module], self.strings[qualname])
+            self.classes.append((cls, kind, tuple(names)))
+
+        self.enums = []
+        count, pos = self._read_uint(pos)
+        for _ in range(count):
+            class_index, pos = self._read_uint(pos)
+            value, pos = self._read_value(pos, lazy=False)
+            self.enums.append(self.classes[class_index][0](value))
+
+        self._root_pos = pos
+
+    def load(self) -> Any:
+        """Decode the whole encoded value."""
+        return self._read_value(self._root_pos, lazy=False)[0]
+
+    def root(self) -> Any:
+        """Decode the encoded value lazily (nodes are returned as :class:`LazyNode`)."""
+        return self._read_value(self._root_pos, lazy=True)[0]
+
+    def iter_nodes(
+        self, *, only_types: Optional[Union[Type, Tuple[Type, ...]]] = None
+    ) -> Iterator[LazyNode]:
+        """Iterate (in pre-order) over the encoded nodes without decoding them.
+
+        Args:
+            only_types: Return only instances of these node types, skipping
+                the encoded subtrees which cannot contain them according to the
+                type annotations of the node fields. Defaults to `None`.
+
+        """
+        if only_types is not None and not isinstance(only_types, tuple):
+            only_types = (only_types,)
+        data = self.data
+        stack = [self._root_pos]
+        while stack:
+            pos = stack.pop()
+            tag = data[pos]
+            if tag == _NODE:
+                node = self._read_value(pos, lazy=True)[0]
+                node_class = node.node_class
+                if only_types is None or issubclass(node_class, only_types):
+                    yield node
+                if only_types is None:
+                    names = node_class.__node_children_names__
+                else:
+                    names = concepts.children_fields_reaching(node_class, only_types)
+                offsets = node._field_offsets()
+                stack.extend(offsets[name] for name in reversed(names) if name in offsets)
+            elif tag in _COLLECTION_TYPES or tag == _DICT:
+                count, pos = self._read_uint(pos + 1 + _SIZE.size)
+                items = []
+                for _ in range(count):
+                    if tag == _DICT:
+                        pos = self._skip(pos)
+                    items.append(pos)
+                    pos = self._skip(pos)
+                stack.extend(reversed(items))
+
+    def _read_uint(self, pos: int) -> Tuple[int, int]:
+        data = self.data
+        byte = data[pos]
+        if byte < 0x80:
+            return byte, pos + 1
+        result = byte & 0x7F
+        shift = 7
+        while True:
+            pos += 1
+            byte = data[pos]
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result, pos + 1
+            shift += 7
+
+    def _read_value(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        tag = self.data[pos]
+        try:
+            reader = self._value_readers[tag]
+        except KeyError:
+            raise exceptions.EveValueError(
+                message=f"Invalid value tag {tag} at position {pos}."
+            ) from None
+        return reader(self, pos + 1, lazy)
+
+    def _read_none(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        return None, pos
+
+    def _read_false(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        return False, pos
+
+    def _read_true(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        return True, pos
+
+    def _read_int(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        value, pos = self._read_uint(pos)
+        return (value >> 1 if not value & 1 else -((value + 1) >> 1)), pos
+
+    def _read_float(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        return _FLOAT64.unpack_from(self.data, pos)[0], pos + _FLOAT64.size
+
+    def _read_str(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        index, pos = self._read_uint(pos)
+        return self.strings[index], pos
+
+    def _read_typed_str(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        class_index, pos = self._read_uint(pos)
+        index, pos = self._read_uint(pos)
+        return self.classes[class_index][0](self.strings[index]), pos
+
+    def _read_bytes(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        size, pos = self._read_uint(pos)
+        return bytes(self.data[pos : pos + size]), pos + size
+
+    def _read_enum(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        index, pos = self._read_uint(pos)
+        return self.enums[index], pos
+
+    def _read_id(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        prefix, pos = self._read_uint(pos)
+        number, pos = self._read_uint(pos)
+        return f"{self.strings[prefix]}_{number}", pos
+
+    def _read_lazy_id(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        prefix, pos = self._read_uint(pos)
+        return concepts._LazyNodeId(self.strings[prefix]), pos
+
+    def _read_node(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        class_index, pos = self._read_uint(pos)
+        node_class, _, names = self.classes[class_index]
+        end = pos + _SIZE.size + _SIZE.unpack_from(self.data, pos)[0]
+        pos += _SIZE.size
+        if lazy:
+            return LazyNode(self, node_class, names, pos), end
+        kwargs = {}
+        for name in names:
+            kwargs[name], pos = self._read_value(pos, False)
+        return node_class.construct_trusted(**kwargs), end
+
+    def _read_model(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        class_index, pos = self._read_uint(pos)
+        model_class, _, names = self.classes[class_index]
+        pos += _SIZE.size
+        kwargs = {}
+        for name in names:
+            kwargs[name], pos = self._read_value(pos, lazy)
+        return model_class.construct(**kwargs), pos
+
+    def _read_collection(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        tag = self.data[pos - 1]
+        count, pos = self._read_uint(pos + _SIZE.size)
+        items = []
+        for _ in range(count):
+            item, pos = self._read_value(pos, lazy)
+            items.append(item)
+        if tag == _LIST:
+            return items, pos
+        return _COLLECTION_TYPES[tag](items), pos
+
+    def _read_dict(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        count, pos = self._read_uint(pos + _SIZE.size)
+        result = {}
+        for _ in range(count):
+            key, pos = self._read_value(pos, lazy)
+            result[key], pos = self._read_value(pos, lazy)
+        return result, pos
+
+    def _read_pickle(self, pos: int, lazy: bool) -> Tuple[Any, int]:
+        size, pos = self._read_uint(pos)
+        return pickle.loads(bytes(self.data[pos : pos + size])), pos + size
+
+    #: Value readers indexed by value tag
+    _value_readers: ClassVar[Dict[int, Callable[[NodeReader, int, bool], Tuple[Any, int]]]] = {
+        _NONE: _read_none,
+        _FALSE: _read_false,
+        _TRUE: _read_true,
+        _INT: _read_int,
+        _FLOAT: _read_float,
+        _STR: _read_str,
+        _TYPED_STR: _read_typed_str,
+        _BYTES: _read_bytes,
+        _ENUM: _read_enum,
+        _ID: _read_id,
+        _NODE: _read_node,
+        _MODEL: _read_model,
+        _LIST: _read_collection,
+        _TUPLE: _read_collection,
+        _SET: _read_collection,
+        _FROZENSET: _read_collection,
+        _DICT: _read_dict,
+        _PICKLE: _read_pickle,
+        _LAZY_ID: _read_lazy_id,
+    }
+
+    def _skip(self, pos: int) -> int:
+        tag = self.data[pos]
+        pos += 1
+        if tag == _NONE or tag == _FALSE or tag == _TRUE:
+            return pos
+        if tag == _STR or tag == _INT or tag == _ENUM or tag == _LAZY_ID:
+            return self._read_uint(pos)[1]
+        if tag == _NODE or tag == _MODEL:
+            pos = self._read_uint(pos)[1]
+            size: int = _SIZE.unpack_from(self.data, pos)[0]
+            return pos + _SIZE.size + size
+        if tag in _COLLECTION_TYPES or tag == _DICT:
+            size = _SIZE.unpack_from(self.data, pos)[0]
+            return pos + _SIZE.size + size
+        if tag == _ID or tag == _TYPED_STR:
+            return self._read_uint(self._read_uint(pos)[1])[1]
+        if tag == _FLOAT:
+            return pos + _FLOAT64.size
+        if tag == _BYTES or tag == _PICKLE:
+            size, pos = self._read_uint(pos)
+            return pos + size
+
+        raise exceptions.EveValueError(message=f"Invalid value tag {tag} at position {pos - 1}.")
+
+
+class LazyNode:
+    """Encoded node whose field values are only decoded when accessed.
+
+    Children nodes are returned as new :class:`LazyNode` instances. Use
+    :meth:`load` to decode the whole subtree as a regular node (derived
+    implementation fields are only available in decoded nodes).
+    """
+
+    __slots__ = ("_reader", "node_class", "_names", "_pos", "_offsets")
+
+    def __init__(
+        self, reader: NodeReader, node_class: Type[Node], names: Tuple[str, ...], pos: int
+    ) -> None:
+        self._reader = reader
+        self.node_class = node_class
+        self._names = names
+        self._pos = pos
+        self._offsets: Optional[Dict[str, int]] = None
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            pos = self._field_offsets()[name]
+        except KeyError:
+            raise AttributeError(
+                f"'{self.node_class.__qualname__}' encoded node has no field '{name}'"
+            ) from None
+        return self._reader._read_value(pos, lazy=True)[0]
+
+    def __repr__(self) -> str:
+        return f"LazyNode({self.node_class.__qualname__})"
+
+    def iter_children(self) -> Iterator[Tuple[str, Any]]:
+        offsets = self._field_offsets()
+        for name in self.node_class.__node_children_names__:
+            if name in offsets:
+                yield name, self._reader._read_value(offsets[name], lazy=True)[0]
+
+    def load(self) -> Node:
+        """Decode the subtree of this node."""
+        reader = self._reader
+        pos = self._pos
+        kwargs = {}
+        for name in self._names:
+            kwargs[name], pos = reader._read_value(pos, lazy=False)
+        return self.node_class.construct_trusted(**kwargs)
+
+    def _field_offsets(self) -> Dict[str, int]:
+        if self._offsets is None:
+            offsets = {}
+            pos = self._pos
+            for name in self._names:
+                offsets[name] = pos
+                pos = self._reader._skip(pos)
+            self._offsets = offsets
+        return self._offsets
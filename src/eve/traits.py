@@ -27,12 +27,15 @@ from .typingx import Any, Dict, Type
 
 
 class SymbolTableTrait(concepts.Model):
-    symtable_: Dict[str, Any] = pydantic.Field(default_factory=dict)
+    symtable_: Dict[str, Any] = concepts.field(  # type: ignore  # field() returns a FieldInfo
+        default_factory=dict, derived=True
+    )
 
     @staticmethod
     def _collect_symbols(root_node: concepts.TreeNode) -> Dict[str, Any]:
         collected = {}
-        for node in iterators.traverse_tree(root_node):
+        symbol_node_types = concepts.node_types_with_field_type(SymbolName)
+        for node in iterators.traverse_tree(root_node, only_types=symbol_node_types):
             if isinstance(node, concepts.BaseNode):
                 for name, metadata in node.__node_children__.items():
                     if isinstance(metadata["definition"].type_, type) and issubclass(
@@ -14,8 +14,19 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+from __future__ import annotations
+
+import collections.abc
+import difflib
+import struct
+
+import xxhash
+
+from . import concepts, type_definitions
 from .concepts import Node, TreeNode
-from .typingx import Any, Callable, List, Type
+from .iterators import traverse_tree
+from .type_definitions import StrEnum
+from .typingx import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
 from .visitors import NodeVisitor
 
 
@@ -31,11 +42,408 @@ class FindNodes(NodeVisitor):
 
     @classmethod
     def by_predicate(cls, predicate: Callable[[Node], bool], node: Node, **kwargs: Any) -> Any:
+        if "index" in kwargs:
+            # Indexes only contain nodes, but predicates are also evaluated on the other values
+            raise TypeError("Tree indexes can only be used in FindNodes.by_type() queries")
         return cls().visit(node, predicate=predicate)
 
     @classmethod
-    def by_type(cls, node_type: Type[Node], node: Node, **kwargs: Any) -> Any:
-        def type_predicate(node: Node) -> bool:
-            return isinstance(node, node_type)
+    def by_type(
+        cls,
+        node_type: Type[Node],
+        node: Node,
+        *,
+        index: Optional[TreeIndex] = None,
+        **kwargs: Any,
+    ) -> Any:
+        if index is not None:
+            return index.by_type(node_type, within=node)
+        # Subtrees which cannot contain `node_type` instances are skipped
+        return list(traverse_tree(node, only_types=node_type))
+
+
+class _IndexEntry:
+    __slots__ = ("obj", "parent", "key", "order")
+
+    def __init__(self, obj: Any, parent: Any, key: Any, order: int) -> None:
+        self.obj = obj
+        self.parent = parent
+        self.key = key
+        self.order = order
+
+
+class TreeIndex:
+    """Index of the nodes of a tree to avoid repeated full-tree scans.
+
+    The index is built in a single (pre-order) traversal of the tree and it
+    maps node classes to nodes, ``id_`` values to nodes, ``name`` values to nodes
+    and nodes (and non-atomic collections) to their parent and key in the parent.
+    Query results are always returned in pre-order.
+
+    The index can be updated incrementally with :meth:`replace` and
+    :meth:`remove` (:class:`eve.NodeMutator` does it automatically if its
+    ``tree_index`` attribute is set to the index of the mutated tree).
+    Objects appearing several times in the same tree (shared subtrees) are
+    only indexed at their first location.
+
+    Args:
+        root: Root of the indexed tree.
+        name_field: Name of the node field used for :meth:`by_name` queries.
+
+    """
+
+    root: TreeNode
+    name_field: str
+
+    def __init__(self, root: TreeNode, *, name_field: str = "name") -> None:
+        self.root = root
+        self.name_field = name_field
+        self._entries: Dict[int, _IndexEntry] = {}
+        self._by_type: Dict[Type[Node], Dict[int, Node]] = {}
+        self._by_id: Optional[Dict[str, Node]] = None  # Built on demand (allocates lazy ids)
+        self._by_name: Dict[Any, Dict[int, Node]] = {}
+        self._counter = 0
+        self._modified = False
+        self._index_subtree(root, None, None)
+
+    def __contains__(self, obj: Any) -> bool:
+        return id(obj) in self._entries
+
+    def __len__(self) -> int:
+        return sum(len(nodes) for nodes in self._by_type.values())
+
+    def nodes(self, *, within: Optional[TreeNode] = None) -> List[Node]:
+        """Return all the indexed nodes (optionally, only those inside `within`)."""
+        return self.by_type(Node, within=within)
+
+    def by_type(self, node_type: Type[Node], *, within: Optional[TreeNode] = None) -> List[Node]:
+        """Return the indexed instances of `node_type` (optionally, only those inside `within`)."""
+        node_classes = [
+            node_class for node_class in self._by_type if issubclass(node_class, node_type)
+        ]
+        result: List[Node] = []
+        for node_class in node_classes:
+            result.extend(self._by_type[node_class].values())
+        if len(node_classes) > 1 or self._modified:
+            self._sort(result)
+
+        return self._filter_within(result, within)
+
+    def by_id(self, id_: str) -> Optional[Node]:
+        """Return the indexed node with the given ``id_`` (or ``None``)."""
+        if self._by_id is None:
+            self._by_id = {}
+            for node in self.nodes():
+                if node.id_ is not None:
+                    self._by_id[node.id_] = node
+        return self._by_id.get(id_, None)
+
+    def by_name(
+        self,
+        name: Any,
+        node_type: Optional[Type[Node]] = None,
+        *,
+        within: Optional[TreeNode] = None,
+    ) -> List[Node]:
+        """Return the indexed nodes with the given name (optionally, only `node_type` instances)."""
+        result = list(self._by_name.get(name, {}).values())
+        if node_type is not None:
+            result = [node for node in result if isinstance(node, node_type)]
+        self._sort(result)
+
+        return self._filter_within(result, within)
+
+    def parent(self, obj: Any) -> Optional[TreeNode]:
+        """Return the parent (a node or a collection) of an indexed object."""
+        return self._entries[id(obj)].parent
+
+    def key(self, obj: Any) -> Any:
+        """Return the key of an indexed object in its parent."""
+        return self._entries[id(obj)].key
+
+    def ancestors(self, obj: Any) -> Iterator[TreeNode]:
+        """Iterate over the ancestors (nodes and collections) of an indexed object, bottom-up."""
+        parent = self._entries[id(obj)].parent
+        while parent is not None:
+            yield parent
+            parent = self._entries[id(parent)].parent
+
+    def path(self, obj: Any) -> Tuple[Any, ...]:
+        """Return the sequence of keys leading from the root to an indexed object."""
+        keys = []
+        entry = self._entries[id(obj)]
+        while entry.parent is not None:
+            keys.append(entry.key)
+            entry = self._entries[id(entry.parent)]
+
+        return tuple(reversed(keys))
+
+    def replace(self, parent: TreeNode, old_value: Any, new_value: Any) -> None:
+        """Update the index after replacing `old_value` with `new_value` in an indexed `parent`.
+
+        The replacement should be already done in the parent (node or collection)
+        when this method is called.
+        """
+        self._unindex_subtree(old_value, parent)
+        if _is_indexable(new_value):
+            for key, child in concepts.generic_iter_children(parent, with_keys=True):
+                if child is new_value:
+                    self._index_subtree(new_value, parent, key)
+                    break
+        self._by_id = None
+        self._modified = True
+
+    def remove(self, parent: TreeNode, old_value: Any) -> None:
+        """Update the index after removing `old_value` from an indexed `parent`.
+
+        The removal should be already done in the parent (node or collection)
+        when this method is called.
+        """
+        self._unindex_subtree(old_value, parent)
+        if isinstance(parent, collections.abc.MutableSequence):
+            # Keys of the following elements have been shifted
+            for key, child in enumerate(parent):
+                entry = self._entries.get(id(child), None)
+                if entry is not None and entry.parent is parent:
+                    entry.key = key
+        self._by_id = None
+        self._modified = True
+
+    def _index_subtree(self, obj: Any, parent: Any, key: Any) -> None:
+        stack = [(obj, parent, key)]
+        while stack:
+            obj, parent, key = stack.pop()
+            if id(obj) in self._entries or not _is_indexable(obj):
+                continue
+
+            self._entries[id(obj)] = _IndexEntry(obj, parent, key, self._counter)
+            self._counter += 1
+            if isinstance(obj, Node):
+                self._by_type.setdefault(obj.__class__, {})[id(obj)] = obj
+                name = getattr(obj, self.name_field, None)
+                if isinstance(name, str):
+                    self._by_name.setdefault(name, {})[id(obj)] = obj
+
+            children = [
+                (child, obj, child_key)
+                for child_key, child in concepts.generic_iter_children(obj, with_keys=True)
+            ]
+            stack.extend(reversed(children))
+
+    def _unindex_subtree(self, obj: Any, parent: Any) -> None:
+        stack = [(obj, parent)]
+        while stack:
+            obj, parent = stack.pop()
+            entry = self._entries.get(id(obj), None)
+            if entry is None or entry.parent is not parent:
+                continue  # Not indexed at this location
+
+            del self._entries[id(obj)]
+            if isinstance(obj, Node):
+                del self._by_type[obj.__class__][id(obj)]
+                name = getattr(obj, self.name_field, None)
+                if isinstance(name, str):
+                    self._by_name[name].pop(id(obj), None)
+
+            stack.extend(
+                (child, obj) for child in concepts.generic_iter_children(obj, with_keys=False)
+            )
+
+    def _sort(self, nodes: List[Node]) -> None:
+        if self._modified:
+            nodes.sort(key=self._position)
+        else:
+            nodes.sort(key=lambda node: self._entries[id(node)].order)
+
+    def _position(self, obj: Any) -> Tuple[int, ...]:
+        # Positions of the keys in the path from the root (pre-order sort key)
+        positions = []
+        entry = self._entries[id(obj)]
+        while entry.parent is not None:
+            parent, key = entry.parent, entry.key
+            if isinstance(parent, Node):
+                positions.append(list(parent.__node_children__).index(key))
+            elif isinstance(parent, collections.abc.Sequence):
+                positions.append(key)
+            else:
+                positions.append(list(parent).index(key))
+            entry = self._entries[id(parent)]
+
+        return tuple(reversed(positions))
+
+    def _filter_within(self, nodes: List[Node], within: Optional[TreeNode]) -> List[Node]:
+        if within is None or within is self.root:
+            return nodes
+        return [
+            node
+            for node in nodes
+            if node is within or any(ancestor is within for ancestor in self.ancestors(node))
+        ]
+
+
+def _is_indexable(obj: Any) -> bool:
+    return isinstance(obj, Node) or (
+        isinstance(obj, collections.abc.Collection)
+        and not isinstance(obj, type_definitions.ATOMIC_COLLECTION_TYPES)
+    )
+
+
+# -- Structural diff and patch of trees --
+class TreeEditKind(StrEnum):
+    REPLACE = "replace"
+    INSERT = "insert"
+    DELETE = "delete"
+
+
+class TreeEdit(NamedTuple):
+    """Edit operation of a tree (see :func:`diff_trees`).
+
+    The `path` is the sequence of keys (field names, indices or mapping keys)
+    leading from the root to the edited location. Insertions and deletions
+    only happen in sequences and mappings (the last key is the index or key of
+    the inserted or deleted item), while replacements can happen at any location.
+    """
+
+    kind: TreeEditKind
+    path: Tuple[Any, ...]
+    value: Any = None
+
+
+def diff_trees(old: TreeNode, new: TreeNode) -> List[TreeEdit]:
+    """Compute an edit script transforming the `old` tree into the `new` tree.
+
+    Subtrees are matched using hashes of their contents, so unchanged subtrees
+    are never visited twice and changes are found by descending only into
+    nodes of the same class with different contents. Items of sequences are
+    aligned with :class:`difflib.SequenceMatcher`, so an inserted or deleted
+    item does not modify the following ones.
+
+    Node ids and other implementation fields are ignored. Edits are sorted to
+    be applied sequentially by :func:`patch_tree` (items of the same sequence
+    are edited from the end to the beginning, so indices always refer to the
+    `old` sequence). New values in the edits are the subtrees of `new`.
+    """
+    edits: List[TreeEdit] = []
+    _diff_values(old, new, (), edits, {})
+    return edits
+
+
+def patch_tree(tree: TreeNode, edits: List[TreeEdit]) -> TreeNode:
+    """Apply an edit script computed by :func:`diff_trees` to `tree`.
+
+    The input tree is not modified: the nodes and collections along the paths
+    to the edited locations are copied (keeping their ids) and the rest of the
+    tree is shared, so results cached for unchanged subtrees (e.g. by identity)
+    can be reused.
+    """
+    for edit in edits:
+        tree = _apply_edit(tree, edit.path, edit)
+    return tree
+
+
+def _subtree_hash(value: Any, memo: Dict[int, int]) -> int:
+    key = id(value)
+    try:
+        return memo[key]
+    except KeyError:
+        pass
+
+    hasher = xxhash.xxh64()
+    if isinstance(value, concepts.BaseNode) and not value.__config__.allow_mutation:
+        result = value.content_hash()
+    elif isinstance(value, Node):
+        node_class = value.__class__
+        hasher.update(f"{node_class.__module__}.{node_class.__qualname__}".encode())
+        for name, child in value.iter_children():
+            hasher.update(name.encode() + struct.pack("<Q", _subtree_hash(child, memo)))
+        result = hasher.intdigest()
+    elif isinstance(value, (list, tuple)):
+        hasher.update(b"l" if isinstance(value, list) else b"t")
+        for item in value:
+            hasher.update(struct.pack("<Q", _subtree_hash(item, memo)))
+        result = hasher.intdigest()
+    else:
+        concepts._update_content_hasher(hasher, value)
+        result = hasher.intdigest()
+
+    memo[key] = result
+    return result
+
+
+def _diff_values(
+    old: Any, new: Any, path: Tuple[Any, ...], edits: List[TreeEdit], memo: Dict[int, int]
+) -> None:
+    if old is new or (
+        old.__class__ is new.__class__ and _subtree_hash(old, memo) == _subtree_hash(new, memo)
+    ):
+        return
+
+    if isinstance(old, Node) and old.__class__ is new.__class__:
+        for (name, old_child), new_child in zip(old.iter_children(), new.iter_children_values()):
+            _diff_values(old_child, new_child, (*path, name), edits, memo)
+    elif isinstance(old, (list, tuple)) and old.__class__ is new.__class__:
+        _diff_sequences(old, new, path, edits, memo)
+    elif isinstance(old, dict) and old.__class__ is new.__class__:
+        for key in old.keys() - new.keys():
+            edits.append(TreeEdit(TreeEditKind.DELETE, (*path, key)))
+        for key, value in new.items():
+            if key in old:
+                _diff_values(old[key], value, (*path, key), edits, memo)
+            else:
+                edits.append(TreeEdit(TreeEditKind.INSERT, (*path, key), value))
+    else:
+        edits.append(TreeEdit(TreeEditKind.REPLACE, path, new))
+
+
+def _diff_sequences(
+    old: Any, new: Any, path: Tuple[Any, ...], edits: List[TreeEdit], memo: Dict[int, int]
+) -> None:
+    matcher = difflib.SequenceMatcher(
+        None,
+        [_subtree_hash(item, memo) for item in old],
+        [_subtree_hash(item, memo) for item in new],
+        autojunk=False,
+    )
+    # Blocks are edited from the end, so indices of the previous items are still valid
+    for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+        if tag == "equal":
+            continue
+        n_paired = min(i2 - i1, j2 - j1)
+        for k in range(n_paired, j2 - j1):
+            edits.append(TreeEdit(TreeEditKind.INSERT, (*path, i1 + k), new[j1 + k]))
+        for k in reversed(range(n_paired, i2 - i1)):
+            edits.append(TreeEdit(TreeEditKind.DELETE, (*path, i1 + k)))
+        for k in reversed(range(n_paired)):
+            _diff_values(old[i1 + k], new[j1 + k], (*path, i1 + k), edits, memo)
+
+
+def _apply_edit(value: Any, path: Tuple[Any, ...], edit: TreeEdit) -> Any:
+    if not path:
+        return edit.value
+
+    key, rest = path[0], path[1:]
+    if rest or edit.kind is TreeEditKind.REPLACE:
+        child = getattr(value, key) if isinstance(value, Node) else value[key]
+        new_child = _apply_edit(child, rest, edit) if rest else edit.value
+        if isinstance(value, Node):
+            return value.copy(update={key: new_child})
+        if isinstance(value, dict):
+            return {**value, key: new_child}
+        items = list(value)
+        items[key] = new_child
+        return value.__class__(items)
+
+    if isinstance(value, dict):
+        result = dict(value)
+        if edit.kind is TreeEditKind.INSERT:
+            result[key] = edit.value
+        else:
+            del result[key]
+        return result
 
-        return cls.by_predicate(type_predicate, node)
+    items = list(value)
+    if edit.kind is TreeEditKind.INSERT:
+        items.insert(key, edit.value)
+    else:
+        del items[key]
+    return value.__class__(items)
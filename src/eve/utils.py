@@ -18,15 +18,21 @@
 
 
 import collections.abc
+import contextlib
+import contextvars
+import dataclasses
 import enum
+import functools
 import hashlib
 import itertools
 import pickle
 import re
 import string
+import struct
 import uuid
 import warnings
 
+import pydantic
 import xxhash
 from boltons.iterutils import flatten, flatten_iter  # noqa: F401
 from boltons.strutils import (  # noqa: F401
@@ -44,6 +50,8 @@ from .type_definitions import DELETE, NOTHING
 from .typingx import (
     Any,
     Callable,
+    Dict,
+    FrozenSet,
     Iterable,
     Iterator,
     List,
@@ -130,7 +138,8 @@ def shash(*args: Any, hash_algorithm: Optional[Any] = None) -> str:
     It provides a customizable hash function for any kind of data.
     Unlike the builtin `hash` function, it is stable (same hash value across
     interpreter reboots) and it does not use hash customizations on user
-    classes (it uses `pickle` internally to get a byte stream).
+    classes (it uses `pickle` internally to get a byte stream). For node
+    trees, use :func:`structural_hash` instead.
 
     Args:
         hash_algorithm: object implementing the `hash algorithm` interface
@@ -152,6 +161,160 @@ def shash(*args: Any, hash_algorithm: Optional[Any] = None) -> str:
     return result
 
 
+def structural_hash(
+    *args: Any,
+    hash_algorithm: Optional[Any] = None,
+    exclude: Iterable[str] = ("id_",),
+    exclude_impl_fields: bool = True,
+) -> str:
+    """Stable structural hash function for node trees and other data.
+
+    Unlike :func:`shash`, the data is not serialized in memory with `pickle`
+    before hashing: trees are walked and their contents are directly fed to
+    the hash algorithm. Eve nodes, pydantic models and dataclasses are hashed
+    from their class names and field values, and unordered collections (sets
+    and mappings) independently of the order of their items. Values of other
+    types (except builtin scalars and collections) are pickled.
+
+    By default, node ids and other implementation fields are ignored, so the
+    hash value is stable across interpreter runs and can be used to key caches
+    of generated code.
+
+    Args:
+        hash_algorithm: object implementing the `hash algorithm` interface
+            from :mod:`hashlib` or canonical name (`str`) of the
+            hash algorithm as defined in :mod:`hashlib`.
+            Defaults to :class:`xxhash.xxh64`.
+        exclude: names of the fields ignored in nodes, models and dataclasses.
+            Defaults to ``("id_",)``.
+        exclude_impl_fields: ignore all implementation fields of nodes.
+            Defaults to ``True``.
+
+    """
+
+    if hash_algorithm is None:
+        hash_algorithm = xxhash.xxh64()
+    elif isinstance(hash_algorithm, str):
+        hash_algorithm = hashlib.new(hash_algorithm)
+
+    excluded_names = frozenset(exclude)
+    hash_algorithm.update(struct.pack("<Q", len(args)))
+    for value in args:
+        _update_structural_hasher(hash_algorithm, value, excluded_names, not exclude_impl_fields)
+    result = hash_algorithm.hexdigest()
+    assert isinstance(result, str)
+
+    return result
+
+
+def _encode_sized(tag: bytes, data: bytes) -> bytes:
+    return tag + struct.pack("<Q", len(data)) + data
+
+
+#: Encoding kind and class tag of the types hashed by :func:`structural_hash`
+_STRUCTURAL_HASH_KINDS: Dict[Type, Tuple[str, bytes]] = {}
+
+
+def _get_structural_hash_kind(value_class: Type) -> Tuple[str, bytes]:
+    if value_class is type(None):
+        kind = "none"
+    elif issubclass(value_class, bool):
+        kind = "bool"
+    elif issubclass(value_class, enum.Enum):
+        kind = "enum"
+    elif issubclass(value_class, str):
+        kind = "str"
+    elif issubclass(value_class, int):
+        kind = "int"
+    elif issubclass(value_class, float):
+        kind = "float"
+    elif issubclass(value_class, (bytes, bytearray)):
+        kind = "bytes"
+    elif issubclass(value_class, (list, tuple)):
+        kind = "sequence"
+    elif hasattr(value_class, "__node_children_names__"):
+        kind = "node"
+    elif issubclass(value_class, pydantic.BaseModel):
+        kind = "model"
+    elif dataclasses.is_dataclass(value_class):
+        kind = "dataclass"
+    elif issubclass(value_class, (collections.abc.Set, collections.abc.Mapping)):
+        kind = "unordered"
+    else:
+        kind = "other"
+
+    tag = _encode_sized(b"o", f"{value_class.__module__}.{value_class.__qualname__}".encode())
+    result = _STRUCTURAL_HASH_KINDS[value_class] = (kind, tag)
+    return result
+
+
+def _update_structural_hasher(
+    hasher: Any, value: Any, exclude: FrozenSet[str], with_impl_fields: bool
+) -> None:
+    # Feed the hasher with a prefix-free encoding of the value, tagged with its type
+    value_class = value.__class__
+    kind, tag = _STRUCTURAL_HASH_KINDS.get(value_class) or _get_structural_hash_kind(value_class)
+    if kind == "node":
+        fields: Iterable[Tuple[str, Any]] = value.iter_children()
+        if with_impl_fields:
+            fields = itertools.chain(fields, value.iter_impl_fields())
+        _update_structural_hasher_fields(hasher, tag, fields, exclude, with_impl_fields)
+    elif kind == "str":
+        hasher.update(_encode_sized(b"s", str.encode(value, "utf-8", "surrogatepass")))
+    elif kind == "sequence":
+        hasher.update((b"l" if isinstance(value, list) else b"t") + struct.pack("<Q", len(value)))
+        for item in value:
+            _update_structural_hasher(hasher, item, exclude, with_impl_fields)
+    elif kind == "int":
+        hasher.update(
+            _encode_sized(b"i", value.to_bytes(value.bit_length() // 8 + 1, "little", signed=True))
+        )
+    elif kind == "none":
+        hasher.update(b"0")
+    elif kind == "enum":
+        hasher.update(tag + _encode_sized(b"e", value.name.encode()))
+    elif kind == "bool":
+        hasher.update(b"T" if value else b"F")
+    elif kind == "float":
+        hasher.update(b"f" + struct.pack("<d", value))
+    elif kind == "bytes":
+        hasher.update(_encode_sized(b"b", bytes(value)))
+    elif kind == "model":
+        _update_structural_hasher_fields(hasher, tag, iter(value), exclude, with_impl_fields)
+    elif kind == "dataclass":
+        fields = ((field.name, getattr(value, field.name)) for field in dataclasses.fields(value))
+        _update_structural_hasher_fields(hasher, tag, fields, exclude, with_impl_fields)
+    elif kind == "unordered":
+        # Combine the sorted hashes of the items
+        is_mapping = isinstance(value, collections.abc.Mapping)
+        hashes = []
+        for item in value.items() if is_mapping else value:
+            item_hasher = xxhash.xxh64()
+            _update_structural_hasher(item_hasher, item, exclude, with_impl_fields)
+            hashes.append(item_hasher.intdigest())
+        hasher.update(
+            (b"m" if is_mapping else b"u")
+            + struct.pack(f"<{len(hashes) + 1}Q", len(hashes), *sorted(hashes))
+        )
+    else:
+        hasher.update(_encode_sized(b"p", pickle.dumps(value)))
+
+
+def _update_structural_hasher_fields(
+    hasher: Any,
+    tag: bytes,
+    fields: Iterable[Tuple[str, Any]],
+    exclude: FrozenSet[str],
+    with_impl_fields: bool,
+) -> None:
+    hasher.update(tag)
+    for name, item in fields:
+        if name not in exclude:
+            hasher.update(_encode_sized(b".", name.encode()))
+            _update_structural_hasher(hasher, item, exclude, with_impl_fields)
+    hasher.update(b")")
+
+
 AnyWordsIterable = Union[str, Iterable[str]]
 
 
@@ -252,11 +415,23 @@ class CaseStyleConverter:
 
 
 class UIDGenerator:
-    """Simple unique id generator using different methods."""
+    """Simple unique id generator using different methods.
+
+    Sequential ids are generated from a process-wide counter, unless they
+    are generated inside a :meth:`sequence_scope` context, which uses its
+    own counter (per thread or asyncio task). Therefore, the ids generated
+    in a scope only depend on the code run inside it (and not on the
+    process history), but they are only unique inside the scope.
+    """
 
     #: Constantly increasing counter for generation of sequential unique ids
     __counter = itertools.count(1)
 
+    #: Counter of the current sequence scope (if any)
+    __scoped_counter: contextvars.ContextVar = contextvars.ContextVar(
+        "UIDGenerator_scoped_counter", default=None
+    )
+
     @classmethod
     def random_id(cls, *, prefix: Optional[str] = None, width: int = 8) -> str:
         """Generate a random globally unique id."""
@@ -267,13 +442,19 @@ class UIDGenerator:
         s = str(u).replace("-", "")[:width]
         return f"{prefix}_{s}" if prefix else f"{s}"
 
+    @classmethod
+    def sequential_number(cls) -> int:
+        """Generate a sequential unique number (for the current session or sequence scope)."""
+        counter = cls.__scoped_counter.get()
+        return next(counter if counter is not None else cls.__counter)
+
     @classmethod
     def sequential_id(cls, *, prefix: Optional[str] = None, width: Optional[int] = None) -> str:
-        """Generate a sequential unique id (for the current session)."""
+        """Generate a sequential unique id (for the current session or sequence scope)."""
 
         if width is not None and width < 1:
             raise ValueError(f"Width must be a positive number ({width} provided).")
-        count = next(cls.__counter)
+        count = cls.sequential_number()
         s = f"{count:0{width}}" if width else f"{count}"
         return f"{prefix}_{s}" if prefix else f"{s}"
 
@@ -290,6 +471,35 @@ class UIDGenerator:
             warnings.warn("Unsafe reset of global UIDGenerator", RuntimeWarning)
         cls.__counter = itertools.count(start)
 
+    @classmethod
+    @contextlib.contextmanager
+    def sequence_scope(cls, start: int = 1) -> Iterator[None]:
+        """Context manager to generate sequential ids from a new counter.
+
+        Scopes can be nested and they are local to the current thread or
+        asyncio task. Running the same code inside a new scope generates
+        the same ids, which makes generated names reproducible.
+
+        Examples:
+            >>> with UIDGenerator.sequence_scope():
+            ...     first = UIDGenerator.sequential_id(prefix="tmp")
+            >>> with UIDGenerator.sequence_scope():
+            ...     second = UIDGenerator.sequential_id(prefix="tmp")
+            >>> first == second == "tmp_1"
+            True
+
+        """
+        token = cls.__scoped_counter.set(itertools.count(start))
+        try:
+            yield
+        finally:
+            cls.__scoped_counter.reset(token)
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_expression(expression: str) -> Any:
+    return compile(expression, f"<expression {expression!r}>", "eval")
+
 
 class XStringFormatter(string.Formatter):
     """Custom :class:`string.Formatter` implementation with f-string-like functionality.
@@ -403,7 +613,7 @@ class XStringFormatter(string.Formatter):
 
     def get_value(self, key: Union[int, str], args: Sequence, kwargs: Mapping) -> Any:
         assert isinstance(key, str)
-        result = eval(key, {}, kwargs)
+        result = eval(_compile_expression(key), {}, kwargs)
         return result
 
     def format_field(self, value: Any, format_spec: str) -> str:
@@ -420,3 +630,36 @@ class XStringFormatter(string.Formatter):
 
         obj = self.get_value(field_name, args, kwargs)
         return obj, used_arg
+
+    def compile_format(self, format_string: str) -> Callable[[Mapping[str, Any]], str]:
+        """Compile a format string to a function rendering it from a mapping of values.
+
+        The format string is only parsed once and all the expressions are
+        compiled to a single code object, which makes the returned function
+        much faster than :meth:`format` when rendering the same format string
+        many times. Format strings with positional fields or with nested
+        fields inside format specs are not compiled (the returned function
+        calls :meth:`vformat`).
+
+        Examples:
+            >>> render = XStringFormatter().compile_format("{a} + {b * 2!r:>4} = {a + b * 2}")
+            >>> render(dict(a=1, b=2))
+            '1 +    4 = 5'
+
+        """
+        pieces = []
+        for literal_text, field_name, format_spec, conversion in self.parse(format_string):
+            if literal_text:
+                pieces.append(repr(literal_text))
+            if field_name is not None:
+                if field_name == "" or field_name.isdigit() or "{" in (format_spec or ""):
+                    return lambda kwargs: self.vformat(format_string, (), kwargs)
+                value = f"({field_name})"
+                if conversion:
+                    value = f"__convert_field__({value}, {conversion!r})"
+                pieces.append(f"__format_field__({value}, {format_spec or ''!r})")
+
+        source = f"''.join(({', '.join(pieces)},))" if pieces else "''"
+        code = compile(source, f"<format {format_string!r}>", "eval")
+        namespace = {"__convert_field__": self.convert_field, "__format_field__": self.format_field}
+        return functools.partial(eval, code, namespace)
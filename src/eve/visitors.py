@@ -16,27 +16,350 @@
 
 """Visitor classes to work with IR trees."""
 
-
 import collections.abc
+import concurrent.futures
+import contextlib
 import copy
+import inspect
+import itertools
 import operator
+import types
 
-from . import concepts, type_definitions
+from . import concepts, serialization, type_definitions
 from .concepts import NOTHING
+from .type_definitions import StrEnum
 from .typingx import (
+    TYPE_CHECKING,
+    AbstractSet,
     Any,
     Callable,
+    ClassVar,
     Collection,
     Dict,
     Iterable,
+    Iterator,
+    List,
+    Mapping,
     MutableSequence,
     MutableSet,
+    NamedTuple,
+    Optional,
+    Sequence,
     Tuple,
+    Type,
     Union,
+    cast,
 )
 
 
-class NodeVisitor:
+if TYPE_CHECKING:
+    from .profiling import VisitorProfiler
+    from .tree_utils import TreeIndex
+
+
+#: Prefix of the names of visitor methods
+VISITOR_METHOD_PREFIX = "visit_"
+
+#: Profiler of the visitor functions (see :func:`eve.profiling.profiling`)
+_PROFILER: Optional["VisitorProfiler"] = None
+
+
+class MemoizationMode(StrEnum):
+    """Keys used to identify the visited nodes in memoizing visitors."""
+
+    #: Same node instance
+    IDENTITY = "identity"
+
+    #: Node with the same contents (see :meth:`eve.concepts.BaseNode.content_hash`)
+    CONTENT = "content"
+
+
+class ChangeDetectionMode(StrEnum):
+    """Criteria used by :class:`NodeMutator` to decide if a child has been replaced."""
+
+    #: Visitor returned a different object
+    IDENTITY = "identity"
+
+    #: Visitor returned a different object with different contents
+    #: (see :meth:`eve.concepts.BaseNode.content_hash`)
+    CONTENT = "content"
+
+
+class NodeChange(NamedTuple):
+    """Replacement (or removal) of a child done in place by a :class:`NodeMutator`."""
+
+    #: Node or collection containing the child
+    parent: Any
+
+    #: Field name, index or key of the child in the parent
+    key: Any
+
+    #: Previous child value
+    old: Any
+
+    #: New child value (:data:`eve.NOTHING` for removals)
+    new: Any
+
+
+class MemoizationStats:
+    """Statistics of the cache of a memoizing visitor."""
+
+    __slots__ = ("hits", "misses")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return f"MemoizationStats(hits={self.hits}, misses={self.misses})"
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class VisitorContext:
+    """Stack of scopes with the context values of a visitor.
+
+    Values are read as attributes or items and the value defined in the
+    innermost scope is returned. Entering and leaving a scope only touches
+    the values defined in that scope, so its cost does not depend on the
+    number of values defined in the outer scopes.
+    """
+
+    __slots__ = ("_values", "_scopes")
+
+    def __init__(self, **values: Any) -> None:
+        self._values: Dict[str, List[Any]] = {}
+        self._scopes: List[Tuple[str, ...]] = []
+        if values:
+            self.push(values)
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._values[name][-1]
+        except KeyError:
+            raise AttributeError(f"Undefined context value '{name}'") from None
+
+    def __getitem__(self, name: str) -> Any:
+        return self._values[name][-1]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._values
+
+    def __getstate__(self) -> Tuple[Dict[str, List[Any]], List[Tuple[str, ...]]]:
+        return self._values, self._scopes
+
+    def __setstate__(self, state: Tuple[Dict[str, List[Any]], List[Tuple[str, ...]]]) -> None:
+        self._values, self._scopes = state
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={stack[-1]!r}" for name, stack in self._values.items())
+        return f"VisitorContext({values})"
+
+    @property
+    def depth(self) -> int:
+        """Number of open scopes."""
+        return len(self._scopes)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        stack = self._values.get(name, None)
+        return default if stack is None else stack[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current (innermost) value of each defined name."""
+        return {name: stack[-1] for name, stack in self._values.items()}
+
+    def push(self, values: Mapping[str, Any]) -> None:
+        """Open a new scope with new `values` (hiding the outer values with the same names)."""
+        all_values = self._values
+        for name, value in values.items():
+            try:
+                all_values[name].append(value)
+            except KeyError:
+                all_values[name] = [value]
+        self._scopes.append(tuple(values))
+
+    def pop(self) -> None:
+        """Close the innermost scope."""
+        all_values = self._values
+        for name in self._scopes.pop():
+            stack = all_values[name]
+            stack.pop()
+            if not stack:
+                del all_values[name]
+
+    @contextlib.contextmanager
+    def scope(self, **values: Any) -> Iterator["VisitorContext"]:
+        """Open a new scope with `values` inside a `with` block."""
+        self.push(values)
+        try:
+            yield self
+        finally:
+            self.pop()
+
+
+def _is_visitor_method_name(name: str) -> bool:
+    return name.startswith(VISITOR_METHOD_PREFIX) or name == "generic_visit"
+
+
+def _make_bound_visitor(method: Callable[..., Any]) -> Callable[..., Any]:
+    # Adapt an already bound callable to the signature of the dispatch cache entries
+    def bound_visitor(_: NodeVisitor, node: concepts.TreeNode, **kwargs: Any) -> Any:
+        return method(node, **kwargs)
+
+    return bound_visitor
+
+
+def _get_class_visitor(visitor_class: Type["NodeVisitor"], method_name: str) -> Callable[..., Any]:
+    # Return the dispatch cache entry of a visitor method defined in the class,
+    # resolving static and class methods (and other descriptors) like a regular lookup
+    attribute = inspect.getattr_static(visitor_class, method_name)
+    if isinstance(attribute, types.FunctionType):
+        return attribute
+    if isinstance(attribute, (staticmethod, classmethod)):
+        return _make_bound_visitor(getattr(visitor_class, method_name))
+
+    def descriptor_visitor(self: NodeVisitor, node: concepts.TreeNode, **kwargs: Any) -> Any:
+        return getattr(self, method_name)(node, **kwargs)
+
+    return descriptor_visitor
+
+
+def _make_contextual_visitor(visitor: Callable[..., Any]) -> Callable[..., Any]:
+    def contextual_visitor(self: NodeVisitor, node: concepts.TreeNode, **kwargs: Any) -> Any:
+        if not kwargs:
+            return visitor(self, node)
+        context = self.context
+        context.push(kwargs)
+        try:
+            return visitor(self, node)
+        finally:
+            context.pop()
+
+    return contextual_visitor
+
+
+def _make_profiled_visitor(
+    visitor: Callable[..., Any], profiler: "VisitorProfiler", key: Tuple[str, str, str]
+) -> Callable[..., Any]:
+    def profiled_visitor(self: NodeVisitor, node: concepts.TreeNode, **kwargs: Any) -> Any:
+        profiler.push(key)
+        try:
+            return visitor(self, node, **kwargs)
+        finally:
+            profiler.pop()
+
+    return profiled_visitor
+
+
+#: Visitor attributes which are not copied to the workers of :meth:`NodeVisitor.visit_independent`
+_LOCAL_VISITOR_ATTRIBUTES = frozenset(
+    {
+        "executor",
+        "tree_index",
+        "changes",
+        "memoization_stats",
+        "_dispatch_",
+        "_memo_cache_",
+        "_memo_dict_",
+        "_context_",
+    }
+)
+
+
+def _visit_serialized(visitor_data: bytes, item_data: bytes) -> bytes:
+    # Visit an item (usually in a worker process) with a copy of the visitor
+    visitor_class, state, context_values, kwargs = serialization.loads(visitor_data)
+    visitor = visitor_class.__new__(visitor_class)
+    visitor.__dict__.update(state)
+    if context_values:
+        visitor.__dict__["_context_"] = VisitorContext(**context_values)
+    item, item_kwargs = serialization.loads(item_data)
+    result = visitor.visit(item, **kwargs, **item_kwargs)
+    return serialization.dumps(result, lazy_ids=True)
+
+
+def _context_key(kwargs: Dict[str, Any]) -> Tuple[Any, ...]:
+    # Hashable values are compared by value and the rest by identity
+    items = []
+    for name, value in kwargs.items():
+        try:
+            hash(value)
+            items.append((name, value))
+        except TypeError:
+            items.append((name, id(value)))
+    return tuple(items)
+
+
+def _make_memoized_visitor(
+    visitor: Callable[..., Any], mode: MemoizationMode
+) -> Callable[..., Any]:
+    by_content = mode == MemoizationMode.CONTENT
+
+    def memoized_visitor(self: NodeVisitor, node: Any, **kwargs: Any) -> Any:
+        try:
+            cache = self._memo_cache_
+        except AttributeError:
+            cache = self.clear_memoization_cache()
+        key = (
+            node.content_hash() if by_content else id(node),
+            _context_key(kwargs) if kwargs else (),
+        )
+        stats = self.memoization_stats
+        try:
+            result = cache[key][0]
+            stats.hits += 1
+            return result
+        except KeyError:
+            stats.misses += 1
+
+        result = visitor(self, node, **kwargs)
+        # Keep the node and the context values alive, since they can be keyed by identity
+        cache[key] = (result, node, kwargs)
+        return result
+
+    return memoized_visitor
+
+
+class NodeVisitorMetaclass(type):
+    """Custom metaclass for NodeVisitor classes.
+
+    Each visitor class keeps a dispatch cache (``_dispatch_cache_``) mapping
+    node classes to the visitor function selected for them. Caches are filled
+    lazily by :meth:`NodeVisitor.visit` and they are invalidated (in the class
+    and all its subclasses) whenever visitor methods are dynamically added,
+    replaced or removed from a visitor class.
+
+    """
+
+    _dispatch_cache_: Dict[Type, Callable[..., Any]]
+
+    def __init__(cls, name: str, bases: Tuple[Type, ...], namespace: Dict[str, Any]) -> None:
+        super().__init__(name, bases, namespace)
+        cls._dispatch_cache_ = {}
+
+    def __setattr__(cls, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if _is_visitor_method_name(name):
+            cls.clear_dispatch_cache()
+
+    def __delattr__(cls, name: str) -> None:
+        super().__delattr__(name)
+        if _is_visitor_method_name(name):
+            cls.clear_dispatch_cache()
+
+    def clear_dispatch_cache(cls) -> None:
+        """Invalidate the dispatch caches of this class and all its subclasses."""
+        pending = [cls]
+        while pending:
+            visitor_class = pending.pop()
+            visitor_class._dispatch_cache_.clear()
+            pending.extend(cast(List[NodeVisitorMetaclass], visitor_class.__subclasses__()))
+
+
+class NodeVisitor(metaclass=NodeVisitorMetaclass):
     """Simple node visitor class based on :class:`ast.NodeVisitor`.
 
     A NodeVisitor instance walks a node tree and calls a visitor
@@ -62,7 +385,11 @@ class NodeVisitor:
         3. ``self.generic_visit()``.
 
     This dispatching mechanism is implemented in the main :meth:`visit`
-    method and can be overriden in subclasses.
+    method and can be overriden in subclasses. The visitor function found
+    for each node class is cached at class level (see
+    :class:`NodeVisitorMetaclass`), so the lookup only happens the first time
+    a node class is visited. Visitor methods can also be static or class
+    methods, or be assigned to a visitor instance before its first visit.
 
     Note that return values are not forwarded to the caller in the default
     :meth:`generic_visit` implementation. If you want to return a value from
@@ -93,6 +420,26 @@ class NodeVisitor:
         * If the visitor has internal state, make sure visitor instances
           are never reused or clean up the state at the end.
 
+    If the :attr:`memoization` class attribute is set, the results of the
+    visitor functions for nodes are cached and reused when the same node
+    (:attr:`MemoizationMode.IDENTITY`) or a node with the same contents
+    (:attr:`MemoizationMode.CONTENT`) is visited again with equal keyword
+    arguments (compared by value if hashable and by identity otherwise), so
+    subtrees shared in DAG-shaped trees are only visited once per context.
+    It should only be enabled for visitors whose results depend only on the
+    visited subtree and the keyword arguments. Content keys are only cheap
+    for inmutable nodes, which cache their content hash. Cache statistics are
+    collected in :attr:`memoization_stats`.
+
+    If the :attr:`scoped_context` class attribute is set, the keyword
+    arguments of :meth:`visit` are not forwarded to the visitor functions:
+    they open a new scope of the :attr:`context` of the visitor
+    (a :class:`VisitorContext`) during the visit of the node, so they are
+    available in all the visits of its subtree without passing them around
+    (e.g. ``self.context.symtable``) and the visitor functions are called
+    without keyword arguments. Note that memoization keys only include the
+    keyword arguments of the memoized visit, not the outer context values.
+
     Notes:
         If you want to apply changes to nodes during the traversal,
         use the :class:`NodeMutator` subclass, which handles correctly
@@ -100,29 +447,275 @@ class NodeVisitor:
 
     """
 
+    _dispatch_cache_: ClassVar[Dict[Type, Callable[..., Any]]]
+    #: Dispatch cache used by the instance (set in its first visit)
+    _dispatch_: Dict[Type, Callable[..., Any]]
+
+    #: Cache the results of the node visits (see class documentation)
+    memoization: ClassVar[Optional[MemoizationMode]] = None
+
+    #: Pass the keyword arguments of :meth:`visit` in a scoped context (see class documentation)
+    scoped_context: ClassVar[bool] = False
+
+    #: Executor used to visit independent subtrees (see :meth:`visit_independent`)
+    executor: Optional[concurrent.futures.Executor] = None
+
+    memoization_stats: MemoizationStats
+    _memo_cache_: Dict[Tuple[Any, Tuple[Any, ...]], Tuple[Any, Any, Dict[str, Any]]]
+
     def visit(self, node: concepts.TreeNode, **kwargs: Any) -> Any:
-        visitor = self.generic_visit
+        try:
+            visitor = self._dispatch_[node.__class__]
+        except KeyError:
+            visitor = self._fill_dispatch_cache(node.__class__)
+
+        return visitor(self, node, **kwargs)
+
+    if not TYPE_CHECKING:
+
+        def __getattr__(self, name: str) -> Any:
+            # Only called for missing attributes: choose the dispatch cache of the
+            # instance in its first visit (a private cache if it defines visitor methods)
+            if name != "_dispatch_":
+                raise AttributeError(
+                    f"'{self.__class__.__name__}' object has no attribute '{name}'"
+                )
+            if any(_is_visitor_method_name(attr_name) for attr_name in self.__dict__):
+                dispatch = self.__dict__["_dispatch_"] = {}
+            else:
+                dispatch = self.__dict__["_dispatch_"] = self._dispatch_cache_
+            return dispatch
+
+    def _fill_dispatch_cache(self, node_class: Type) -> Callable[..., Any]:
+        method_name = self.find_visitor_method_name(node_class)
+        visitor: Callable[..., Any]
+        if method_name is None:
+            method_name = "generic_visit"
+        if method_name in self.__dict__:
+            visitor = _make_bound_visitor(getattr(self, method_name))
+        elif method_name == "generic_visit":
+            visitor = self._get_generic_visitor(node_class)
+        else:
+            visitor = _get_class_visitor(self.__class__, method_name)
+
+        if self.scoped_context:
+            visitor = _make_contextual_visitor(visitor)
+        if self.memoization is not None and issubclass(node_class, concepts.Node):
+            visitor = _make_memoized_visitor(visitor, self.memoization)
+        if _PROFILER is not None:
+            key = (
+                self.__class__.__qualname__,
+                self._get_profiling_label(method_name, node_class),
+                node_class.__qualname__,
+            )
+            visitor = _make_profiled_visitor(visitor, _PROFILER, key)
+
+        self._dispatch_[node_class] = visitor
+        return visitor
 
-        method_name = "visit_" + node.__class__.__name__
+    def _get_generic_visitor(self, node_class: Type) -> Callable[..., Any]:
+        """Return the visitor function used for nodes without a specific visitor method."""
+        return self.__class__.generic_visit
+
+    def visit_independent(
+        self, items: Iterable[concepts.TreeNode], *, index_arg: Optional[str] = None, **kwargs: Any
+    ) -> List[Any]:
+        """Visit independent subtrees and return the list of results (in order).
+
+        If the :attr:`executor` attribute is set (e.g. to a
+        :class:`concurrent.futures.ProcessPoolExecutor`), each subtree is
+        visited in the executor by a copy of this visitor. Subtrees, results
+        and visitor attributes are transferred in the binary format of
+        :mod:`eve.serialization`. Node ids of the subtrees are allocated
+        before sending them (in tree order), while ids of the new nodes
+        created by the copies are only allocated when first used in the
+        caller process, so the resulting ids are deterministic. Thus, this
+        is only valid for visitors without side effects in their own state
+        (e.g. translators) and which do not use the ids of the nodes they
+        create. Visitor methods defined in the instance are not supported.
+        The copies receive a snapshot of the current :attr:`context` values
+        (in a single scope): it should be treated as read-only, since changes
+        done by the copies are not sent back to this visitor.
+
+        Fields whose items can be visited independently are defined with
+        ``eve.field(independent=True)``. :class:`NodeTranslator` and
+        :class:`eve.codegen.TemplatedGenerator` use this method for the values
+        of these fields when visiting nodes without a specific visitor method.
+
+        Args:
+            items: Subtrees to be visited.
+            index_arg: If provided, the position of each item is passed to its
+                visit as an extra keyword argument with this name (e.g. to
+                generate names derived from the position in the tree).
+
+        """
+        items = list(items)
+        items_kwargs = [{index_arg: index} if index_arg else {} for index in range(len(items))]
+        if self.executor is None or len(items) < 2:
+            return [
+                self.visit(item, **kwargs, **item_kwargs)
+                for item, item_kwargs in zip(items, items_kwargs)
+            ]
+
+        state = {
+            name: value
+            for name, value in self.__dict__.items()
+            if name not in _LOCAL_VISITOR_ATTRIBUTES
+        }
+        context = self.__dict__.get("_context_", None)
+        context_values = context.snapshot() if context is not None else {}
+        visitor_data = serialization.dumps((self.__class__, state, context_values, kwargs))
+        results = self.executor.map(
+            _visit_serialized,
+            itertools.repeat(visitor_data),
+            [
+                serialization.dumps((item, item_kwargs))
+                for item, item_kwargs in zip(items, items_kwargs)
+            ],
+        )
+        return [serialization.loads(result) for result in results]
+
+    def _get_profiling_label(self, method_name: str, node_class: Type) -> str:
+        """Return the name used by profilers for the visitor function of a node class."""
+        return method_name
+
+    @property
+    def context(self) -> VisitorContext:
+        """Scoped context values of the visitor (see class documentation)."""
+        context: VisitorContext
+        try:
+            context = self.__dict__["_context_"]
+        except KeyError:
+            context = self.__dict__["_context_"] = VisitorContext()
+        return context
+
+    def clear_memoization_cache(self) -> Dict[Tuple[Any, Tuple[Any, ...]], Any]:
+        """Remove the cached results and statistics of a memoizing visitor."""
+        self._memo_cache_ = {}
+        self.memoization_stats = MemoizationStats()
+        return self._memo_cache_
+
+    def find_visitor_method_name(self, node_class: Type) -> Optional[str]:
+        """Find the name of the visitor method for a node class (see class documentation).
+
+        Returns:
+            The method name or ``None`` if :meth:`generic_visit` should be used.
+
+        """
+        method_name = VISITOR_METHOD_PREFIX + node_class.__name__
         if hasattr(self, method_name):
-            visitor = getattr(self, method_name)
-        elif isinstance(node, concepts.Node):
-            for node_class in node.__class__.__mro__[1:]:
-                method_name = "visit_" + node_class.__name__
+            return method_name
+        elif issubclass(node_class, concepts.Node):
+            for base in node_class.__mro__[1:]:
+                method_name = VISITOR_METHOD_PREFIX + base.__name__
                 if hasattr(self, method_name):
-                    visitor = getattr(self, method_name)
-                    break
+                    return method_name
 
-                if node_class is concepts.Node:
+                if base is concepts.Node:
                     break
 
-        return visitor(node, **kwargs)
+        return None
 
     def generic_visit(self, node: concepts.TreeNode, **kwargs: Any) -> Any:
         for child in concepts.generic_iter_children(node):
             self.visit(child, **kwargs)
 
 
+def _visit_no_children(self: NodeVisitor, node: concepts.TreeNode, **kwargs: Any) -> None:
+    pass
+
+
+#: Generated children visitor functions (see :class:`CompiledNodeVisitor`) by node class
+_children_visitors: Dict[Type, Callable[..., None]] = {}
+
+
+def _make_children_visitor(node_class: Type) -> Callable[..., None]:
+    # Generate the source of a function visiting the children of nodes of `node_class`
+    # which dispatches them directly with the dispatch cache of the visitor
+    visit_child = [
+        "(dispatch(child.__class__) or fill(child.__class__))(self, child, **kwargs)",
+    ]
+    if issubclass(node_class, concepts.Node):
+        if not node_class.__node_children_names__:
+            return _visit_no_children
+        body = []
+        for name in node_class.__node_children_names__:
+            body += [f"child = node.{name}", *visit_child]
+    elif issubclass(node_class, (collections.abc.Sequence, collections.abc.Set)) and not issubclass(
+        node_class, type_definitions.ATOMIC_COLLECTION_TYPES
+    ):
+        body = ["for child in node:", *(f"    {line}" for line in visit_child)]
+    elif issubclass(node_class, collections.abc.Mapping):
+        body = ["for child in node.values():", *(f"    {line}" for line in visit_child)]
+    else:
+        return _visit_no_children
+
+    func_name = f"visit_{node_class.__name__}_children"
+    source = "\n    ".join(
+        [
+            f"def {func_name}(self, node, **kwargs):",
+            "dispatch = self._dispatch_.get",
+            "fill = self._fill_dispatch_cache",
+            *body,
+        ]
+    )
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, f"<{func_name}>", "exec"), namespace)
+    children_visitor: Callable[..., None] = namespace[func_name]
+    children_visitor.__qualname__ = f"CompiledNodeVisitor.{func_name}"
+
+    return children_visitor
+
+
+class CompiledNodeVisitor(NodeVisitor):
+    """NodeVisitor using generated functions to traverse the tree.
+
+    For each node class without a specific visitor method, a Python function
+    visiting its children is generated (the first time the class is found)
+    with the accesses to the children fields unrolled, and the children
+    dispatched directly with the dispatch cache of the visitor, instead of
+    going through :meth:`NodeVisitor.visit` and the generic iteration of
+    children (:func:`eve.concepts.generic_iter_children`). These functions
+    are shared by all the compiled visitor classes and, as any other
+    visitor function, they are stored in the dispatch cache of each visitor
+    class for the node class.
+
+    Compiled visitors are used exactly as any other :class:`NodeVisitor`
+    (e.g. calling ``self.generic_visit(node)`` from visitor methods) and
+    they can also use memoization or scoped contexts. Subclasses overriding
+    :meth:`visit` or :meth:`generic_visit` are not compiled and the
+    children will be visited in the usual way.
+
+    Notes:
+        Check :class:`NodeVisitor` documentation for more details.
+
+    """
+
+    def _get_generic_visitor(self, node_class: Type) -> Callable[..., Any]:
+        visitor_class = self.__class__
+        if (
+            visitor_class.visit is not NodeVisitor.visit
+            or visitor_class.generic_visit is not CompiledNodeVisitor.generic_visit
+        ):
+            return visitor_class.generic_visit
+        try:
+            return _children_visitors[node_class]
+        except KeyError:
+            children_visitor = _children_visitors[node_class] = _make_children_visitor(node_class)
+            return children_visitor
+
+    def generic_visit(self, node: concepts.TreeNode, **kwargs: Any) -> Any:
+        if self.__class__.visit is not NodeVisitor.visit:
+            return super().generic_visit(node, **kwargs)
+        try:
+            children_visitor = _children_visitors[node.__class__]
+        except KeyError:
+            children_visitor = _children_visitors[node.__class__] = _make_children_visitor(
+                node.__class__
+            )
+        children_visitor(self, node, **kwargs)
+
+
 class NodeTranslator(NodeVisitor):
     """Special `NodeVisitor` to translate nodes and trees.
 
@@ -142,13 +735,43 @@ class NodeTranslator(NodeVisitor):
 
        output_node = YourTranslator.apply(input_node)
 
+    New nodes are built by :meth:`generic_visit` with the regular (validated)
+    node constructor. Translators producing nodes of the same IR can set the
+    :attr:`trusted_construction` class attribute to use the faster
+    :meth:`eve.concepts.BaseNode.construct_trusted` instead, which skips the
+    validation unless the checked mode is enabled (:func:`eve.concepts.checked_mode`).
+
+    If the :attr:`copy_on_write` class attribute is set, :meth:`generic_visit`
+    does not copy anything which has not been modified: unchanged subtrees
+    (including leaf values) are returned as the same object, and new parent
+    nodes or collections are only created along the paths leading to modified
+    descendants. Thus, the output tree will share its unchanged parts with the
+    input tree, so in-place modifications of any of them will be visible in both.
+
     Notes:
         Check :class:`NodeVisitor` documentation for more details.
 
     """
 
+    #: Build new nodes in :meth:`generic_visit` without validating them again
+    trusted_construction: ClassVar[bool] = False
+
+    #: Reuse unchanged subtrees in :meth:`generic_visit` instead of copying them
+    copy_on_write: ClassVar[bool] = False
+
     _memo_dict_: Dict[int, Any]
 
+    def _visit_field(
+        self, node: concepts.Node, name: str, value: Any, kwargs: Dict[str, Any]
+    ) -> Any:
+        if isinstance(value, list) and node.__node_children__[name].get("independent", False):
+            return [
+                item
+                for item in self.visit_independent(value, **kwargs)
+                if item is not concepts.NOTHING
+            ]
+        return self.visit(value, **kwargs)
+
     def generic_visit(self, node: concepts.TreeNode, **kwargs: Any) -> Any:
         result: Any = None
         if isinstance(node, (concepts.Node, collections.abc.Collection)) and not isinstance(
@@ -156,17 +779,39 @@ class NodeTranslator(NodeVisitor):
         ):
             tmp_items: Collection[concepts.TreeNode] = []
             if isinstance(node, concepts.Node):
-                tmp_items = {
-                    key: self.visit(value, **kwargs) for key, value in node.iter_children()
-                }
-                result = node.__class__(  # type: ignore
-                    **{key: value for key, value in node.iter_impl_fields()},
+                children = list(node.iter_children())
+                if self.executor is None:
+                    tmp_items = {key: self.visit(value, **kwargs) for key, value in children}
+                else:
+                    tmp_items = {
+                        key: self._visit_field(node, key, value, kwargs) for key, value in children
+                    }
+                if self.copy_on_write and all(tmp_items[key] is value for key, value in children):
+                    return node
+
+                constructor = (
+                    node.__class__.construct_trusted
+                    if self.trusted_construction
+                    else node.__class__
+                )
+                result = constructor(  # type: ignore
+                    **node._raw_impl_fields(),
                     **{key: value for key, value in tmp_items.items() if value is not NOTHING},
                 )
+                if self.copy_on_write:
+                    # Validation makes copies of children nodes: share the unchanged ones
+                    for key, value in children:
+                        if tmp_items[key] is value:
+                            object.__setattr__(result, key, value)
 
             elif isinstance(node, (collections.abc.Sequence, collections.abc.Set)):
                 # Sequence or set: create a new container instance with the new values
                 tmp_items = [self.visit(value, **kwargs) for value in node]
+                if self.copy_on_write and all(
+                    new_value is value for new_value, value in zip(tmp_items, node)
+                ):
+                    return node
+
                 result = node.__class__(  # type: ignore
                     value for value in tmp_items if value is not NOTHING
                 )
@@ -174,10 +819,18 @@ class NodeTranslator(NodeVisitor):
             elif isinstance(node, collections.abc.Mapping):
                 # Mapping: create a new mapping instance with the new values
                 tmp_items = {key: self.visit(value, **kwargs) for key, value in node.items()}
+                if self.copy_on_write and all(
+                    tmp_items[key] is value for key, value in node.items()
+                ):
+                    return node
+
                 result = node.__class__(  # type: ignore
                     {key: value for key, value in tmp_items.items() if value is not NOTHING}
                 )
 
+        elif self.copy_on_write:
+            result = node
+
         else:
             if not hasattr(self, "_memo_dict_"):
                 self._memo_dict_ = {}
@@ -208,18 +861,83 @@ class NodeMutator(NodeVisitor):
 
        YourMutator.apply(node)
 
+    A child is replaced only if the visitor method returns a different object
+    (:attr:`ChangeDetectionMode.IDENTITY`), so returning the same node instance
+    is the cheap way to keep it. Mutators which may return new but equal
+    objects can set the :attr:`change_detection` class attribute to
+    :attr:`ChangeDetectionMode.CONTENT` to compare also the content hashes
+    of the old and the new values before replacing them. Immutable collections
+    are only recreated if any of their items has been replaced.
+
+    If the ``tree_index`` attribute is set to a :class:`eve.tree_utils.TreeIndex`
+    of the mutated tree, the index will be updated with all the replacements
+    and removals done in place. If the ``changes`` attribute is set to a list,
+    a :class:`NodeChange` will be appended to it for each one of them, so callers
+    can update their own data structures incrementally.
+
     Notes:
         Check :class:`NodeVisitor` documentation for more details.
 
     """
 
+    change_detection: ClassVar[ChangeDetectionMode] = ChangeDetectionMode.IDENTITY
+
+    tree_index: Optional["TreeIndex"] = None
+    changes: Optional[List[NodeChange]] = None
+
+    def _is_changed(self, new_value: Any, value: Any) -> bool:
+        if new_value is value:
+            return False
+        if self.change_detection == ChangeDetectionMode.CONTENT:
+            return concepts._compute_value_hash(new_value) != concepts._compute_value_hash(value)
+        return True
+
+    def _update_index(self, parent: Any, value: Any, new_value: Any) -> None:
+        # Keep the tree index (if any) in sync with an in-place replacement or removal
+        if self.tree_index is None:
+            return
+        if new_value is concepts.NOTHING:
+            self.tree_index.remove(parent, value)
+        else:
+            self.tree_index.replace(parent, value, new_value)
+
+    def _record_change(self, parent: Any, key: Any, value: Any, new_value: Any) -> None:
+        # Notify an in-place replacement or removal to the tree index and the changes list
+        self._update_index(parent, value, new_value)
+        if self.changes is not None:
+            self.changes.append(NodeChange(parent, key, value, new_value))
+
+    def _visit_inmutable_collection(
+        self, node: Union[Sequence, AbstractSet, Mapping], **kwargs: Any
+    ) -> Any:
+        # Create a new collection instance with the new values (only if any item has changed)
+        if isinstance(node, collections.abc.Mapping):
+            new_items = {key: self.visit(value, **kwargs) for key, value in node.items()}
+            if any(self._is_changed(new_value, node[key]) for key, new_value in new_items.items()):
+                return node.__class__(  # type: ignore
+                    {
+                        key: value
+                        for key, value in new_items.items()
+                        if value is not concepts.NOTHING
+                    }
+                )
+        else:
+            new_values = [self.visit(value, **kwargs) for value in node]
+            if any(
+                self._is_changed(new_value, value) for new_value, value in zip(new_values, node)
+            ):
+                return node.__class__(  # type: ignore
+                    [value for value in new_values if value is not concepts.NOTHING]
+                )
+
+        return node
+
     def generic_visit(self, node: concepts.TreeNode, **kwargs: Any) -> Any:
         result: Any = node
         if isinstance(node, (concepts.Node, collections.abc.Collection)) and not isinstance(
             node, type_definitions.ATOMIC_COLLECTION_TYPES
         ):
             items: Iterable[Tuple[Any, Any]] = []
-            tmp_items: Collection[concepts.TreeNode] = []
             set_op: Union[Callable[[Any, str, Any], None], Callable[[Any, int, Any], None]]
             del_op: Union[Callable[[Any, str], None], Callable[[Any, int], None]]
 
@@ -253,30 +971,119 @@ class NodeMutator(NodeVisitor):
                 set_op = operator.setitem
                 del_op = operator.delitem
 
-            elif isinstance(node, (collections.abc.Sequence, collections.abc.Set)):
-                # Inmutable sequence or set: create a new container instance with the new values
-                tmp_items = [self.visit(value, **kwargs) for value in node]
-                result = node.__class__(  # type: ignore
-                    [value for value in tmp_items if value is not concepts.NOTHING]
-                )
-
-            elif isinstance(node, collections.abc.Mapping):
-                # Inmutable mapping: create a new mapping instance with the new values
-                tmp_items = {key: self.visit(value, **kwargs) for key, value in node.items()}
-                result = node.__class__(  # type: ignore
-                    {
-                        key: value
-                        for key, value in tmp_items.items()
-                        if value is not concepts.NOTHING
-                    }
-                )
+            elif isinstance(
+                node, (collections.abc.Sequence, collections.abc.Set, collections.abc.Mapping)
+            ):
+                result = self._visit_inmutable_collection(node, **kwargs)
 
             # Finally, in case current node object is mutable, process selected items (if any)
             for key, value in items:
                 new_value = self.visit(value, **kwargs)
                 if new_value is concepts.NOTHING:
                     del_op(result, key)
-                elif new_value != value:
+                    self._record_change(result, key, value, new_value)
+                elif self._is_changed(new_value, value):
                     set_op(result, key, new_value)
+                    self._record_change(result, key, value, new_value)
 
         return result
+
+
+class FusedVisitor(NodeVisitor):
+    """Run several read-only visitors in a single traversal of the tree.
+
+    The tree is traversed once and every node is dispatched to all the
+    visitors still walking that part of the tree. Visitors without a specific
+    visitor method for a node (they would just call :meth:`NodeVisitor.generic_visit`)
+    share the traversal of its children, while a visitor with a specific
+    method for the node class is called as usual and it takes care of the
+    subtree of the node (stopping the traversal or visiting the children
+    itself, e.g. with extra keyword arguments), so it is not dispatched again
+    in that subtree. Thus, each visitor gets the same calls as in a separate
+    traversal and the cost of the traversal is shared by all of them.
+
+    Specific visitor methods are called through :meth:`NodeVisitor.visit`,
+    so they are profiled as in a separate traversal. Visitors overriding
+    :meth:`NodeVisitor.visit` or :meth:`NodeVisitor.generic_visit`
+    (e.g. :class:`NodeTranslator` and :class:`NodeMutator`), using a
+    :attr:`NodeVisitor.scoped_context` or :attr:`NodeVisitor.memoization`
+    cannot share the traversal and they are just run on their own.
+
+    Usually you use a FusedVisitor like this::
+
+       var_decls, validation = FusedVisitor(VarDecls(), Validation()).visit(tree)
+
+    Args:
+        visitors: Visitor instances (their results are collected in the same order).
+
+    """
+
+    visitors: Tuple[NodeVisitor, ...]
+
+    def __init__(self, *visitors: NodeVisitor) -> None:
+        self.visitors = visitors
+        # Cached dispatch plans: (node class, active visitors) -> (calls, remaining visitors)
+        self._plans: Dict[
+            Tuple[Type, Tuple[int, ...]],
+            Tuple[Tuple[Tuple[int, Callable[..., Any]], ...], Tuple[int, ...]],
+        ] = {}
+
+    def visit(self, node: concepts.TreeNode, **kwargs: Any) -> Any:
+        """Visit the tree with all the visitors and return the list of their results."""
+        results: List[Any] = [None] * len(self.visitors)
+        shared = []
+        for i, visitor in enumerate(self.visitors):
+            visitor_class = visitor.__class__
+            if (
+                visitor_class.visit is not NodeVisitor.visit
+                or visitor_class.generic_visit is not NodeVisitor.generic_visit
+                or visitor.scoped_context
+                or visitor.memoization is not None
+            ):
+                results[i] = visitor.visit(node, **kwargs)
+            else:
+                shared.append(i)
+
+        if shared:
+            calls, remaining = self._get_plan(node.__class__, tuple(shared))
+            for i, method in calls:
+                results[i] = method(node, **kwargs)
+            if remaining:
+                for child in concepts.generic_iter_children(node):
+                    self._visit_shared(child, remaining, kwargs)
+
+        return results
+
+    def _visit_shared(
+        self, node: concepts.TreeNode, active: Tuple[int, ...], kwargs: Dict[str, Any]
+    ) -> None:
+        try:
+            calls, remaining = self._plans[(node.__class__, active)]
+        except KeyError:
+            calls, remaining = self._get_plan(node.__class__, active)
+        for _, method in calls:
+            method(node, **kwargs)
+        if remaining:
+            for child in concepts.generic_iter_children(node):
+                self._visit_shared(child, remaining, kwargs)
+
+    def _get_plan(
+        self, node_class: Type, active: Tuple[int, ...]
+    ) -> Tuple[Tuple[Tuple[int, Callable[..., Any]], ...], Tuple[int, ...]]:
+        key = (node_class, active)
+        try:
+            return self._plans[key]
+        except KeyError:
+            pass
+
+        calls = []
+        remaining = []
+        for i in active:
+            visitor = self.visitors[i]
+            if visitor.find_visitor_method_name(node_class) is None:
+                remaining.append(i)
+            else:
+                calls.append((i, visitor.visit))
+
+        plan = self._plans[key] = (tuple(calls), tuple(remaining))
+        return plan
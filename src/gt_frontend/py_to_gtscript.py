@@ -115,14 +115,16 @@ class PyToGTScript:
         )
 
         # TODO(tehrengruber): this needs to be a function, since the uid must be generated each time
-        LocationSpecification = ast.withitem(
-            context_expr=ast.Call(
-                func=ast.Name(id="location"), args=[ast.Name(id=Capture("location_type"))]
-            ),
-            optional_vars=Capture(
-                "name", default=ast.Name(id=UIDGenerator.sequential_id(prefix="location"))
-            ),
-        )
+        # (the default name is generated in its own sequence scope to be reproducible)
+        with UIDGenerator.sequence_scope():
+            LocationSpecification = ast.withitem(
+                context_expr=ast.Call(
+                    func=ast.Name(id="location"), args=[ast.Name(id=Capture("location_type"))]
+                ),
+                optional_vars=Capture(
+                    "name", default=ast.Name(id=UIDGenerator.sequential_id(prefix="location"))
+                ),
+            )
 
         SubscriptSingle = ast.Subscript(
             value=Capture("value"), slice=ast.Index(value=ast.Name(id=Capture("index")))
@@ -20,7 +20,7 @@ from typing import List, Optional, Union
 from devtools import debug  # noqa: F401
 from pydantic import root_validator, validator
 
-from eve import Node, Str, StrEnum
+from eve import Node, Str, StrEnum, field
 from gtc import common
 
 
@@ -168,7 +168,7 @@ class HorizontalLoop(Node):
 
 class VerticalLoop(Node):
     # each statement inside a `with location_type` is interpreted as a full horizontal loop (see parallel model of SIR)
-    horizontal_loops: List[HorizontalLoop]
+    horizontal_loops: List[HorizontalLoop] = field(independent=True)
     loop_order: common.LoopOrder
 
 
@@ -15,16 +15,19 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 
-import copy
+import itertools
 from types import MappingProxyType
 from typing import ClassVar, Dict, List, Mapping
 
-import eve  # noqa: F401
+import eve
 from gtc import common
 from gtc.unstructured import gtir, nir
 
 
 class GtirToNir(eve.NodeTranslator):
+    copy_on_write = True
+    scoped_context = True
+
     REDUCE_OP_INIT_VAL: ClassVar[
         Mapping[gtir.ReduceOperator, common.BuiltInLiteral]
     ] = MappingProxyType(
@@ -100,7 +103,8 @@ class GtirToNir(eve.NodeTranslator):
 
         return result
 
-    def visit_FieldAccess(self, node: gtir.FieldAccess, *, location_comprehensions, **kwargs):
+    def visit_FieldAccess(self, node: gtir.FieldAccess, **kwargs):
+        location_comprehensions = self.context.location_comprehensions
         ordered_location_refs = self.order_location_refs(node.subscript, location_comprehensions)
         primary_chain = location_comprehensions[ordered_location_refs["primary"]].chain
         secondary_chain = (
@@ -112,18 +116,18 @@ class GtirToNir(eve.NodeTranslator):
         return nir.FieldAccess(
             name=node.name,
             location_type=node.location_type,
-            primary=primary_chain,
-            secondary=secondary_chain,
+            primary=self.visit(primary_chain),
+            secondary=self.visit(secondary_chain),
         )
 
-    def visit_NeighborReduce(self, node: gtir.NeighborReduce, *, last_block, **kwargs):
-        loc_comprehension = copy.deepcopy(kwargs["location_comprehensions"])
+    def visit_NeighborReduce(self, node: gtir.NeighborReduce, **kwargs):
+        last_block = self.context.last_block
+        loc_comprehension = eve.clone_tree(self.context.location_comprehensions)
         assert node.neighbors.name not in loc_comprehension
         loc_comprehension[node.neighbors.name] = node.neighbors
-        kwargs["location_comprehensions"] = loc_comprehension
 
         body_location = node.neighbors.chain.elements[-1]
-        reduce_var_name = "local" + str(node.id_)
+        reduce_var_name = next(self.context.reduce_var_names)
         last_block.declarations.append(
             nir.LocalVar(
                 name=reduce_var_name,
@@ -150,7 +154,11 @@ class GtirToNir(eve.NodeTranslator):
                     right=nir.BinaryOp(
                         left=nir.VarAccess(name=reduce_var_name, location_type=body_location),
                         op=self.REDUCE_OP_TO_BINOP[node.op],
-                        right=self.visit(node.operand, in_neighbor_loop=True, **kwargs),
+                        right=self.visit(
+                            node.operand,
+                            in_neighbor_loop=True,
+                            location_comprehensions=loc_comprehension,
+                        ),
                         location_type=body_location,
                     ),
                     location_type=body_location,
@@ -172,30 +180,36 @@ class GtirToNir(eve.NodeTranslator):
 
     def visit_BinaryOp(self, node: gtir.BinaryOp, **kwargs):
         return nir.BinaryOp(
-            left=self.visit(node.left, **kwargs),
+            left=self.visit(node.left),
             op=node.op,
-            right=self.visit(node.right, **kwargs),
+            right=self.visit(node.right),
             location_type=node.location_type,
         )
 
     def visit_AssignStmt(self, node: gtir.AssignStmt, **kwargs):
         return nir.AssignStmt(
-            left=self.visit(node.left, **kwargs),
-            right=self.visit(node.right, **kwargs),
+            left=self.visit(node.left),
+            right=self.visit(node.right),
             location_type=node.location_type,
         )
 
     def visit_HorizontalLoop(self, node: gtir.HorizontalLoop, **kwargs):
         block = nir.BlockStmt(declarations=[], statements=[], location_type=node.stmt.location_type)
+        # Local variables are named by position in the vertical loop (not by node id)
+        # to generate reproducible code and to avoid clashes when loops are merged
+        loop_index = self.context.get("loop_index", 0)
         stmt = self.visit(
-            node.stmt, last_block=block, location_comprehensions={node.location.name: node.location}
+            node.stmt,
+            last_block=block,
+            location_comprehensions={node.location.name: node.location},
+            reduce_var_names=(f"localNeighborReduce_{loop_index}_{i}" for i in itertools.count()),
         )
         block.statements.append(stmt)
         return nir.HorizontalLoop(stmt=block, location_type=node.location.chain.elements[0],)
 
     def visit_VerticalLoop(self, node: gtir.VerticalLoop, **kwargs):
         return nir.VerticalLoop(
-            horizontal_loops=[self.visit(h) for h in node.horizontal_loops],
+            horizontal_loops=self.visit_independent(node.horizontal_loops, index_arg="loop_index"),
             loop_order=node.loop_order,
         )
 
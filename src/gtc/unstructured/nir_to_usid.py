@@ -32,7 +32,20 @@ def location_type_from_dimensions(dimensions):
         raise ValueError("Invalid!")
 
 
+def _sorted_sid_entries(entries):
+    # Field entries (sorted by name) followed by neighbor tables (sorted by connectivity)
+    return sorted(
+        entries,
+        key=lambda entry: (False, entry.name)
+        if isinstance(entry, usid.SidCompositeEntry)
+        else (True, entry.connectivity),
+    )
+
+
 class NirToUsid(eve.NodeTranslator):
+    copy_on_write = True
+    scoped_context = True
+
     def __init__(self, **kwargs):
         super().__init__()
         self.fields = dict()  # poor man symbol table
@@ -66,8 +79,8 @@ class NirToUsid(eve.NodeTranslator):
 
     def visit_BinaryOp(self, node: nir.BinaryOp, **kwargs):
         return usid.BinaryOp(
-            left=self.visit(node.left, **kwargs),
-            right=self.visit(node.right, **kwargs),
+            left=self.visit(node.left),
+            right=self.visit(node.right),
             op=node.op,
             location_type=node.location_type,
         )
@@ -77,20 +90,20 @@ class NirToUsid(eve.NodeTranslator):
 
     def visit_NeighborLoop(self, node: nir.NeighborLoop, **kwargs):
         return usid.NeighborLoop(
-            outer_sid=kwargs["sids_tbl"][usid.NeighborChain(elements=[node.location_type])].name,
-            connectivity=kwargs["conn_tbl"][node.neighbors].name,
-            sid=kwargs["sids_tbl"][node.neighbors].name
-            if node.neighbors in kwargs["sids_tbl"]
+            outer_sid=self.context.sids_tbl[usid.NeighborChain(elements=[node.location_type])].name,
+            connectivity=self.context.conn_tbl[node.neighbors].name,
+            sid=self.context.sids_tbl[node.neighbors].name
+            if node.neighbors in self.context.sids_tbl
             else None,
             location_type=node.location_type,
             body_location_type=node.neighbors.elements[-1],
-            body=self.visit(node.body, **kwargs),
+            body=self.visit(node.body),
         )
 
     def visit_FieldAccess(self, node: nir.FieldAccess, **kwargs):
         return usid.FieldAccess(
             name=node.name,
-            sid=kwargs["sids_tbl"][self.visit(node.primary, **kwargs)].name,
+            sid=self.context.sids_tbl[self.visit(node.primary)].name,
             location_type=node.location_type,
         )
 
@@ -99,8 +112,8 @@ class NirToUsid(eve.NodeTranslator):
 
     def visit_AssignStmt(self, node: nir.AssignStmt, **kwargs):
         return usid.AssignStmt(
-            left=self.visit(node.left, **kwargs),
-            right=self.visit(node.right, **kwargs),
+            left=self.visit(node.left),
+            right=self.visit(node.right),
             location_type=node.location_type,
         )
 
@@ -118,7 +131,7 @@ class NirToUsid(eve.NodeTranslator):
                 )
             )
         for stmt in node.statements:
-            statements.append(self.visit(stmt, **kwargs))
+            statements.append(self.visit(stmt))
         return statements
 
     def visit_HorizontalLoop(self, node: nir.HorizontalLoop, **kwargs):
@@ -152,7 +165,7 @@ class NirToUsid(eve.NodeTranslator):
 
         neighloops = eve.FindNodes().by_type(nir.NeighborLoop, node.stmt)
         for loop in neighloops:
-            transformed_neighbors = self.visit(loop.neighbors, **kwargs)
+            transformed_neighbors = self.visit(loop.neighbors)
             connectivity_name = str(transformed_neighbors) + "_conn"
             connectivities.add(
                 usid.Connectivity(name=connectivity_name, chain=transformed_neighbors)
@@ -161,29 +174,35 @@ class NirToUsid(eve.NodeTranslator):
                 usid.SidCompositeNeighborTableEntry(connectivity=connectivity_name)
             )
 
+        # Sets are emitted sorted by name to generate reproducible code
         primary_sid = location_type_str
         sids = []
         sids.append(
             usid.SidComposite(
                 name=primary_sid,
-                entries=primary_sid_entries,
+                entries=_sorted_sid_entries(primary_sid_entries),
                 location=usid.NeighborChain(elements=[node.location_type]),
             )
         )
 
+        other_sids = []
         for k, v in other_sids_entries.items():
             chain = usid.NeighborChain(elements=[node.location_type, k])
-            sids.append(
-                usid.SidComposite(name=str(chain), entries=v, location=chain)
+            other_sids.append(
+                usid.SidComposite(name=str(chain), entries=_sorted_sid_entries(v), location=chain)
             )  # TODO _conn via property
+        sids.extend(sorted(other_sids, key=lambda sid: sid.name))
+        connectivities = sorted(connectivities, key=lambda conn: conn.name)
 
-        kernel_name = "kernel_" + node.id_
+        # Kernels are named by position in the computation (not by node id)
+        # to generate reproducible code
+        kernel_index = self.context.get("first_kernel", 0) + self.context.get("loop_index", 0)
+        kernel_name = f"kernel_{kernel_index}"
         kernel = usid.Kernel(
             ast=self.visit(
                 node.stmt,
                 sids_tbl={s.location: s for s in sids},
                 conn_tbl={c.chain: c for c in connectivities},
-                **kwargs,
             ),
             name=kernel_name,
             primary_connectivity=primary_connectivity,
@@ -197,8 +216,11 @@ class NirToUsid(eve.NodeTranslator):
         # TODO I am completely ignoring k loops at this point!
         kernels = []
         kernel_calls = []
-        for loop in node.horizontal_loops:
-            k, c = self.visit(loop, **kwargs)
+        for k, c in self.visit_independent(
+            node.horizontal_loops,
+            index_arg="loop_index",
+            first_kernel=self.context.get("first_kernel", 0),
+        ):
             kernels.append(k)
             kernel_calls.append(c)
         return kernels, kernel_calls
@@ -207,7 +229,7 @@ class NirToUsid(eve.NodeTranslator):
         kernels = []
         kernel_calls = []
         for loop in node.vertical_loops:
-            k, c = self.visit(loop, **kwargs)
+            k, c = self.visit(loop, first_kernel=self.context.get("first_kernel", 0) + len(kernels))
             kernels.extend(k)
             kernel_calls.extend(c)
         return kernels, kernel_calls
@@ -228,7 +250,7 @@ class NirToUsid(eve.NodeTranslator):
         kernels = []
         ctrlflow_ast = []
         for s in node.stencils:
-            kernel, kernel_call = self.visit(s)
+            kernel, kernel_call = self.visit(s, first_kernel=len(kernels))
             kernels.extend(kernel)
             ctrlflow_ast.extend(kernel_call)
 
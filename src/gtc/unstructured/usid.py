@@ -21,7 +21,7 @@ from devtools import debug  # noqa: F401
 from pydantic import root_validator, validator
 
 import eve
-from eve import Node, Str
+from eve import Node, Str, field
 from gtc import common
 
 
@@ -267,5 +267,5 @@ class Computation(Node):
     name: Str
     parameters: List[UField]
     temporaries: List[Temporary]
-    kernels: List[Kernel]
+    kernels: List[Kernel] = field(independent=True)
     ctrlflow_ast: List[KernelCall]
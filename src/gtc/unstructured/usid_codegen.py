@@ -38,6 +38,9 @@ class SymbolTblHelper(NodeTranslator):
     # - temporary helper which resolves symbol refs with the symbol it's pointing to
     # - the code generator relies on the possibility to look up a symbol ref outside of a visitor
 
+    trusted_construction = True
+    copy_on_write = True
+
     def visit_SidCompositeNeighborTableEntry(self, node: SidCompositeNeighborTableEntry, **kwargs):
         connectivity_deref = kwargs["symbol_tbl_conn"][node.connectivity]
         return SidCompositeNeighborTableEntry(
@@ -81,9 +84,11 @@ class UsidCodeGenerator(codegen.TemplatedGenerator):
     )
 
     @classmethod
-    def apply(cls, root, **kwargs) -> str:
+    def apply(cls, root, *, executor=None, **kwargs) -> str:
         symbol_tbl_resolved = SymbolTblHelper().visit(root)
-        generated_code = super().apply(symbol_tbl_resolved, **kwargs)
+        generator = cls()
+        generator.executor = executor  # render kernels in parallel if provided
+        generated_code = generator.visit(symbol_tbl_resolved, **kwargs)
         formatted_code = codegen.format_source("cpp", generated_code, style="LLVM")
         return formatted_code
 
@@ -230,7 +235,7 @@ class UsidCodeGenerator(codegen.TemplatedGenerator):
             node,
             computation_fields=node.parameters + node.temporaries,
             # cache_allocator=cache_allocator_,
-            sid_tags=sid_tags,
+            sid_tags=sorted(sid_tags),
             symbol_tbl_kernel=symbol_tbl_kernel,
             **kwargs,
         )
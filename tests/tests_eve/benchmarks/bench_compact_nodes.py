@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Memory and speed comparison of pydantic and compact (``__slots__``) nodes."""
+
+import tracemalloc
+from typing import Any, Callable, List, Tuple, Union
+
+import eve
+
+from .common import report, timed
+
+
+class _Literal(eve.Node):
+    value: eve.Int
+
+
+class _BinaryOp(eve.Node):
+    op: eve.Str
+    left: Union["_BinaryOp", _Literal]
+    right: Union["_BinaryOp", _Literal]
+
+
+class _Assign(eve.Node):
+    target: eve.Str
+    value: Union[_BinaryOp, _Literal]
+
+
+class _Block(eve.Node):
+    stmts: List[_Assign]
+
+
+_BinaryOp.update_forward_refs()
+
+
+class _CompactLiteral(eve.CompactNode):
+    value: eve.Int
+
+
+class _CompactBinaryOp(eve.CompactNode):
+    op: eve.Str
+    left: Union["_CompactBinaryOp", _CompactLiteral]
+    right: Union["_CompactBinaryOp", _CompactLiteral]
+
+
+class _CompactAssign(eve.CompactNode):
+    target: eve.Str
+    value: Union[_CompactBinaryOp, _CompactLiteral]
+
+
+class _CompactBlock(eve.CompactNode):
+    stmts: List[_CompactAssign]
+
+
+_CompactBinaryOp.update_forward_refs()
+
+_PYDANTIC_CLASSES = (_Literal, _BinaryOp, _Assign, _Block)
+_COMPACT_CLASSES = (_CompactLiteral, _CompactBinaryOp, _CompactAssign, _CompactBlock)
+
+
+def _make_block(node_classes: Tuple[type, ...], n_stmts: int, expr_depth: int) -> Any:
+    literal_class, binary_op_class, assign_class, block_class = node_classes
+
+    def make_expr(depth: int) -> Any:
+        if depth <= 0:
+            return literal_class(value=depth)
+        return binary_op_class(op="+", left=make_expr(depth - 1), right=make_expr(depth - 1))
+
+    return block_class(
+        stmts=[assign_class(target=f"t{i}", value=make_expr(expr_depth)) for i in range(n_stmts)]
+    )
+
+
+def _allocated_memory(func: Callable[[], Any]) -> Tuple[Any, int]:
+    tracemalloc.start()
+    try:
+        result = func()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+class _CopyTranslator(eve.NodeTranslator):
+    trusted_construction = True
+
+
+def main() -> None:
+    for n_stmts, expr_depth in [(100, 6), (1000, 6)]:
+        title = f"block (stmts={n_stmts}, expr depth={expr_depth})"
+        rows = []
+        trees = {}
+        for backend, node_classes in [
+            ("pydantic", _PYDANTIC_CLASSES),
+            ("compact", _COMPACT_CLASSES),
+        ]:
+            tree, size = _allocated_memory(lambda: _make_block(node_classes, n_stmts, expr_depth))
+            n_nodes = sum(1 for node in eve.traverse_tree(tree) if isinstance(node, eve.Node))
+            trees[backend] = tree
+            rows.append(
+                (
+                    f"{backend} [{n_nodes} nodes]",
+                    f"{size / 2**20:.1f} MiB",
+                    f"{size / n_nodes:.0f} B",
+                    timed(lambda: _make_block(node_classes, n_stmts, expr_depth), repeat=3),
+                    timed(lambda: list(eve.traverse_tree(tree)), repeat=3),
+                    timed(lambda: _CopyTranslator().visit(tree), repeat=3),
+                )
+            )
+
+        rows.append(
+            (
+                "compact checkpoint: validate_tree()",
+                "",
+                "",
+                timed(lambda: eve.concepts.validate_tree(trees["compact"]), repeat=3),
+                "",
+                "",
+            )
+        )
+        report(f"{title}: memory | per node | build | traverse | translate", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Speed comparison of the stable hash functions of eve for node trees."""
+
+from eve import concepts, utils
+
+from .bench_serialization import _make_block
+from .common import report, timed
+
+
+def main() -> None:
+    for n_stmts, expr_depth in [(100, 6), (1000, 6)]:
+        tree = _make_block(n_stmts, expr_depth)
+        rows = [
+            ("utils.shash (pickle)", timed(lambda: utils.shash(tree), repeat=3)),
+            ("utils.structural_hash", timed(lambda: utils.structural_hash(tree), repeat=3)),
+            (
+                "utils.structural_hash (with impl fields)",
+                timed(
+                    lambda: utils.structural_hash(tree, exclude=(), exclude_impl_fields=False),
+                    repeat=3,
+                ),
+            ),
+            (
+                "Node.content_hash (Merkle)",
+                timed(lambda: concepts._compute_content_hash(tree), repeat=3),
+            ),
+        ]
+        report(f"block (stmts={n_stmts}): hash", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Micro-benchmarks of the tree traversal iterators."""
+
+from typing import Any, Generator, List, Optional, Union
+
+import eve
+
+from .common import make_deep_tree, make_wide_tree, report, timed
+
+
+def _legacy_traverse_pre(node: Any) -> Generator[Any, None, None]:
+    yield node
+    for child in eve.concepts.generic_iter_children(node):
+        yield from _legacy_traverse_pre(child)
+
+
+def _legacy_traverse_levels(
+    node: Any, __queue__: Optional[List] = None
+) -> Generator[Any, None, None]:
+    __queue__ = __queue__ or []
+    yield node
+    __queue__.extend(eve.concepts.generic_iter_children(node))
+    if __queue__:
+        yield from _legacy_traverse_levels(__queue__.pop(0), __queue__)
+
+
+def _legacy_iter_children(node: eve.Node) -> Generator[Any, None, None]:
+    for name, _ in node.__fields__.items():
+        if not (name.endswith("_") or name.endswith("__")):
+            yield name, getattr(node, name)
+
+
+def _legacy_generic_iter_children(node: Any) -> Any:
+    if isinstance(node, eve.Node):
+        return (value for _, value in _legacy_iter_children(node))
+    return eve.concepts.generic_iter_children(node)
+
+
+def _legacy_fields_traverse_pre(node: Any) -> Generator[Any, None, None]:
+    stack = [iter((node,))]
+    while stack:
+        for item in stack[-1]:
+            yield item
+            stack.append(iter(_legacy_generic_iter_children(item)))
+            break
+        else:
+            stack.pop()
+
+
+class _Literal(eve.Node):
+    value: int
+
+
+class _BinaryOp(eve.Node):
+    left: Union["_BinaryOp", _Literal]
+    right: Union["_BinaryOp", _Literal]
+
+
+class _Target(eve.Node):
+    name: eve.Str
+
+
+class _Assign(eve.Node):
+    target: _Target
+    value: Union[_BinaryOp, _Literal]
+
+
+class _Block(eve.Node):
+    stmts: List[_Assign]
+
+
+_BinaryOp.update_forward_refs()
+
+
+def _make_expr(depth: int) -> Any:
+    if depth <= 0:
+        return _Literal(value=depth)
+    return _BinaryOp(left=_make_expr(depth - 1), right=_make_expr(depth - 1))
+
+
+def _exhaust(iterator: Any) -> Any:
+    def _run() -> None:
+        for _ in iterator():
+            pass
+
+    return _run
+
+
+def _timed_or_error(func: Any) -> Any:
+    try:
+        return timed(func, repeat=3)
+    except RecursionError:
+        return "RecursionError"
+
+
+def main() -> None:
+    trees = [(f"wide tree (width=8, depth={d})", make_wide_tree(8, d)) for d in (2, 3, 4)]
+    trees += [(f"deep tree (depth={d})", make_deep_tree(d)) for d in (100, 400, 1600, 6400)]
+
+    for title, legacy, current in [
+        ("pre-order", _legacy_traverse_pre, eve.iterators.traverse_pre),
+        ("levels-order", _legacy_traverse_levels, eve.iterators.traverse_levels),
+    ]:
+        rows = []
+        for name, tree in trees:
+            n_items = sum(1 for _ in current(tree))
+            legacy_time = _timed_or_error(_exhaust(lambda: legacy(tree)))
+            current_time = _timed_or_error(_exhaust(lambda: current(tree)))
+            rows.append(
+                (
+                    f"{name} [{n_items} items]",
+                    legacy_time,
+                    current_time,
+                    f"{current_time / n_items * 1e6:.3f} us",
+                )
+            )
+
+        report(f"{title} traversal: recursive | iterative | time per item", rows)
+
+    blocks = [
+        (
+            f"block (stmts={n_stmts}, expr depth={expr_depth})",
+            _Block(
+                stmts=[
+                    _Assign(target=_Target(name=f"t{i}"), value=_make_expr(expr_depth))
+                    for i in range(n_stmts)
+                ]
+            ),
+        )
+        for n_stmts, expr_depth in [(10, 4), (100, 4), (100, 6)]
+    ]
+
+    rows = []
+    for name, block in blocks:
+        filtered = timed(
+            lambda: [n for n in eve.traverse_tree(block) if isinstance(n, _Target)], repeat=3
+        )
+        pruned = timed(lambda: list(eve.traverse_tree(block, only_types=_Target)), repeat=3)
+        rows.append(
+            (
+                name,
+                filtered,
+                pruned,
+                f"{filtered / pruned:.2f}x",
+            )
+        )
+
+    report("search by type: filtered traversal | pruned traversal | speed-up", rows)
+
+    rows = []
+    for name, tree in blocks:
+        nodes = [node for node in eve.traverse_tree(tree) if isinstance(node, eve.Node)]
+        legacy_time = timed(lambda: [list(_legacy_iter_children(node)) for node in nodes], repeat=3)
+        current_time = timed(lambda: [list(node.iter_children()) for node in nodes], repeat=3)
+        rows.append(
+            (
+                name,
+                legacy_time,
+                current_time,
+                f"{legacy_time / current_time:.2f}x",
+            )
+        )
+        legacy_time = timed(_exhaust(lambda: _legacy_fields_traverse_pre(tree)), repeat=3)
+        current_time = timed(_exhaust(lambda: eve.traverse_tree(tree)), repeat=3)
+        rows.append(
+            (
+                f"    full traversal [{len(nodes)} nodes]",
+                legacy_time,
+                current_time,
+                f"{legacy_time / current_time:.2f}x",
+            )
+        )
+
+    report("node children: field name checks | precomputed getters | speed-up", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Size and speed comparison of the eve binary serialization, pickle and pydantic JSON."""
+
+import pickle
+from typing import List, Union
+
+import eve
+from eve import serialization
+
+from .common import report, timed
+
+
+class _Literal(eve.Node):
+    value: eve.Int
+
+
+class _Ref(eve.Node):
+    name: eve.Str
+
+
+class _BinaryOp(eve.Node):
+    op: eve.Str
+    left: Union["_BinaryOp", _Literal, _Ref]
+    right: Union["_BinaryOp", _Literal, _Ref]
+
+
+class _Assign(eve.Node):
+    target: eve.SymbolName
+    value: Union[_BinaryOp, _Literal, _Ref]
+
+
+class _Block(eve.Node):
+    stmts: List[_Assign]
+
+
+_BinaryOp.update_forward_refs()
+
+
+def _make_block(n_stmts: int, expr_depth: int) -> _Block:
+    def make_expr(depth: int, seed: int) -> Union[_BinaryOp, _Literal, _Ref]:
+        if depth <= 0:
+            return _Ref(name=f"t{seed % 7}") if seed % 2 else _Literal(value=seed)
+        return _BinaryOp(
+            op="+", left=make_expr(depth - 1, 2 * seed), right=make_expr(depth - 1, 2 * seed + 1)
+        )
+
+    return _Block(
+        stmts=[_Assign(target=f"t{i}", value=make_expr(expr_depth, i)) for i in range(n_stmts)]
+    )
+
+
+def main() -> None:
+    for n_stmts, expr_depth in [(100, 6), (1000, 6)]:
+        tree = _make_block(n_stmts, expr_depth)
+        pickled = pickle.dumps(tree, protocol=pickle.HIGHEST_PROTOCOL)
+        json = tree.json()
+        encoded = serialization.dumps(tree)
+        rows = [
+            (
+                "pickle",
+                f"{len(pickled) / 2**10:.0f} KiB",
+                timed(lambda: pickle.dumps(tree, protocol=pickle.HIGHEST_PROTOCOL), repeat=3),
+                timed(lambda: pickle.loads(pickled), repeat=3),
+                "",
+            ),
+            (
+                "pydantic .json()",
+                f"{len(json) / 2**10:.0f} KiB",
+                timed(lambda: tree.json(), repeat=3),
+                timed(lambda: _Block.parse_raw(json), repeat=3),
+                "",
+            ),
+            (
+                "eve.serialization",
+                f"{len(encoded) / 2**10:.0f} KiB",
+                timed(lambda: serialization.dumps(tree), repeat=3),
+                timed(lambda: serialization.loads(encoded), repeat=3),
+                timed(
+                    lambda: [
+                        node.target
+                        for node in serialization.NodeReader(encoded).iter_nodes(only_types=_Assign)
+                    ],
+                    repeat=3,
+                ),
+            ),
+        ]
+        report(f"block (stmts={n_stmts}): size | dump | load | lazy targets", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Rendering throughput of format templates (:class:`eve.codegen.FormatTemplate`)."""
+
+from eve import codegen, utils
+
+from .common import report, timed
+
+
+#: Format strings of typical code generation templates, with keyword arguments
+_TEMPLATES = [
+    ("simple", "{left} = {right};", dict(left="a", right="b + c")),
+    ("binary op", "({left} {op} {right})", dict(left="a", op="+", right="b")),
+    (
+        "expressions",
+        "auto {name} = {', '.join(args)}[{index + 1}]{suffix!r:>8};",
+        dict(name="x", args=["a", "b", "c"], index=2, suffix="end"),
+    ),
+]
+
+
+def main() -> None:
+    n_renders = 10000
+    formatter = utils.XStringFormatter()
+    rows = []
+    for name, definition, kwargs in _TEMPLATES:
+        template = codegen.FormatTemplate(definition)
+        rows.append(
+            (
+                name,
+                timed(
+                    lambda: [formatter.format(definition, **kwargs) for _ in range(n_renders)],
+                    repeat=3,
+                ),
+                timed(lambda: [template.render(**kwargs) for _ in range(n_renders)], repeat=3),
+            )
+        )
+    report(f"{n_renders} renders: XStringFormatter.format | FormatTemplate.render", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Micro-benchmarks of the visitor dispatching mechanism."""
+
+from typing import Any, List, Tuple, Type
+
+import pydantic
+
+import eve
+
+from .common import BenchTree, make_deep_tree, make_wide_tree, report, timed
+
+
+class _CountingVisitor(eve.NodeVisitor):
+    def __init__(self) -> None:
+        self.count = 0
+
+    def visit_Node(self, node: eve.Node, **kwargs: Any) -> None:
+        self.count += 1
+        self.generic_visit(node, **kwargs)
+
+
+class _LegacyCountingVisitor(_CountingVisitor):
+    """Same visitor using the previous (uncached) dispatching implementation."""
+
+    def visit(self, node: eve.concepts.TreeNode, **kwargs: Any) -> Any:
+        visitor = self.generic_visit
+
+        method_name = "visit_" + node.__class__.__name__
+        if hasattr(self, method_name):
+            visitor = getattr(self, method_name)
+        elif isinstance(node, eve.Node):
+            for node_class in node.__class__.__mro__[1:]:
+                method_name = "visit_" + node_class.__name__
+                if hasattr(self, method_name):
+                    visitor = getattr(self, method_name)
+                    break
+
+                if node_class is eve.Node:
+                    break
+
+        return visitor(node, **kwargs)
+
+
+class _LeafSumAnalysis(eve.NodeVisitor):
+    """Read-only analysis which only handles the leaves of the tree."""
+
+    def __init__(self) -> None:
+        self.total = 0
+
+    def visit_int(self, node: int, **kwargs: Any) -> None:
+        self.total += node
+
+
+class _RewriteTranslator(eve.NodeTranslator):
+    """Translator modifying only the first leaf node found in the tree."""
+
+    def visit_BenchTree(self, node: BenchTree, **kwargs: Any) -> Any:
+        if not any(isinstance(child, BenchTree) for child in node.children):
+            if not getattr(self, "done", False):
+                self.done = True
+                return node.copy(update={"value": -1})
+        return self.generic_visit(node, **kwargs)
+
+
+class _CopyOnWriteRewriteTranslator(_RewriteTranslator):
+    copy_on_write = True
+
+
+class _TrustedCopyOnWriteRewriteTranslator(_CopyOnWriteRewriteTranslator):
+    trusted_construction = True
+
+
+class _RebuildMutator(eve.NodeMutator):
+    """Mutator replacing every node (bottom-up) with an equal copy."""
+
+    def visit_BenchTree(self, node: BenchTree, **kwargs: Any) -> Any:
+        return self.generic_visit(node, **kwargs).copy()
+
+
+class _KeepMutator(eve.NodeMutator):
+    """Mutator visiting the whole tree without replacing any node."""
+
+    pass
+
+
+def _legacy_is_changed(new_value: Any, value: Any) -> bool:
+    # Previous change detection: `!=`, which for nodes was the pydantic equality
+    # comparing the dict() of the whole subtrees (even for the same instance)
+    if isinstance(new_value, pydantic.BaseModel):
+        return not pydantic.BaseModel.__eq__(new_value, value)
+    return bool(new_value != value)
+
+
+class _LegacyRebuildMutator(_RebuildMutator):
+    """Same mutator using the previous (deep equality) change detection."""
+
+    def _is_changed(self, new_value: Any, value: Any) -> bool:
+        return _legacy_is_changed(new_value, value)
+
+
+class _LegacyKeepMutator(_KeepMutator):
+    """Same mutator using the previous (deep equality) change detection."""
+
+    def _is_changed(self, new_value: Any, value: Any) -> bool:
+        return _legacy_is_changed(new_value, value)
+
+
+class _KwargsLevelVisitor(eve.NodeVisitor):
+    """Visitor propagating a large context (and updating one value) with keyword arguments."""
+
+    def visit_BenchTree(self, node: BenchTree, **kwargs: Any) -> None:
+        self.generic_visit(node, **{**kwargs, "level": kwargs["level"] + 1})
+
+
+class _ContextLevelVisitor(eve.NodeVisitor):
+    """Same visitor using a scoped context."""
+
+    scoped_context = True
+
+    def visit_BenchTree(self, node: BenchTree, **kwargs: Any) -> None:
+        with self.context.scope(level=self.context.level + 1):
+            self.generic_visit(node)
+
+
+def main() -> None:
+    rows = []
+    for width, depth in [(8, 3), (8, 4), (4, 7)]:
+        tree = make_wide_tree(width, depth)
+        legacy = timed(lambda: _LegacyCountingVisitor().visit(tree))
+        cached = timed(lambda: _CountingVisitor().visit(tree))
+        rows.append(
+            (f"wide tree (width={width}, depth={depth})", legacy, cached, f"{legacy / cached:.2f}x")
+        )
+
+    report("NodeVisitor.visit dispatch: legacy | cached | speed-up", rows)
+
+    rows = []
+    for width, depth in [(8, 3), (8, 4), (4, 7)]:
+        tree = make_wide_tree(width, depth)
+        full = timed(lambda: _RewriteTranslator().visit(tree), repeat=3)
+        cow = timed(lambda: _CopyOnWriteRewriteTranslator().visit(tree), repeat=3)
+        trusted = timed(lambda: _TrustedCopyOnWriteRewriteTranslator().visit(tree), repeat=3)
+        rows.append((f"wide tree (width={width}, depth={depth})", full, cow, trusted))
+
+    report("NodeTranslator single rewrite: full copy | copy-on-write | + trusted", rows)
+
+    rows = []
+    for width, depth in [(8, 3), (8, 4), (4, 7)]:
+        tree = make_wide_tree(width, depth)
+        for title, other in [
+            ("equal", tree.copy(deep=True)),
+            ("unequal", tree.copy(update={"value": -1})),
+        ]:
+            pydantic_eq = timed(lambda: pydantic.BaseModel.__eq__(tree, other), repeat=3)
+            node_eq = timed(lambda: tree == other, repeat=3)
+            rows.append((f"{title} wide tree (width={width}, depth={depth})", pydantic_eq, node_eq))
+
+    report("Node comparison: pydantic | eve", rows)
+
+    rows = []
+    n_analyses = 4
+    for width, depth in [(8, 3), (8, 4), (4, 7)]:
+        tree = make_wide_tree(width, depth)
+        separate = timed(
+            lambda: [_LeafSumAnalysis().visit(tree) for _ in range(n_analyses)], repeat=3
+        )
+        fused = timed(
+            lambda: eve.FusedVisitor(*(_LeafSumAnalysis() for _ in range(n_analyses))).visit(tree),
+            repeat=3,
+        )
+        rows.append(
+            (
+                f"wide tree (width={width}, depth={depth})",
+                separate,
+                fused,
+                f"{separate / fused:.2f}x",
+            )
+        )
+
+    report(f"{n_analyses} read-only analyses: separate | FusedVisitor | speed-up", rows)
+
+    rows = []
+    mutators: List[Tuple[str, Type[eve.NodeMutator], Type[eve.NodeMutator]]] = [
+        ("unchanged", _LegacyKeepMutator, _KeepMutator),
+        ("rebuilt", _LegacyRebuildMutator, _RebuildMutator),
+    ]
+    trees = [(f"deep tree (depth={depth})", make_deep_tree(depth)) for depth in [20, 60]] + [
+        (f"wide tree (width={width}, depth={depth})", make_wide_tree(width, depth))
+        for width, depth in [(8, 3), (4, 7)]
+    ]
+    for title, legacy_mutator, mutator in mutators:
+        for tree_title, tree in trees:
+            equality = timed(lambda: legacy_mutator().visit(tree))
+            identity = timed(lambda: mutator().visit(tree))
+            rows.append(
+                (f"{title} {tree_title}", equality, identity, f"{equality / identity:.2f}x")
+            )
+
+    report("NodeMutator change detection: deep equality | identity | speed-up", rows)
+
+    rows = []
+    context = {f"value_{i}": i for i in range(16)}
+    for depth in [20, 60]:
+        tree = make_deep_tree(depth)
+        with_kwargs = timed(lambda: _KwargsLevelVisitor().visit(tree, level=0, **context))
+        with_context = timed(lambda: _ContextLevelVisitor().visit(tree, level=0, **context))
+        rows.append((f"deep tree (depth={depth})", with_kwargs, with_context))
+
+    report("Context propagation (17 values): kwargs | scoped context", rows)
+
+
+if __name__ == "__main__":
+    main()
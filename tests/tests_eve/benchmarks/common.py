@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Shared utilities for the Eve micro-benchmarks.
+
+Benchmarks are plain scripts (not collected by pytest) which should be run
+as modules from the repository root, e.g.::
+
+    python -m tests.tests_eve.benchmarks.bench_visitors
+
+"""
+
+from __future__ import annotations
+
+import timeit
+from typing import Callable, List, Union
+
+import eve
+
+
+class BenchTree(eve.Node):
+    value: int
+    children: List[Union["BenchTree", int]]
+
+
+BenchTree.update_forward_refs()
+
+
+def make_wide_tree(width: int, depth: int = 2) -> BenchTree:
+    """Build a tree where each inner node has `width` node children."""
+    if depth <= 1:
+        return BenchTree(value=0, children=list(range(width)))
+    return BenchTree(value=depth, children=[make_wide_tree(width, depth - 1) for _ in range(width)])
+
+
+def make_deep_tree(depth: int) -> BenchTree:
+    """Build a degenerated tree (a chain) of `depth` levels."""
+    tree = BenchTree(value=0, children=[0])
+    for i in range(1, depth):
+        tree = BenchTree(value=i, children=[tree, i])
+    return tree
+
+
+def timed(func: Callable[[], object], *, repeat: int = 5, number: int = 1) -> float:
+    """Return the best time (in seconds) of `repeat` runs of `number` calls."""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def report(title: str, rows: List[tuple]) -> None:
+    print(f"\n{title}")
+    print("-" * len(title))
+    for name, *values in rows:
+        formatted = "  ".join(
+            f"{v * 1e3:10.3f} ms" if isinstance(v, float) else f"{v!s:>13}" for v in values
+        )
+        print(f"{name:<40} {formatted}")
@@ -22,7 +22,7 @@ from typing import Collection, Dict, List, Mapping, Optional, Sequence, Set, Typ
 
 from pydantic import Field, validator  # noqa: F401
 
-from eve.concepts import FrozenNode, Node, VType
+from eve.concepts import CompactNode, FrozenNode, Node, VType
 from eve.type_definitions import Bool, Bytes, Float, Int, IntEnum, SourceLocation, Str, StrEnum
 
 
@@ -237,6 +237,25 @@ class FrozenSimpleNode(FrozenNode):
     str_kind: StrKind
 
 
+class CompactSimpleNode(CompactNode):
+    bool_value: Bool
+    int_value: Int
+    float_value: Float
+    str_value: Str
+    bytes_value: Bytes
+    int_kind: IntKind
+    str_kind: StrKind
+
+
+class CompactCompoundNode(CompactNode):
+    simple: CompactSimpleNode
+    simple_list: List[CompactSimpleNode]
+    location: Optional[LocationNode]
+
+
+AnySimpleNode = TypeVar("AnySimpleNode", SimpleNode, CompactSimpleNode)
+
+
 # -- Maker functions --
 def make_source_location(fixed: bool = False) -> SourceLocation:
     factories = Factories if fixed else RandomFactories
@@ -256,7 +275,9 @@ def make_location_node(fixed: bool = False) -> LocationNode:
     return LocationNode(loc=make_source_location(fixed))
 
 
-def make_simple_node(fixed: bool = False) -> SimpleNode:
+def make_simple_node(
+    fixed: bool = False, *, node_class: Type[AnySimpleNode] = SimpleNode
+) -> AnySimpleNode:
     factories = Factories if fixed else RandomFactories
     bool_value = factories.make_bool()
     int_value = factories.make_int()
@@ -266,7 +287,7 @@ def make_simple_node(fixed: bool = False) -> SimpleNode:
     int_kind = IntKind.PLUS if fixed else factories.make_member([*IntKind])
     str_kind = StrKind.BLA if fixed else factories.make_member([*StrKind])
 
-    return SimpleNode(
+    return node_class(
         bool_value=bool_value,
         int_value=int_value,
         float_value=float_value,
@@ -341,6 +362,18 @@ def make_compound_node(fixed: bool = False) -> CompoundNode:
     )
 
 
+def make_compact_simple_node(fixed: bool = False) -> CompactSimpleNode:
+    return make_simple_node(fixed, node_class=CompactSimpleNode)
+
+
+def make_compact_compound_node(fixed: bool = False) -> CompactCompoundNode:
+    return CompactCompoundNode(
+        simple=make_compact_simple_node(fixed),
+        simple_list=[make_compact_simple_node(fixed) for _ in range(3)],
+        location=make_location_node(fixed),
+    )
+
+
 def make_frozen_simple_node(fixed: bool = False) -> FrozenSimpleNode:
     factories = Factories if fixed else RandomFactories
     bool_value = factories.make_bool()
@@ -14,6 +14,8 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import pickle
+
 import pytest
 
 import eve
@@ -71,6 +73,19 @@ def test_render_template(template_maker):
     assert template.render(data, i=2) == "aaa STRING bbbb 2 cccc"
 
 
+def test_format_template_compilation():
+    # Compiled on first use (nested fields in format specs are not compiled)
+    for definition, expected in [
+        ("{a} {b!r:>5}: {', '.join(c)}", "1   'x': u, v"),
+        ("{a} {b!r:>{width}}", "1   'x'"),
+    ]:
+        template = eve.codegen.FormatTemplate(definition)
+        data = dict(a=1, b="x", c=["u", "v"], width=5)
+        assert template.render(**data) == expected
+        assert template.render(data, a=2) == expected.replace("1", "2", 1)
+        assert pickle.loads(pickle.dumps(template)).render(**data) == expected
+
+
 # -- TemplatedGenerator tests --
 class _BaseTestGenerator(eve.codegen.TemplatedGenerator):
     KEYWORDS = ("BASE", "ONE")
@@ -138,3 +153,14 @@ def test_templated_generator(templated_generator, fixed_compound_node):
 
     for keyword in templated_generator.KEYWORDS:
         assert rendered_code.find(keyword) >= 0
+
+
+def test_memoized_templated_generator(fixed_compound_node):
+    class Generator(_BaseTestGenerator):
+        memoization = eve.visitors.MemoizationMode.IDENTITY
+
+    generator = Generator()
+    rendered_code = generator.visit([fixed_compound_node, fixed_compound_node])
+    assert rendered_code[0] is rendered_code[1]
+    assert rendered_code[0] == _BaseTestGenerator.apply(fixed_compound_node)
+    assert generator.memoization_stats.hits == 1
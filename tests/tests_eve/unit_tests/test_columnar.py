@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+import pytest
+
+import eve
+from eve.iterators import TraversalOrder
+
+from .. import common
+
+
+class Leaf(eve.Node):
+    name: eve.SymbolName
+    value: int
+
+
+class Branch(eve.Node):
+    name: eve.SymbolName
+    leaves: List[Leaf]
+    branches: List[Branch]
+    extra: Optional[Leaf]
+
+
+Branch.update_forward_refs()
+
+
+@pytest.fixture
+def tree():
+    yield Branch(
+        name="root",
+        leaves=[Leaf(name="a", value=1), Leaf(name="b", value=2)],
+        branches=[
+            Branch(
+                name="inner",
+                leaves=[Leaf(name="c", value=3)],
+                branches=[],
+                extra=Leaf(name="d", value=1),
+            )
+        ],
+        extra=None,
+    )
+
+
+def _nodes(tree, node_type=eve.Node, order=TraversalOrder.PRE_ORDER):
+    return [
+        node
+        for node in eve.traverse_tree(tree, traversal_order=order)
+        if isinstance(node, node_type)
+    ]
+
+
+def test_round_trip(tree, sample_node):
+    for node in (tree, sample_node, common.make_compact_compound_node()):
+        columnar = eve.ColumnarTree.from_tree(node)
+        assert len(columnar) == len(_nodes(node))
+        assert columnar.to_tree() == node
+
+    inner = tree.branches[0]
+    columnar = eve.ColumnarTree.from_tree(tree)
+    assert columnar.to_tree(int(columnar.by_value("name", "inner")[0])) == inner
+
+
+def test_structure(tree):
+    columnar = eve.ColumnarTree.from_tree(tree)
+    nodes = _nodes(tree)
+    inner = nodes.index(tree.branches[0])
+
+    assert [columnar.node_class(i) for i in range(len(columnar))] == [
+        node.__class__ for node in nodes
+    ]
+    assert list(columnar.children(0)) == [1, 2, inner]
+    assert list(columnar.subtree(inner)) == [nodes.index(node) for node in _nodes(tree.branches[0])]
+    assert columnar.ancestors(inner + 1) == [inner, 0]
+    assert columnar.field_names[columnar.parent_fields[inner]] == "branches"
+    assert columnar.parent_positions[inner] == 0 and columnar.parent_positions[0] == -1
+
+
+@pytest.mark.parametrize("order", list(TraversalOrder))
+def test_traverse(tree, order):
+    columnar = eve.ColumnarTree.from_tree(tree)
+    nodes = _nodes(tree)
+    for node_type in (eve.Node, Leaf, (Branch,)):
+        expected = _nodes(tree, node_type, order)
+        indices = columnar.traverse(order, only_types=None if node_type is eve.Node else node_type)
+        assert [nodes[i] for i in indices] == expected
+
+
+def test_queries(tree):
+    columnar = eve.ColumnarTree.from_tree(tree)
+    nodes = _nodes(tree)
+    inner = nodes.index(tree.branches[0])
+
+    assert [nodes[i] for i in columnar.by_type(Leaf)] == _nodes(tree, Leaf)
+    assert [nodes[i] for i in columnar.by_type(Leaf, within=inner)] == _nodes(
+        tree.branches[0], Leaf
+    )
+    assert columnar.values("name", columnar.by_type(Leaf)) == ["a", "b", "c", "d"]
+    assert columnar.values("value", columnar.by_type(Branch)) == [None, None]
+
+    assert [nodes[i].name for i in columnar.by_value("value", 1)] == ["a", "d"]
+    assert [nodes[i].name for i in columnar.by_value("value", 1, within=inner)] == ["d"]
+    assert len(columnar.by_value("value", 1.0)) == 0
+    assert len(columnar.by_value("name", "a", node_type=Branch)) == 0
+
+    # Symbol collection over the columnar representation
+    symbols = columnar.by_type(eve.concepts.node_types_with_field_type(eve.SymbolName))
+    assert columnar.values("name", symbols) == ["root", "a", "b", "inner", "c", "d"]
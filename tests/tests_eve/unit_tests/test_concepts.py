@@ -15,9 +15,15 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 
+import copy
+import pickle
+from typing import List
+
 import pydantic
 import pytest
 
+import eve
+
 from .. import common
 
 
@@ -51,6 +57,37 @@ class TestNode:
         with pytest.raises(pydantic.ValidationError, match="id_"):
             common.LocationNode(id_=32, loc=source_location)
 
+    def test_lazy_id(self, source_location):
+        node = common.LocationNode(loc=source_location)
+        assert isinstance(node.__dict__["id_"], eve.concepts._LazyNodeId)
+        assert node.__dict__["id_"].number is None
+
+        # Copies share the id allocated on first access of any of them
+        shallow_copy, deep_copy = node.copy(), copy.deepcopy(node)
+        children = dict(common.make_compound_node().iter_children())
+        compound = common.CompoundNode(**{**children, "location": node})
+        assert compound.location is not node
+        assert deep_copy.id_.startswith("LocationNode_")
+        assert node.id_ == shallow_copy.id_ == deep_copy.id_ == compound.location.id_
+        assert node == shallow_copy and node.dict() == compound.location.dict()
+        assert isinstance(node.__dict__["id_"], str)
+
+        unpickled = pickle.loads(pickle.dumps(common.LocationNode(loc=source_location)))
+        assert isinstance(unpickled.__dict__["id_"], str)
+
+    def test_compact_ids(self):
+        class CompactNode(eve.Node):
+            value: int
+
+            class Config(eve.Node.Config):
+                compact_ids = True
+
+        node = CompactNode(value=1)
+        assert node.id_.endswith(f"CompactNode_{node.__dict__['id_'].number}")
+        assert isinstance(node.__dict__["id_"], eve.concepts._LazyNodeId)
+        assert dict(node)["id_"] == node.dict()["id_"] == node.id_
+        assert f"id_='{node.id_}'" in repr(node)
+
     def test_impl_fields(self, sample_node):
         impl_names = set(name for name, _ in sample_node.iter_impl_fields())
 
@@ -99,3 +136,186 @@ class TestNode:
             and isinstance(metadata["definition"], pydantic.fields.ModelField)
             for metadata in sample_node.__node_children__.values()
         )
+
+        node_class = sample_node.__class__
+        assert node_class.__node_children_names__ == tuple(sample_node.__node_children__)
+        assert node_class.__node_children_getter__(sample_node) == tuple(
+            sample_node.iter_children_values()
+        )
+        assert node_class.__node_impl_fields_names__ == tuple(
+            name for name, _ in sample_node.iter_impl_fields()
+        )
+        assert node_class.__node_impl_fields_getter__(sample_node) == tuple(
+            value for _, value in sample_node.iter_impl_fields()
+        )
+
+    def test_construct_trusted(self, fixed_simple_node):
+        fields = dict(fixed_simple_node.iter_children())
+        node = common.SimpleNode.construct_trusted(**fields)
+        assert dict(node.iter_children()) == fields
+        assert node.id_ and node.id_ != fixed_simple_node.id_
+
+        # Validation is skipped...
+        invalid_fields = {**fields, "int_value": "not-an-int"}
+        assert common.SimpleNode.construct_trusted(**invalid_fields).int_value == "not-an-int"
+
+        # ...unless checked mode is enabled
+        with eve.concepts.checked_mode():
+            with pytest.raises(pydantic.ValidationError):
+                common.SimpleNode.construct_trusted(**invalid_fields)
+
+    def test_content_hash(self, sample_node):
+        node = sample_node
+        same_node = node.copy(update={"id_": "other_id"})
+        assert node.id_ != same_node.id_
+        assert node.content_hash() == same_node.content_hash()
+
+        copied_node = node.copy(update={"id_": same_node.id_})
+        assert copied_node.content_hash() == node.content_hash()
+        assert copied_node == same_node
+        assert node != same_node
+
+    def test_content_hash_changes(self, fixed_simple_node, fixed_frozen_simple_node):
+        for node in (fixed_simple_node, fixed_frozen_simple_node):
+            original_hash = node.content_hash()
+            for name, value in [("int_value", 0), ("str_value", "other"), ("bool_value", None)]:
+                modified = node.copy(update={name: value})
+                assert modified.content_hash() != original_hash
+                assert modified != node
+
+        fixed_simple_node.int_value += 1
+        assert fixed_simple_node.content_hash() != original_hash
+
+    def test_frozen_hash(self, frozen_simple_node_maker):
+        node = frozen_simple_node_maker(fixed=True)
+        other_node = frozen_simple_node_maker(fixed=True)
+        assert hash(node) == hash(other_node) == hash(node.content_hash())
+        assert node._content_hash_ == node.content_hash()
+        assert len({node, other_node}) == 2
+
+    def test_interning(self, frozen_simple_node_maker):
+        table = eve.concepts.NodeInternTable()
+        with eve.concepts.interning(table):
+            node = frozen_simple_node_maker(fixed=True)
+            assert frozen_simple_node_maker(fixed=True) is node
+            assert common.FrozenSimpleNode(**dict(node.iter_children())) is node
+            assert common.FrozenSimpleNode.construct_trusted(**dict(node.iter_children())) is node
+            assert frozen_simple_node_maker(fixed=True).copy(update={"int_value": 0}) is not node
+
+            # Mutable nodes and nodes with explicit ids are never interned
+            assert common.make_simple_node(fixed=True) is not common.make_simple_node(fixed=True)
+            custom_node = common.FrozenSimpleNode(id_="custom_id", **dict(node.iter_children()))
+            assert custom_node is not node and custom_node.id_ == "custom_id"
+
+        assert frozen_simple_node_maker(fixed=True) is not node
+        assert len(table) == 1 and table.hits == 4
+        assert copy.deepcopy(node) is node
+
+    def test_interning_docstring_examples(self):
+        import doctest
+
+        results = doctest.testmod(eve.concepts)
+        assert results.attempted > 0 and results.failed == 0
+
+
+def test_clone_tree(fixed_simple_node, frozen_simple_node_maker):
+    frozen_node = frozen_simple_node_maker(fixed=True)
+    collections_node = common.make_simple_node_with_collections()
+    tree = [fixed_simple_node, fixed_simple_node, frozen_node, {"nodes": [collections_node]}]
+    clone = eve.clone_tree(tree)
+    assert clone == tree and clone is not tree
+
+    # Mutable nodes and containers are copied (only once) and leaves are shared
+    assert clone[0] is clone[1] and clone[0] is not fixed_simple_node
+    assert clone[0].id_ == fixed_simple_node.id_
+    assert clone[0].str_value is fixed_simple_node.str_value
+    assert clone[2] is frozen_node
+    cloned_node = clone[3]["nodes"][0]
+    assert cloned_node is not collections_node
+    assert cloned_node.int_list is not collections_node.int_list
+    assert cloned_node.loc is collections_node.loc
+
+    # Node.copy(deep=True) uses the same cloning
+    compound = common.make_compound_node()
+    deep_copy = compound.copy(deep=True)
+    assert deep_copy == compound and deep_copy.simple is not compound.simple
+    assert deep_copy.simple.int_kind is compound.simple.int_kind
+
+
+def test_node_types_analysis():
+    assert eve.concepts.field_node_types(common.CompoundNode, "simple") == {common.SimpleNode}
+    assert eve.concepts.field_node_types(common.SimpleNode, "int_value") == set()
+    assert eve.concepts.reachable_node_types(common.LocationNode) == set()
+    assert eve.concepts.reachable_node_types(common.CompoundNode) == {
+        common.LocationNode,
+        common.SimpleNode,
+        common.SimpleNodeWithLoc,
+        common.SimpleNodeWithOptionals,
+    }
+    assert eve.concepts.children_fields_reaching(common.CompoundNode, (common.SimpleNode,)) == (
+        "simple",
+    )
+    assert eve.concepts.children_fields_reaching(common.CompoundNode, (int,)) == tuple(
+        common.CompoundNode.__node_children__
+    )
+
+    # Node classes defined later are also taken into account
+    class CompoundSubclassNode(common.SimpleNode):
+        pass
+
+    assert CompoundSubclassNode in eve.concepts.field_node_types(common.CompoundNode, "simple")
+
+    assert eve.concepts.reachable_node_types(common.CompactCompoundNode) == {
+        common.CompactSimpleNode,
+        common.LocationNode,
+    }
+
+
+class TestCompactNode:
+    def test_slots(self, compact_compound_node):
+        assert isinstance(compact_compound_node, eve.Node)
+        assert not hasattr(compact_compound_node, "__dict__")
+        assert common.CompactCompoundNode.__slots__ == ("simple", "simple_list", "location")
+        assert compact_compound_node.simple.id_.startswith("CompactSimpleNode_")
+
+    def test_checkpoint_validation(self, compact_simple_node):
+        node = common.CompactCompoundNode(simple=compact_simple_node, simple_list=[1])
+        assert node.simple is compact_simple_node and node.location is None
+        compact_simple_node.validate_node()
+        with pytest.raises(pydantic.ValidationError, match="simple_list"):
+            node.validate_node()
+
+        compact_simple_node.int_value = "not-an-int"
+        node.simple_list = []
+        node.validate_node()
+        with pytest.raises(pydantic.ValidationError, match="int_value"):
+            eve.concepts.validate_tree(node)
+
+        with eve.concepts.checked_mode():
+            with pytest.raises(pydantic.ValidationError, match="int_value"):
+                common.make_compact_simple_node().copy(update={"int_value": 1.5})
+
+    def test_missing_and_unknown_fields(self, compact_simple_node):
+        with pytest.raises(TypeError, match="simple_list"):
+            common.CompactCompoundNode(simple=compact_simple_node)
+        with pytest.raises(TypeError, match="other"):
+            common.CompactCompoundNode(simple=compact_simple_node, simple_list=[], other=1)
+
+    def test_copies(self, compact_compound_node):
+        node = compact_compound_node
+        for other in (node.copy(), copy.deepcopy(node), pickle.loads(pickle.dumps(node))):
+            assert other == node and other is not node
+            assert other.id_ == node.id_
+            assert other.content_hash() == node.content_hash()
+
+        assert node.copy(deep=True).simple is not node.simple
+        assert node.copy(update={"location": None}) != node
+
+    def test_forward_refs(self):
+        class Expr(eve.concepts.CompactNode):
+            args: List["Expr"]
+
+        Expr.update_forward_refs()
+        Expr(args=[Expr(args=[])]).validate_node()
+        with pytest.raises(pydantic.ValidationError):
+            Expr(args=[common.make_compact_simple_node()]).validate_node()
@@ -17,7 +17,8 @@
 
 from __future__ import annotations
 
-from typing import List, Union
+import sys
+from typing import Any, List, Union
 
 import pytest
 
@@ -28,6 +29,16 @@ class Tree(eve.Node):
     children: List[Union["Tree", int]]
 
 
+class LeafNode(eve.Node):
+    value: int
+
+
+class Branch(eve.Node):
+    leaves: List[LeafNode]
+    trees: List[Tree]
+    other: Any
+
+
 def _make_tree(values_list):
     children = [_make_tree(item) if isinstance(item, list) else item for item in values_list]
     return Tree(children=children)
@@ -108,3 +119,51 @@ def test_traverse_tree(tree):
         traversals.append([value for value in eve.traverse_tree(tree, order)])
 
     assert all(len(traversals[0]) == len(t) for t in traversals)
+
+
+def test_traverse_with_keys(dfs_ordered_tree):
+    for order in eve.iterators.TraversalOrder:
+        items = list(eve.traverse_tree(dfs_ordered_tree, order, with_keys=True))
+        assert (None, dfs_ordered_tree) in items
+        assert [value for _, value in items] == list(eve.traverse_tree(dfs_ordered_tree, order))
+
+    pre_items = list(eve.iterators.traverse_pre(dfs_ordered_tree, with_keys=True))
+    assert pre_items[0] == (None, dfs_ordered_tree)
+    assert pre_items[1] == ("children", dfs_ordered_tree.children)
+    assert pre_items[2] == (0, dfs_ordered_tree.children[0])
+
+
+def test_traverse_deep_tree():
+    depth = 3 * sys.getrecursionlimit()
+    tree = Tree(children=[0])
+    for i in range(1, depth):
+        tree = Tree(children=[tree, i])
+
+    for order in eve.iterators.TraversalOrder:
+        values = [value for value in eve.traverse_tree(tree, order) if isinstance(value, int)]
+        assert sorted(values) == list(range(depth))
+
+
+def test_traverse_only_types(dfs_ordered_tree):
+    tree = Branch(
+        leaves=[LeafNode(value=1)],
+        trees=[dfs_ordered_tree],
+        other=[Tree(children=[2]), LeafNode(value=3)],
+    )
+    for order in eve.iterators.TraversalOrder:
+        for only_types in [Tree, LeafNode, (Tree, LeafNode), int]:
+            expected = [
+                (key, value)
+                for key, value in eve.traverse_tree(tree, order, with_keys=True)
+                if isinstance(value, only_types)
+            ]
+            assert (
+                list(eve.traverse_tree(tree, order, with_keys=True, only_types=only_types))
+                == expected
+            )
+            assert list(eve.traverse_tree(tree, order, only_types=only_types)) == [
+                value for _, value in expected
+            ]
+
+    assert eve.concepts.children_fields_reaching(Branch, (LeafNode,)) == ("leaves", "other")
+    assert eve.concepts.children_fields_reaching(Tree, (LeafNode,)) == ()
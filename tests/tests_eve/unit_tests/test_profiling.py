@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+
+import io
+
+import eve
+from eve import profiling
+from eve.codegen import FormatTemplate, TemplatedGenerator
+
+from .. import common
+
+
+class _Translator(eve.NodeTranslator):
+    def visit_SimpleNode(self, node, **kwargs):
+        return self.generic_visit(node, **kwargs)
+
+
+class _Collector(eve.NodeVisitor):
+    def visit_SimpleNode(self, node, **kwargs):
+        pass
+
+
+class _Generator(TemplatedGenerator):
+    SimpleNode = FormatTemplate("{int_value}")
+
+
+def test_visitor_profiling(fixed_compound_node):
+    with profiling.profiling() as profiler:
+        _Translator().visit(fixed_compound_node)
+    stats = profiler.stats
+
+    simple_key = ("_Translator", "visit_SimpleNode", "SimpleNode")
+    compound_key = ("_Translator", "generic_visit", "CompoundNode")
+    assert stats[simple_key].calls == 1
+    assert stats[compound_key].calls == 1
+    assert stats[("_Translator", "generic_visit", "int")].calls > 1
+    assert stats[compound_key].total_created_nodes == sum(
+        isinstance(node, eve.Node) for node in eve.traverse_tree(fixed_compound_node)
+    )
+    assert stats[compound_key].self_created_nodes == 1
+    assert stats[simple_key].total_created_nodes == stats[simple_key].self_created_nodes == 1
+    assert stats[compound_key].total_time >= stats[simple_key].total_time
+    assert 0 <= stats[compound_key].self_time <= stats[compound_key].total_time
+
+    report = profiler.report(limit=2)
+    assert len(report.splitlines()) == 3
+
+    output = io.StringIO()
+    profiler.export_collapsed_stacks(output)
+    for line in output.getvalue().splitlines():
+        stack, microseconds = line.rsplit(" ", 1)
+        assert stack.startswith("_Translator.generic_visit(CompoundNode)")
+        assert int(microseconds) > 0
+
+    # Instrumentation is removed when profiling is disabled
+    _Translator().visit(fixed_compound_node)
+    assert _Translator._dispatch_cache_[common.SimpleNode] is _Translator.visit_SimpleNode
+    assert sum(stats.calls for stats in profiler.stats.values()) == sum(
+        1 for _ in eve.traverse_tree(fixed_compound_node)
+    )
+
+
+def test_fused_visitor_profiling(fixed_compound_node):
+    with profiling.profiling() as profiler:
+        eve.FusedVisitor(_Collector(), _Collector()).visit(fixed_compound_node)
+    assert profiler.stats[("_Collector", "visit_SimpleNode", "SimpleNode")].calls == 2
+
+
+def test_template_profiling(fixed_compound_node):
+    with profiling.profiling() as profiler:
+        assert _Generator.apply(fixed_compound_node.simple) == str(
+            fixed_compound_node.simple.int_value
+        )
+
+    assert profiler.stats[("_Generator", "template:SimpleNode", "SimpleNode")].calls == 1
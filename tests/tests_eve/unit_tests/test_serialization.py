@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+
+import io
+from typing import List
+
+import pytest
+
+import eve
+from eve import serialization
+
+from .. import common
+
+
+class _Symbol(eve.Node):
+    name: eve.SymbolName
+    value: int
+
+
+class _Scope(eve.Node, eve.SymbolTableTrait):
+    symbols: List[_Symbol]
+
+
+def test_round_trip(sample_node):
+    data = serialization.dumps(sample_node)
+    assert data.startswith(b"EVEB")
+    loaded = serialization.loads(data)
+    assert loaded == sample_node
+    assert loaded.id_ == sample_node.id_
+
+    buffer = io.BytesIO()
+    serialization.dump([sample_node, {"key": (1.5, b"bytes")}], buffer)
+    buffer.seek(0)
+    assert serialization.load(buffer) == [sample_node, {"key": (1.5, b"bytes")}]
+
+
+def test_ids_and_interning(fixed_simple_node):
+    nodes = [common.make_simple_node(fixed=True) for _ in range(10)]
+    data = serialization.dumps(nodes)
+    reader = serialization.NodeReader(data)
+    assert reader.strings.count(fixed_simple_node.str_value) == 1
+    assert len(reader.enums) == 2  # IntKind and StrKind members
+    assert [node.id_ for node in serialization.loads(data)] == [node.id_ for node in nodes]
+
+    without_ids = serialization.loads(serialization.dumps(nodes, with_ids=False))
+    assert len(serialization.dumps(nodes, with_ids=False)) < len(data)
+    assert all(node.id_ != loaded.id_ for node, loaded in zip(nodes, without_ids))
+    assert all(
+        dict(node.iter_children()) == dict(loaded.iter_children())
+        for node, loaded in zip(nodes, without_ids)
+    )
+
+    custom = common.LocationNode(id_="custom_id_0x", loc=common.make_source_location())
+    assert serialization.loads(serialization.dumps(custom)).id_ == "custom_id_0x"
+
+    new_node = common.make_simple_node()
+    lazy = serialization.loads(serialization.dumps([custom, new_node], lazy_ids=True))
+    assert lazy[0].id_ == "custom_id_0x"
+    lazy_id = lazy[1]._raw_impl_fields()["id_"]
+    assert isinstance(lazy_id, eve.concepts._LazyNodeId) and lazy_id.number is None
+    assert lazy[1].id_ != new_node.id_
+
+
+def test_shared_nodes(fixed_simple_node):
+    # Nodes are encoded by value: shared nodes are decoded as separate copies
+    data = serialization.dumps([fixed_simple_node, fixed_simple_node])
+    assert len(data) > len(serialization.dumps([fixed_simple_node]))
+    first, second = serialization.loads(data)
+    assert first == second == fixed_simple_node
+    assert first is not second
+
+
+def test_derived_fields():
+    scope = _Scope(symbols=[_Symbol(name="a", value=1), _Symbol(name="b", value=2)])
+    data = serialization.dumps(scope)
+    # The symbol table is computed again instead of encoding the symbols twice
+    assert len(data) < len(serialization.dumps([scope.symbols, scope.symbols]))
+    loaded = serialization.loads(data)
+    assert loaded == scope
+    assert loaded.symtable_["a"] is loaded.symbols[0]
+    assert loaded.symtable_["b"] is loaded.symbols[1]
+    assert serialization.NodeReader(data).root().load().symtable_["a"].value == 1
+
+
+def test_invalid_data(fixed_simple_node):
+    data = serialization.dumps(fixed_simple_node)
+    for version in (serialization.FORMAT_VERSION - 1, serialization.FORMAT_VERSION + 1):
+        with pytest.raises(eve.exceptions.EveValueError, match="version"):
+            serialization.loads(data[:4] + bytes([version]) + data[5:])
+    with pytest.raises(eve.exceptions.EveValueError):
+        serialization.loads(b"XXXX" + data[4:])
+    invalid_tag = bytearray(data)
+    invalid_tag[serialization.NodeReader(data)._root_pos] = 0xFF
+    with pytest.raises(eve.exceptions.EveValueError, match="tag 255"):
+        serialization.loads(invalid_tag)
+
+    class LocalNode(eve.Node):
+        value: int
+
+    with pytest.raises(eve.exceptions.EveValueError, match="LocalNode"):
+        serialization.dumps(LocalNode(value=1))
+
+
+def test_lazy_reader():
+    node = common.make_compact_compound_node()
+    reader = serialization.NodeReader(serialization.dumps(node))
+    root = reader.root()
+    assert root.node_class is common.CompactCompoundNode
+    assert isinstance(root.simple, serialization.LazyNode)
+    assert root.simple.int_value == node.simple.int_value
+    assert root.simple_list[1].load() == node.simple_list[1]
+    assert [name for name, _ in root.iter_children()] == ["simple", "simple_list", "location"]
+    assert root.load() == node
+    with pytest.raises(AttributeError, match="other"):
+        root.other
+
+
+def test_iter_nodes():
+    node = common.make_compound_node()
+    reader = serialization.NodeReader(serialization.dumps([node, node.simple]))
+    expected = [
+        item for item in eve.traverse_tree([node, node.simple]) if isinstance(item, eve.Node)
+    ]
+    assert [item.load() for item in reader.iter_nodes()] == expected
+
+    simple_nodes = [item.load() for item in reader.iter_nodes(only_types=common.SimpleNode)]
+    assert simple_nodes == [node.simple, node.simple]
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+import pytest
+
+import eve
+
+
+class Leaf(eve.Node):
+    name: str
+    value: int
+
+
+class Branch(eve.Node):
+    name: str
+    leaves: List[Leaf]
+    branches: List[Branch]
+    extra: Optional[Leaf]
+
+
+Branch.update_forward_refs()
+
+
+@pytest.fixture
+def tree():
+    yield Branch(
+        name="root",
+        leaves=[Leaf(name="a", value=1), Leaf(name="b", value=2)],
+        branches=[
+            Branch(
+                name="inner",
+                leaves=[Leaf(name="c", value=3)],
+                branches=[],
+                extra=Leaf(name="d", value=4),
+            )
+        ],
+        extra=None,
+    )
+
+
+def _pre_order(tree, node_type):
+    return [node for node in eve.traverse_tree(tree) if isinstance(node, node_type)]
+
+
+class TestTreeIndex:
+    def test_queries(self, tree):
+        index = eve.TreeIndex(tree)
+        assert len(index) == len(_pre_order(tree, eve.Node))
+        assert index.nodes() == _pre_order(tree, eve.Node)
+        assert index.by_type(Leaf) == _pre_order(tree, Leaf)
+        assert index.by_type(Branch) == [tree, tree.branches[0]]
+        assert index.by_type(Leaf, within=tree.branches[0]) == _pre_order(tree.branches[0], Leaf)
+
+        for node in index.nodes():
+            assert index.by_id(node.id_) is node
+        assert index.by_name("c") == [tree.branches[0].leaves[0]]
+        assert index.by_name("c", Branch) == []
+        assert index.by_name("missing") == []
+
+    def test_parents(self, tree):
+        index = eve.TreeIndex(tree)
+        leaf = tree.branches[0].leaves[0]
+        assert index.parent(tree) is None
+        assert index.parent(leaf) is tree.branches[0].leaves
+        assert index.key(leaf) == 0
+        assert index.path(leaf) == ("branches", 0, "leaves", 0)
+        assert list(index.ancestors(leaf)) == [
+            tree.branches[0].leaves,
+            tree.branches[0],
+            tree.branches,
+            tree,
+        ]
+
+    def test_find_nodes(self, tree):
+        index = eve.TreeIndex(tree)
+        inner = tree.branches[0]
+        assert eve.FindNodes.by_type(Leaf, inner, index=index) == eve.FindNodes.by_type(Leaf, inner)
+        with pytest.raises(TypeError, match="by_type"):
+            eve.FindNodes.by_predicate(lambda node: True, tree, index=index)
+
+    def test_mutator_updates(self, tree):
+        class Mutator(eve.NodeMutator):
+            def visit_Leaf(self, node: Leaf, **kwargs):
+                if node.name == "a":
+                    return eve.NOTHING
+                if node.name == "d":
+                    return Branch(name="new", leaves=[Leaf(name="e", value=5)], branches=[])
+                return node
+
+        index = eve.TreeIndex(tree)
+        removed = tree.leaves[0]
+        mutator = Mutator()
+        mutator.tree_index = index
+        mutator.visit(tree)
+
+        assert removed not in index
+        assert index.by_name("a") == []
+        assert index.by_name("d") == []
+        assert [node.name for node in index.by_type(Branch)] == ["root", "inner", "new"]
+        assert index.by_type(Leaf) == _pre_order(tree, Leaf)
+        assert index.nodes() == _pre_order(tree, eve.Node)
+        assert index.key(tree.leaves[0]) == 0
+        assert index.path(index.by_name("e")[0]) == ("branches", 0, "extra", "leaves", 0)
+
+
+class TestDiffPatch:
+    def test_unchanged(self, tree):
+        assert eve.diff_trees(tree, tree) == []
+        assert eve.diff_trees(tree, tree.copy(deep=True)) == []
+        assert eve.patch_tree(tree, []) is tree
+
+    def test_edits(self, tree):
+        new = tree.copy(deep=True)
+        new.branches[0].leaves[0].value = 30
+        new.leaves.insert(1, Leaf(name="new", value=0))
+        new.extra = Leaf(name="e", value=5)
+        new.name = "new_root"
+
+        edits = eve.diff_trees(tree, new)
+        assert [(edit.kind, edit.path) for edit in edits] == [
+            ("replace", ("name",)),
+            ("insert", ("leaves", 1)),
+            ("replace", ("branches", 0, "leaves", 0, "value")),
+            ("replace", ("extra",)),
+        ]
+
+        patched = eve.patch_tree(tree, edits)
+        assert patched.content_hash() == new.content_hash()
+        assert patched.id_ == tree.id_ and tree.branches[0].leaves[0].value == 3
+
+        # Unchanged subtrees are shared with the original tree
+        assert patched.leaves[0] is tree.leaves[0] and patched.leaves[2] is tree.leaves[1]
+        assert patched.branches[0].extra is tree.branches[0].extra
+
+    def test_sequences(self, tree):
+        new = tree.copy(deep=True)
+        del new.leaves[0]
+        new.branches.append(Branch(name="other", leaves=[], branches=[], extra=None))
+        new.branches[0].leaves = [Leaf(name="x", value=1), Leaf(name="y", value=2)]
+
+        edits = eve.diff_trees(tree, new)
+        assert {edit.kind for edit in edits} == {"insert", "delete", "replace"}
+        patched = eve.patch_tree(tree, edits)
+        assert patched.content_hash() == new.content_hash()
+        assert patched.leaves[0] is tree.leaves[1]
+
+    def test_collections(self):
+        old = {"a": [1, 2, 3], "b": (Leaf(name="l", value=1),), "c": None}
+        new = {"a": [1, 3, 4], "b": (Leaf(name="l", value=2),), "d": "d"}
+        patched = eve.patch_tree(old, eve.diff_trees(old, new))
+        assert patched.keys() == new.keys()
+        assert patched["a"] == new["a"] and isinstance(patched["b"], tuple)
+        assert patched["b"][0].value == 2 and patched["d"] == "d"
+
+        assert eve.diff_trees(1, True) == [eve.tree_utils.TreeEdit("replace", (), True)]
+        assert eve.patch_tree(1, eve.diff_trees(1, True)) is True
@@ -186,6 +186,63 @@ def test_shash(unique_data_items, hash_algorithm):
     assert len(hashes) == len(unique_data_items)
 
 
+def test_structural_hash(unique_data_items, hash_algorithm):
+    from eve.utils import structural_hash
+
+    # Test hash consistency
+    for item in unique_data_items:
+        if hasattr(hash_algorithm, "copy"):
+            h1 = hash_algorithm.copy()
+            h2 = hash_algorithm.copy()
+        else:
+            h1 = hash_algorithm
+            h2 = hash_algorithm
+        assert structural_hash(item, hash_algorithm=h1) == structural_hash(
+            copy.deepcopy(item), hash_algorithm=h2
+        )
+
+    # Test hash specificity
+    hashes = set(structural_hash(item, hash_algorithm=hash_algorithm) for item in unique_data_items)
+    assert len(hashes) == len(unique_data_items)
+
+
+def test_structural_hash_of_nodes():
+    from eve.utils import structural_hash
+
+    from .. import common
+
+    # Node ids and implementation fields are ignored by default
+    for factory in (
+        common.make_simple_node,
+        common.make_location_node,
+        common.make_compact_compound_node,
+        common.make_frozen_simple_node,
+    ):
+        a, b = factory(fixed=True), factory(fixed=True)
+        assert a.id_ != b.id_
+        assert structural_hash(a) == structural_hash(b)
+        assert structural_hash(a, exclude=(), exclude_impl_fields=False) != structural_hash(
+            b, exclude=(), exclude_impl_fields=False
+        )
+    assert structural_hash(common.make_simple_node(fixed=True)) != structural_hash(
+        common.make_compact_simple_node(fixed=True)
+    )
+
+    node = common.make_simple_node_with_impl_members(fixed=True)
+    other = node.copy(update={"value_impl_": node.value_impl_ + 1})
+    assert structural_hash(node) == structural_hash(other)
+    assert structural_hash(node, exclude_impl_fields=False) != structural_hash(
+        other, exclude_impl_fields=False
+    )
+    assert structural_hash(node, exclude=("id_", "int_value")) == structural_hash(
+        node.copy(update={"int_value": node.int_value + 1}), exclude=("id_", "int_value")
+    )
+
+    # Unordered collections
+    assert structural_hash({"a": 1, "b": node}) == structural_hash({"b": other, "a": 1})
+    assert structural_hash({"a", "b", "c"}) == structural_hash({"c", "b", "a"})
+
+
 # -- CaseStyleConverter --
 @pytest.fixture
 def name_with_cases():
@@ -274,6 +331,19 @@ class TestXStringFormatter:
 
         assert fmt.format(fstr_cases[0], **fstr_cases[1]) == fstr_cases[2]
 
+    def test_compile_format(self, fstr_cases, data_collection):
+        fmt = eve.utils.XStringFormatter()
+
+        assert fmt.compile_format(fstr_cases[0])(fstr_cases[1]) == fstr_cases[2]
+        assert fmt.compile_format("aA")({}) == "aA"
+        assert fmt.compile_format("{{a}} {a!r:>6}{b:.2f}")(dict(a="x", b=1.0)) == "{a}    'x'1.00"
+        assert fmt.compile_format("a{x:*^{width}.{precision}}A")(
+            dict(x=0.12345, width=6, precision=3)
+        ) == fmt.format("a{x:*^{width}.{precision}}A", x=0.12345, width=6, precision=3)
+        assert fmt.compile_format("{data}")(dict(data=data_collection)) == fmt.format(
+            "{data}", data=data_collection
+        )
+
 
 # -- TestUIDGenerator --
 class TestUIDGenerator:
@@ -311,3 +381,26 @@ class TestUIDGenerator:
         assert int(UIDGenerator.sequential_id()) == counter + 1
         with pytest.warns(RuntimeWarning, match="Unsafe reset"):
             UIDGenerator.reset_sequence(counter)
+
+    def test_sequence_scope(self):
+        import threading
+
+        from eve.utils import UIDGenerator
+
+        global_id = int(UIDGenerator.sequential_id())
+        with UIDGenerator.sequence_scope():
+            assert UIDGenerator.sequential_id(prefix="a") == "a_1"
+            with UIDGenerator.sequence_scope(start=10):
+                assert UIDGenerator.sequential_number() == 10
+            assert UIDGenerator.sequential_id(prefix="a") == "a_2"
+
+            # Other threads keep using the global counter
+            thread_ids = []
+            thread = threading.Thread(
+                target=lambda: thread_ids.append(UIDGenerator.sequential_number())
+            )
+            thread.start()
+            thread.join()
+            assert thread_ids[0] > global_id
+
+        assert UIDGenerator.sequential_number() > thread_ids[0]
@@ -0,0 +1,495 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import concurrent.futures
+from typing import List
+
+import pydantic
+import pytest
+
+import eve
+
+from .. import common
+
+
+class _RecordingVisitor(eve.NodeVisitor):
+    def __init__(self):
+        self.visited = []
+
+    def visit_Node(self, node, **kwargs):
+        self.visited.append(("Node", type(node).__name__))
+        self.generic_visit(node, **kwargs)
+
+
+class TestNodeVisitor:
+    def test_dispatch_by_mro(self, fixed_compound_node):
+        visitor = _RecordingVisitor()
+        visitor.visit(fixed_compound_node)
+
+        assert visitor.visited[0] == ("Node", "CompoundNode")
+        assert ("Node", "SimpleNode") in visitor.visited
+        assert (
+            _RecordingVisitor._dispatch_cache_[common.CompoundNode] is _RecordingVisitor.visit_Node
+        )
+
+    def test_dispatch_cache(self, fixed_compound_node):
+        class Visitor(_RecordingVisitor):
+            pass
+
+        class OverridingVisitor(Visitor):
+            def visit_SimpleNode(self, node, **kwargs):
+                self.visited.append(("SimpleNode", type(node).__name__))
+
+        # Filled on first visit
+        assert common.SimpleNode not in Visitor._dispatch_cache_
+        Visitor().visit(fixed_compound_node)
+        assert Visitor._dispatch_cache_[common.SimpleNode] is _RecordingVisitor.visit_Node
+
+        # Subclasses get their own entries
+        OverridingVisitor().visit(fixed_compound_node)
+        assert (
+            OverridingVisitor._dispatch_cache_[common.SimpleNode]
+            is OverridingVisitor.visit_SimpleNode
+        )
+        assert Visitor._dispatch_cache_[common.SimpleNode] is _RecordingVisitor.visit_Node
+
+        # Cached entries are used in later visits
+        def cached_visitor(self, node, **kwargs):
+            self.visited.append(("cached", type(node).__name__))
+
+        Visitor._dispatch_cache_[common.SimpleNode] = cached_visitor
+        visitor = Visitor()
+        visitor.visit(fixed_compound_node)
+        assert ("cached", "SimpleNode") in visitor.visited
+        assert ("Node", "SimpleNode") not in visitor.visited
+
+    def test_dispatch_cache_invalidation(self, fixed_compound_node):
+        class Visitor(_RecordingVisitor):
+            pass
+
+        class SubVisitor(Visitor):
+            pass
+
+        SubVisitor().visit(fixed_compound_node)
+        assert common.SimpleNode in SubVisitor._dispatch_cache_
+
+        def visit_SimpleNode(self, node, **kwargs):
+            self.visited.append(("SimpleNode", type(node).__name__))
+
+        Visitor.visit_SimpleNode = visit_SimpleNode
+        assert common.SimpleNode not in SubVisitor._dispatch_cache_
+
+        visitor = SubVisitor()
+        visitor.visit(fixed_compound_node)
+        assert ("SimpleNode", "SimpleNode") in visitor.visited
+        assert ("Node", "SimpleNode") not in visitor.visited
+
+        del Visitor.visit_SimpleNode
+        visitor = SubVisitor()
+        visitor.visit(fixed_compound_node)
+        assert ("Node", "SimpleNode") in visitor.visited
+
+    def test_instance_visitor_methods(self, fixed_compound_node):
+        _RecordingVisitor().visit(fixed_compound_node)
+        assert common.SimpleNode in _RecordingVisitor._dispatch_cache_
+
+        visitor = _RecordingVisitor()
+        visitor.visit_SimpleNode = lambda node, **kwargs: visitor.visited.append(("instance", None))
+        visitor.visit(fixed_compound_node)
+
+        assert ("instance", None) in visitor.visited
+        assert eve.NodeVisitor.__setattr__ is object.__setattr__
+        assert common.SimpleNode not in _RecordingVisitor._dispatch_cache_ or (
+            _RecordingVisitor._dispatch_cache_[common.SimpleNode] is _RecordingVisitor.visit_Node
+        )
+
+    def test_static_and_class_visitor_methods(self, fixed_compound_node):
+        visited = []
+
+        class Visitor(eve.NodeVisitor):
+            @staticmethod
+            def visit_SimpleNode(node, **kwargs):
+                visited.append(("static", type(node).__name__, kwargs))
+
+            @classmethod
+            def visit_LocationNode(cls, node, **kwargs):
+                visited.append((cls.__name__, type(node).__name__, kwargs))
+
+        for _ in range(2):
+            visited.clear()
+            Visitor().visit(fixed_compound_node, scale=2)
+            assert ("static", "SimpleNode", {"scale": 2}) in visited
+            assert ("Visitor", "LocationNode", {"scale": 2}) in visited
+
+    def test_memoization(self, fixed_simple_node, frozen_simple_node_maker):
+        shared = common.LocationNode(loc=common.make_source_location(fixed=True))
+
+        class Visitor(eve.NodeVisitor):
+            memoization = eve.visitors.MemoizationMode.IDENTITY
+
+            def __init__(self):
+                self.visited = []
+
+            def visit_LocationNode(self, node, **kwargs):
+                self.visited.append(node)
+                return (node.loc.line, kwargs.get("scale", 1))
+
+            def visit_list(self, node, **kwargs):
+                return [self.visit(item, **kwargs) for item in node]
+
+        visitor = Visitor()
+        other = shared.copy()
+        assert visitor.visit([shared, shared, other]) == [(shared.loc.line, 1)] * 3
+        assert visitor.visited == [shared, other]
+        assert visitor.visit(shared, scale=2) == (shared.loc.line, 2)
+        assert visitor.visit(shared, scale=[2]) == visitor.visit(shared, scale=[2])
+        assert len(visitor.visited) == 5
+        assert (visitor.memoization_stats.hits, visitor.memoization_stats.misses) == (1, 5)
+
+        class ContentVisitor(Visitor):
+            memoization = eve.visitors.MemoizationMode.CONTENT
+
+        content_visitor = ContentVisitor()
+        content_visitor.visit([shared, other, frozen_simple_node_maker(fixed=True)])
+        assert content_visitor.visited == [shared]
+        assert content_visitor.memoization_stats.hit_ratio == 1 / 3
+        content_visitor.clear_memoization_cache()
+        assert content_visitor.memoization_stats.hits == 0
+
+
+class _IntCollector(eve.NodeVisitor):
+    def __init__(self):
+        self.values = []
+
+    def visit_int(self, node, **kwargs):
+        self.values.append((node, kwargs.get("scope", None)))
+
+
+class _ScopedCollector(_IntCollector):
+    def visit_SimpleNode(self, node, **kwargs):
+        self.values.append(("simple", kwargs.get("scope", None)))
+        self.generic_visit(node, scope=node.str_value)
+
+    def visit_LocationNode(self, node, **kwargs):
+        return "location"
+
+
+class _ContextScopedCollector(_IntCollector):
+    scoped_context = True
+
+    def visit_int(self, node, **kwargs):
+        assert not kwargs
+        self.values.append((node, self.context.get("scope")))
+
+    def visit_SimpleNode(self, node, **kwargs):
+        self.values.append(("simple", self.context.get("scope")))
+        with self.context.scope(scope=node.str_value):
+            self.generic_visit(node)
+
+    def visit_LocationNode(self, node, **kwargs):
+        return "location"
+
+
+def test_visitor_context():
+    context = eve.VisitorContext(a=1)
+    context.push({"a": 2, "b": 3})
+    assert (context.a, context["b"], context.depth) == (2, 3, 2)
+    with context.scope(b=4, c=5) as inner:
+        assert inner is context
+        assert (context.a, context.b, context.get("c")) == (2, 4, 5)
+    assert "c" not in context and context.get("c", 0) == 0
+    context.pop()
+    assert (context.a, context.depth) == (1, 1)
+    assert "b" not in context
+    with pytest.raises(AttributeError, match="b"):
+        context.b
+    with pytest.raises(KeyError):
+        context["b"]
+
+
+def test_scoped_context_visitor(fixed_compound_node):
+    kwargs_visitor = _ScopedCollector()
+    kwargs_visitor.visit(fixed_compound_node, scope="root")
+    context_visitor = _ContextScopedCollector()
+    context_visitor.visit(fixed_compound_node, scope="root")
+
+    assert context_visitor.values == kwargs_visitor.values
+    assert ("simple", "root") in context_visitor.values
+    assert context_visitor.context.depth == 0
+    assert eve.FusedVisitor(_ContextScopedCollector(), _IntCollector()).visit(
+        fixed_compound_node.location
+    ) == ["location", None]
+
+
+def test_compiled_visitor(fixed_compound_node):
+    class CompiledScopedCollector(eve.CompiledNodeVisitor, _ScopedCollector):
+        pass
+
+    class CompiledRecordingVisitor(eve.CompiledNodeVisitor, _RecordingVisitor):
+        pass
+
+    tree = [fixed_compound_node, {"a": (1, 2), "b": {3}}, "str", None]
+    for visitor_class, compiled_visitor_class, attr in [
+        (_ScopedCollector, CompiledScopedCollector, "values"),
+        (_RecordingVisitor, CompiledRecordingVisitor, "visited"),
+    ]:
+        visitor = visitor_class()
+        visitor.visit(tree, scope="root")
+        compiled_visitor = compiled_visitor_class()
+        compiled_visitor.visit(tree, scope="root")
+        assert getattr(compiled_visitor, attr) == getattr(visitor, attr)
+
+    assert CompiledScopedCollector._dispatch_cache_[common.CompoundNode].__name__ == (
+        "visit_CompoundNode_children"
+    )
+    assert (
+        CompiledScopedCollector._dispatch_cache_[common.SimpleNode]
+        is CompiledScopedCollector.visit_SimpleNode
+    )
+
+
+class _CountingFindNodes(eve.FindNodes):
+    pass
+
+
+def test_fused_visitor(fixed_compound_node):
+    def make_visitors():
+        return [_IntCollector(), _ScopedCollector(), _RecordingVisitor(), _CountingFindNodes()]
+
+    separate = make_visitors()
+    separate_results = [
+        visitor.visit(fixed_compound_node, scope="root", predicate=lambda n: isinstance(n, int))
+        for visitor in separate
+    ]
+    fused = make_visitors()
+    fused_results = eve.FusedVisitor(*fused).visit(
+        fixed_compound_node, scope="root", predicate=lambda n: isinstance(n, int)
+    )
+
+    assert fused_results == separate_results
+    assert fused[0].values == separate[0].values and len(fused[0].values) > 2
+    assert fused[1].values == separate[1].values
+    assert ("simple", "root") in fused[1].values
+    assert fused[2].visited == separate[2].visited
+
+    location_node = fixed_compound_node.location
+    assert eve.FusedVisitor(_ScopedCollector(), _IntCollector()).visit(location_node) == [
+        "location",
+        None,
+    ]
+
+    class MemoizedCollector(_IntCollector):
+        memoization = eve.visitors.MemoizationMode.IDENTITY
+
+        def visit_LocationNode(self, node, **kwargs):
+            self.values.append(node)
+
+    memoized = MemoizedCollector()
+    eve.FusedVisitor(memoized, _IntCollector()).visit([location_node, location_node])
+    assert memoized.values == [location_node]
+    assert memoized.memoization_stats.hits == 1
+
+
+class _IndependentItemsNode(eve.Node):
+    items: List[common.SimpleNodeWithLoc] = eve.field(independent=True)
+    location: common.LocationNode
+
+
+class _ScaleTranslator(eve.NodeTranslator):
+    copy_on_write = True
+
+    def __init__(self, suffix):
+        self.suffix = suffix
+
+    def visit_SimpleNodeWithLoc(self, node, *, scale, index=0, **kwargs):
+        return common.SimpleNodeWithLoc(
+            int_value=node.int_value * scale,
+            float_value=node.float_value + index,
+            str_value=node.str_value + self.suffix,
+            loc=None,
+        )
+
+
+def test_visit_independent():
+    tree = _IndependentItemsNode(
+        items=[common.make_simple_node_with_loc() for _ in range(5)],
+        location=common.make_location_node(),
+    )
+    serial = _ScaleTranslator("_x").visit(tree, scale=2)
+    assert [item.int_value for item in serial.items] == [item.int_value * 2 for item in tree.items]
+
+    translator = _ScaleTranslator("_x")
+    with concurrent.futures.ProcessPoolExecutor(2) as executor:
+        translator.executor = executor
+        parallel = translator.visit(tree, scale=2)
+        (single,) = translator.visit_independent(tree.items[:1], scale=3)
+        assert single.content_hash() == translator.visit(tree.items[0], scale=3).content_hash()
+        indexed = translator.visit_independent(tree.items, index_arg="index", scale=1)
+
+    assert parallel.content_hash() == serial.content_hash()
+    assert [item.float_value for item in indexed] == [
+        item.float_value + index for index, item in enumerate(tree.items)
+    ]
+    assert parallel.location is tree.location
+    assert all(
+        item._raw_impl_fields()["id_"].number is None
+        and item._raw_impl_fields()["id_"].prefix == "SimpleNodeWithLoc"
+        for item in parallel.items
+    )
+
+
+class _ScopedScaleTranslator(eve.NodeTranslator):
+    scoped_context = True
+
+    def visit_SimpleNodeWithLoc(self, node):
+        return common.SimpleNodeWithLoc(
+            int_value=node.int_value * self.context.scale,
+            float_value=node.float_value + self.context.get("index", 0),
+            str_value=node.str_value,
+            loc=None,
+        )
+
+
+def test_visit_independent_scoped_context():
+    tree = _IndependentItemsNode(
+        items=[common.make_simple_node_with_loc() for _ in range(5)],
+        location=common.make_location_node(),
+    )
+    serial = _ScopedScaleTranslator().visit(tree, scale=2)
+
+    translator = _ScopedScaleTranslator()
+    with concurrent.futures.ProcessPoolExecutor(2) as executor:
+        translator.executor = executor
+        parallel = translator.visit(tree, scale=2)
+        with translator.context.scope(scale=3):
+            indexed = translator.visit_independent(tree.items, index_arg="index")
+
+    assert parallel.content_hash() == serial.content_hash()
+    assert [item.int_value for item in indexed] == [item.int_value * 3 for item in tree.items]
+    assert [item.float_value for item in indexed] == [
+        item.float_value + index for index, item in enumerate(tree.items)
+    ]
+    assert translator.context.depth == 0
+
+
+class _Symbol(eve.Node):
+    name: eve.SymbolName
+    val: int
+
+
+class _Scope(eve.Node, eve.SymbolTableTrait):
+    items: List[_Symbol]
+
+
+class TestNodeTranslator:
+    def test_copy(self, sample_node):
+        result = eve.NodeTranslator().visit(sample_node)
+
+        assert result == sample_node
+        assert result is not sample_node
+
+    def test_trusted_construction(self, fixed_compound_node):
+        class TrustedTranslator(eve.NodeTranslator):
+            trusted_construction = True
+
+            def visit_SimpleNode(self, node, **kwargs):
+                # Wrong node type: only detected in checked mode
+                return common.make_empty_node()
+
+        result = TrustedTranslator().visit(fixed_compound_node)
+        assert result.location == fixed_compound_node.location
+        assert isinstance(result.simple, common.EmptyNode)
+
+        with eve.concepts.checked_mode():
+            with pytest.raises(pydantic.ValidationError):
+                TrustedTranslator().visit(fixed_compound_node)
+
+    def test_trusted_construction_root_validators(self):
+        class TrustedTranslator(eve.NodeTranslator):
+            trusted_construction = True
+
+            def visit__Symbol(self, node, **kwargs):
+                return _Symbol(name=node.name, val=node.val + 10)
+
+        result = TrustedTranslator().visit(_Scope(items=[_Symbol(name="a", val=1)]))
+        assert result.symtable_["a"] is result.items[0]
+        assert result.symtable_["a"].val == 11
+
+    def test_copy_on_write(self, fixed_compound_node):
+        class CopyOnWriteTranslator(eve.NodeTranslator):
+            copy_on_write = True
+
+        result = CopyOnWriteTranslator().visit(fixed_compound_node)
+        assert result is fixed_compound_node
+
+        class IncrementTranslator(CopyOnWriteTranslator):
+            def visit_SimpleNodeWithLoc(self, node, **kwargs):
+                return node.copy(update={"int_value": node.int_value + 1})
+
+        result = IncrementTranslator().visit(fixed_compound_node)
+        assert result is not fixed_compound_node
+        assert result.simple_loc.int_value == fixed_compound_node.simple_loc.int_value + 1
+        assert result.location is fixed_compound_node.location
+        assert result.simple is fixed_compound_node.simple
+        assert result.simple_opt is fixed_compound_node.simple_opt
+
+
+class TestNodeMutator:
+    def test_change_detection(self, fixed_compound_node):
+        class CopyLocations(eve.NodeMutator):
+            def visit_LocationNode(self, node, **kwargs):
+                return node.copy()
+
+        class ContentCopyLocations(CopyLocations):
+            change_detection = eve.visitors.ChangeDetectionMode.CONTENT
+
+        location = fixed_compound_node.location
+        mutator = ContentCopyLocations()
+        mutator.changes = []
+        mutator.visit(fixed_compound_node)
+        assert fixed_compound_node.location is location
+        assert mutator.changes == []
+
+        mutator = CopyLocations()
+        mutator.changes = []
+        mutator.visit(fixed_compound_node)
+        assert fixed_compound_node.location is not location
+        assert fixed_compound_node.location == location
+        assert mutator.changes == [
+            eve.visitors.NodeChange(
+                fixed_compound_node, "location", location, fixed_compound_node.location
+            )
+        ]
+
+    def test_change_report(self):
+        class DropTwos(eve.NodeMutator):
+            def visit_int(self, node, **kwargs):
+                return eve.NOTHING if node == 2 else node
+
+        unchanged = (4, 5)
+        tree = [1, (2, 3), unchanged, 2]
+        mutator = DropTwos()
+        mutator.changes = []
+        mutator.visit(tree)
+
+        assert tree == [1, (3,), (4, 5)]
+        assert tree[2] is unchanged
+        assert mutator.changes == [
+            eve.visitors.NodeChange(tree, 1, (2, 3), (3,)),
+            eve.visitors.NodeChange(tree, 3, 2, eve.NOTHING),
+        ]
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Benchmark of compiled visitors on the IR trees of the ``fvm_nabla`` example pipeline.
+
+Run it as a module from the repository root::
+
+    python -m tests.tests_gtc.benchmarks.bench_compiled_visitors
+
+"""
+
+import os
+from typing import Any, Type
+
+import eve
+from tests.tests_eve.benchmarks.common import report, timed
+
+from .census_fvm_nabla import _run_example
+
+
+def _make_visitors(base: Type[eve.NodeVisitor]) -> Any:
+    class NodeCounter(base):  # type: ignore
+        def __init__(self) -> None:
+            self.count = 0
+
+        def visit_Node(self, node: eve.Node, **kwargs: Any) -> None:
+            self.count += 1
+            self.generic_visit(node, **kwargs)
+
+    class FieldAccessCollector(base):  # type: ignore
+        def __init__(self) -> None:
+            self.names = []
+
+        def visit_FieldAccess(self, node: eve.Node, **kwargs: Any) -> None:
+            self.names.append(node.name)
+
+    return NodeCounter, FieldAccessCollector
+
+
+def main() -> None:
+    irs = _run_example()
+    plain_visitors = _make_visitors(eve.NodeVisitor)
+    compiled_visitors = _make_visitors(eve.CompiledNodeVisitor)
+
+    rows = []
+    for ir_name in ("comp", "nir_comp", "usid_comp"):
+        tree = irs[ir_name]
+        for plain, compiled in zip(plain_visitors, compiled_visitors):
+            plain_time = timed(lambda: plain().visit(tree), number=20)
+            compiled_time = timed(lambda: compiled().visit(tree), number=20)
+            rows.append(
+                (
+                    f"{plain.__name__} on {ir_name}",
+                    plain_time,
+                    compiled_time,
+                    f"{plain_time / compiled_time:.2f}x",
+                )
+            )
+
+    report("Visit time: NodeVisitor | CompiledNodeVisitor | speed-up", rows)
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("PYTHONHASHSEED", "0")
+    main()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# Eve Toolchain - GT4Py Project - GridTools Framework
+#
+# Copyright (c) 2020, CSCS - Swiss National Supercomputing Center, ETH Zurich
+# All rights reserved.
+#
+# This file is part of the GT4Py project and the GridTools framework.
+# GT4Py is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or any later
+# version. See the LICENSE.txt file at the top-level directory of this
+# distribution for a copy of the license or check <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Memory census of the IR trees generated by the ``fvm_nabla`` example pipeline.
+
+It runs the example (in a temporary directory) with and without interning of
+inmutable nodes and reports the number of node objects and their approximate
+memory footprint. Run it as a module from the repository root::
+
+    python -m tests.tests_gtc.benchmarks.census_fvm_nabla
+
+If ``PYTHONHASHSEED`` is not set, the script runs itself again with
+``PYTHONHASHSEED=0``, so the reported numbers are reproducible.
+
+"""
+
+import collections
+import contextlib
+import io
+import os
+import pathlib
+import re
+import runpy
+import shutil
+import sys
+import tempfile
+from typing import Any, Dict, Tuple
+
+import eve
+from tests.tests_eve.benchmarks.common import report
+
+
+EXAMPLE_PATH = (
+    pathlib.Path(__file__).parents[3] / "examples" / "unstructured" / "fvm" / "fvm_nabla_gtir.py"
+)
+
+
+def _run_example() -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        script = shutil.copy(EXAMPLE_PATH, tmp_dir)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            result = runpy.run_path(script)
+        for name in ("ugpu", "unaive"):
+            result[name] = (pathlib.Path(tmp_dir) / f"generated_fvm_nabla_{name}.hpp").read_text()
+
+    return result
+
+
+def _normalize_ids(code: str) -> str:
+    # Renumber sequential ids (e.g. "kernel_HorizontalLoop_256") in order of appearance
+    numbers: Dict[str, str] = {}
+    return re.sub(r"(?<=_)\d+\b", lambda m: numbers.setdefault(m[0], str(len(numbers))), code)
+
+
+def _census(root: eve.Node) -> Tuple[collections.Counter, collections.Counter, int]:
+    """Count node instances and distinct node objects (by class) and their memory."""
+    instances: collections.Counter = collections.Counter()
+    objects: collections.Counter = collections.Counter()
+    seen = set()
+    size = 0
+    for node in eve.traverse_tree(root):
+        if isinstance(node, eve.Node):
+            name = node.__class__.__qualname__
+            instances[name] += 1
+            if id(node) not in seen:
+                seen.add(id(node))
+                objects[name] += 1
+                size += sys.getsizeof(node) + sys.getsizeof(node.__dict__)
+                size += sys.getsizeof(node.id_)
+
+    return instances, objects, size
+
+
+def main() -> None:
+    plain = _run_example()
+    with eve.concepts.interning() as table:
+        interned = _run_example()
+
+    for key in ("ugpu", "unaive"):
+        assert _normalize_ids(plain[key]) == _normalize_ids(
+            interned[key]
+        ), f"Generated {key} code differs with interning"
+
+    for ir_name in ("nir_comp", "usid_comp"):
+        instances, plain_objects, plain_size = _census(plain[ir_name])
+        _, interned_objects, interned_size = _census(interned[ir_name])
+        rows = [
+            (name, count, plain_objects[name], interned_objects[name])
+            for name, count in sorted(instances.items())
+            if plain_objects[name] != interned_objects[name]
+        ]
+        rows.append(
+            (
+                "total",
+                sum(instances.values()),
+                sum(plain_objects.values()),
+                sum(interned_objects.values()),
+            )
+        )
+        rows.append(
+            ("approx. size (KiB)", "", f"{plain_size / 1024:.1f}", f"{interned_size / 1024:.1f}")
+        )
+        report(f"{ir_name} nodes: instances | objects | objects with interning", rows)
+
+    print(f"\nInterning table: {len(table)} nodes, {table.hits} hits, {table.misses} misses")
+
+
+if __name__ == "__main__":
+    if "PYTHONHASHSEED" not in os.environ:
+        # Hash randomization is configured at interpreter startup: run again with a fixed seed
+        os.environ["PYTHONHASHSEED"] = "0"
+        target = ["-m", __spec__.name] if __spec__ is not None else [__file__]
+        os.execv(sys.executable, [sys.executable, *target, *sys.argv[1:]])
+    main()
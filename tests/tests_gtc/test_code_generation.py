@@ -14,7 +14,10 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import os
+import shutil
 import subprocess
+import sys
 from pathlib import Path
 
 import pytest
@@ -25,3 +28,24 @@ def test_lit_codegen_suite():
     lit_suite_path = Path(__file__).parent / "lit_codegen_suite"
     subprocess.run(f"lit -v {lit_suite_path}".split(), check=True)
     # assert proc.returncode == 0, "lit test suite did not pass without errors"
+
+
+def test_generated_code_is_reproducible(tmp_path):
+    # Generated code should not depend on hash randomization (e.g. set iteration order)
+    example = Path(__file__).parents[2] / "examples" / "unstructured" / "fvm" / "fvm_nabla_gtir.py"
+    python_path = [str(Path(__file__).parents[2] / "src"), os.environ.get("PYTHONPATH", "")]
+    outputs = []
+    for seed in ["1", "2"]:
+        run_path = tmp_path / seed
+        run_path.mkdir()
+        script = shutil.copy(example, run_path)
+        env = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=os.pathsep.join(python_path))
+        subprocess.run([sys.executable, script], check=True, capture_output=True, env=env)
+        outputs.append(
+            [
+                (run_path / f"generated_fvm_nabla_{name}.hpp").read_text()
+                for name in ("ugpu", "unaive")
+            ]
+        )
+
+    assert outputs[0] == outputs[1]